@@ -12,7 +12,7 @@ kwargs = {'author': '',
                  'Topic :: Scientific/Engineering'],
  'description': '',
  'download_url': '',
- 'entry_points': '[openmdao.component]\nnreltraining.actuator_disc_derivatives.ActuatorDisc=nreltraining.actuator_disc_derivatives:ActuatorDisc\nnreltraining.derivatives_simple.opt=nreltraining.derivatives_simple:opt\nnreltraining.bem.BEMPerf=nreltraining.bem:BEMPerf\nnreltraining.bem.BladeElement=nreltraining.bem:BladeElement\nnreltraining.bem.AutoBEM=nreltraining.bem:AutoBEM\nnreltraining.betz_limit.Betz_Limit=nreltraining.betz_limit:Betz_Limit\nnreltraining.derivatives_simple.simpleComp=nreltraining.derivatives_simple:simpleComp\nnreltraining.actuator_disc.ActuatorDisc=nreltraining.actuator_disc:ActuatorDisc\n\n[openmdao.container]\nnreltraining.actuator_disc_derivatives.ActuatorDisc=nreltraining.actuator_disc_derivatives:ActuatorDisc\nnreltraining.derivatives_simple.opt=nreltraining.derivatives_simple:opt\nnreltraining.bem.BEMPerf=nreltraining.bem:BEMPerf\nnreltraining.bem.BladeElement=nreltraining.bem:BladeElement\nnreltraining.bem.FlowConditions=nreltraining.bem:FlowConditions\nnreltraining.bem.AutoBEM=nreltraining.bem:AutoBEM\nnreltraining.betz_limit.Betz_Limit=nreltraining.betz_limit:Betz_Limit\nnreltraining.bem.BEMPerfData=nreltraining.bem:BEMPerfData\nnreltraining.derivatives_simple.simpleComp=nreltraining.derivatives_simple:simpleComp\nnreltraining.actuator_disc.ActuatorDisc=nreltraining.actuator_disc:ActuatorDisc',
+ 'entry_points': '[openmdao.component]\nnreltraining.actuator_disc_derivatives.ActuatorDisc=nreltraining.actuator_disc_derivatives:ActuatorDisc\nnreltraining.actuator_disc_derivatives.ActuatorDiscBatch=nreltraining.actuator_disc_derivatives:ActuatorDiscBatch\nnreltraining.derivatives_simple.opt=nreltraining.derivatives_simple:opt\nnreltraining.bem.BEMPerf=nreltraining.bem:BEMPerf\nnreltraining.bem.BladeElement=nreltraining.bem:BladeElement\nnreltraining.bem.BladeElementArray=nreltraining.bem:BladeElementArray\nnreltraining.bem.AutoBEM=nreltraining.bem:AutoBEM\nnreltraining.betz_limit.Betz_Limit=nreltraining.betz_limit:Betz_Limit\nnreltraining.derivatives_simple.simpleComp=nreltraining.derivatives_simple:simpleComp\nnreltraining.actuator_disc.ActuatorDisc=nreltraining.actuator_disc:ActuatorDisc\n\n[openmdao.container]\nnreltraining.actuator_disc_derivatives.ActuatorDisc=nreltraining.actuator_disc_derivatives:ActuatorDisc\nnreltraining.actuator_disc_derivatives.ActuatorDiscBatch=nreltraining.actuator_disc_derivatives:ActuatorDiscBatch\nnreltraining.derivatives_simple.opt=nreltraining.derivatives_simple:opt\nnreltraining.bem.BEMPerf=nreltraining.bem:BEMPerf\nnreltraining.bem.BladeElement=nreltraining.bem:BladeElement\nnreltraining.bem.BladeElementArray=nreltraining.bem:BladeElementArray\nnreltraining.bem.FlowConditions=nreltraining.bem:FlowConditions\nnreltraining.bem.AutoBEM=nreltraining.bem:AutoBEM\nnreltraining.betz_limit.Betz_Limit=nreltraining.betz_limit:Betz_Limit\nnreltraining.bem.BEMPerfData=nreltraining.bem:BEMPerfData\nnreltraining.derivatives_simple.simpleComp=nreltraining.derivatives_simple:simpleComp\nnreltraining.actuator_disc.ActuatorDisc=nreltraining.actuator_disc:ActuatorDisc',
  'include_package_data': True,
  'install_requires': ['openmdao.main'],
  'keywords': ['openmdao'],
@@ -109,7 +109,28 @@ kwargs = {'author': '',
                                    'sphinx_build/html/_static/websupport.js',
                                    'test/.gitignore',
                                    'test/__init__.py',
-                                   'test/test_nreltraining.py']},
+                                   'test/fixtures.py',
+                                   'test/test_actuator_disc.py',
+                                   'test/test_aep.py',
+                                   'test/test_airfoil.py',
+                                   'test/test_bem.py',
+                                   'test/test_benchmarks.py',
+                                   'test/test_cache.py',
+                                   'test/test_case_index.py',
+                                   'test/test_columnar_recorder.py',
+                                   'test/test_complex_step.py',
+                                   'test/test_induction.py',
+                                   'test/test_multifidelity.py',
+                                   'test/test_multistart.py',
+                                   'test/test_nreltraining.py',
+                                   'test/test_parallel_doe.py',
+                                   'test/test_patching.py',
+                                   'test/test_perf_surface.py',
+                                   'test/test_profiling.py',
+                                   'test/test_radial_refinement.py',
+                                   'test/test_scheduling.py',
+                                   'test/test_uq.py',
+                                   'test/test_windfarm.py']},
  'package_dir': {'': 'src'},
  'packages': ['nreltraining', 'nreltraining.test'],
  'url': '',
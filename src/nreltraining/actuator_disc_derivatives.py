@@ -1,5 +1,5 @@
 from openmdao.main.api import Component
-from openmdao.lib.datatypes.api import Float
+from openmdao.lib.datatypes.api import Float, Array
 
 import numpy as np
 
@@ -87,6 +87,111 @@ class ActuatorDisc(Component):
         output_keys = ('Vr', 'Vd','Ct','thrust','Cp','power',)
         return input_keys, output_keys
 
+
+def _disc(a, Area, rho, Vu):
+    """(Vr, Vd, Ct, thrust, Cp, power) of actuator discs, element wise on
+    arrays, complex ones included"""
+    qA = .5*rho*Area*Vu**2
+
+    Vd = Vu*(1-2 * a)
+    Ct = 4*a*(1-a)
+    Cp = Ct*(1-a)
+
+    return .5*(Vu + Vd), Vd, Ct, Ct*qA, Cp, Cp*qA*Vu
+
+
+class ActuatorDiscBatch(Component):
+    """ActuatorDisc evaluated at many operating points at once.
+
+    Every input is an array with either one value or one value per
+    operating point; they broadcast against each other, so e.g. a wind speed
+    time series can be run against a single disc area and density. The
+    outputs have one value per operating point, whatever the `n` they
+    were first sized with.
+    """
+
+    def __init__(self, n=1):
+        super(ActuatorDiscBatch, self).__init__()
+
+        for name, value, desc, units in (('a', .5, 'Induced Velocity Factor', None),
+                                         ('Area', 10., 'Rotor disc area', 'm**2'),
+                                         ('rho', 1.225, 'air density', 'kg/m**3'),
+                                         ('Vu', 11., 'Freestream air velocity, upstream of rotor', 'm/s')):
+            self.add(name, Array(value*np.ones((n,)), iotype='in', desc=desc,
+                                 dtype=Float, units=units))
+
+        for name, desc, units in (('Vr', 'Air velocity at rotor exit plane', 'm/s'),
+                                  ('Vd', 'Slipstream air velocity, dowstream of rotor', 'm/s'),
+                                  ('Ct', 'Thrust Coefficient', None),
+                                  ('thrust', 'Thrust produced by the rotor', 'N'),
+                                  ('Cp', 'Power Coefficient', None),
+                                  ('power', 'Power produced by the rotor', 'W')):
+            self.add(name, Array(np.zeros((n,)), iotype='out', desc=desc,
+                                 dtype=Float, units=units))
+
+    def _inputs(self):
+        """the inputs broadcast to the shape of the outputs"""
+        return np.broadcast_arrays(*[np.atleast_1d(np.asarray(getattr(self, name), dtype=float))
+                                     for name in ('a', 'Area', 'rho', 'Vu')])
+
+    def execute(self):
+        for name, value in zip(('Vr', 'Vd', 'Ct', 'thrust', 'Cp', 'power'), _disc(*self._inputs())):
+            setattr(self, name, value)
+
+    def provideJ(self):
+        """partial derivatives at every operating point, a (6, 4, n) array
+        of the 6x4 blocks of :meth:`ActuatorDisc.provideJ`; the jacobian is
+        block diagonal, so :meth:`apply_deriv` and :meth:`apply_derivT` use
+        the blocks instead of a dense matrix"""
+        a, Area, rho, Vu = self._inputs()
+        one_minus_a = 1 - a
+        zero = np.zeros(a.shape)
+
+        self.J = np.array([
+            # Vr
+            [-Vu, zero, zero, one_minus_a],
+            # Vd
+            [-2*Vu, zero, zero, 1 - 2*a],
+            # Ct
+            [4 - 8*a, zero, zero, zero],
+            # thrust
+            [Area*Vu**2*rho*(2 - 4*a), 2*Vu**2*a*rho*one_minus_a,
+             2*a*Area*Vu**2*one_minus_a, 4*a*Area*rho*Vu*one_minus_a],
+            # Cp
+            [4*a*(2*a - 2) + 4*one_minus_a**2, zero, zero, zero],
+            # power
+            [2*Area*Vu**3*rho*(a*(2*a - 2) + one_minus_a**2), 2*Vu**3*a*rho*one_minus_a**2,
+             2*a*Area*Vu**3*one_minus_a**2, 6*Area*Vu**2*a*rho*one_minus_a**2]])
+
+        return self.J
+
+    def apply_deriv(self, arg, result):
+        """result += J*arg for the inputs in `arg` and outputs in `result`"""
+        inputs, outputs = self.list_deriv_vars()
+        for i, output in enumerate(outputs):
+            if output in result:
+                for j, name in enumerate(inputs):
+                    if name in arg:
+                        result[output] += self.J[i, j]*arg[name]
+
+    def apply_derivT(self, arg, result):
+        """result += J^T*arg; a shared input gets the sum over the
+        operating points"""
+        inputs, outputs = self.list_deriv_vars()
+        for j, name in enumerate(inputs):
+            if name in result:
+                for i, output in enumerate(outputs):
+                    if output in arg:
+                        product = self.J[i, j]*arg[output]
+                        if np.size(result[name]) == 1:
+                            product = product.sum()
+                        result[name] += product
+
+    def list_deriv_vars(self):
+        input_keys = ('a', 'Area', 'rho', 'Vu')
+        output_keys = ('Vr', 'Vd','Ct','thrust','Cp','power',)
+        return input_keys, output_keys
+
 if __name__ == "__main__":
 
     comp = ActuatorDisc()
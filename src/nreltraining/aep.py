@@ -0,0 +1,172 @@
+"""Annual energy production of a rotor design from measured wind records.
+
+The records are streamed from disk in chunks and reduced to the number of
+records in every (wind speed, air density) bin, so memory use depends on the
+number of bins, not on the length of the record. The rotor is then run once
+per occupied bin and its net power is weighted by the time spent in the bin.
+
+Records are either text, one record per line with the wind speed and
+optionally the air density in whitespace or comma separated columns (lines
+that don't parse, such as headers, are skipped), or a ``.npy`` array with one
+row per record, which is memory-mapped.
+"""
+
+from itertools import islice
+
+import numpy as np
+
+
+SECONDS_PER_YEAR = 365.25*24*3600
+
+
+def read_wind_records(path, speed_column=0, density_column=None, chunk_size=100000):
+    """Yield ``(speed, density)`` arrays of at most `chunk_size` records.
+    `density` is None when there is no `density_column`."""
+    columns = [speed_column] if density_column is None else [speed_column, density_column]
+
+    if path.endswith('.npy'):
+        data = np.load(path, mmap_mode='r')
+        data = data.reshape(len(data), -1)
+        for start in range(0, len(data), chunk_size):
+            chunk = np.array(data[start:start + chunk_size, columns], dtype=float)
+            yield chunk[:, 0], (chunk[:, 1] if density_column is not None else None)
+        return
+
+    n_fields = max(columns) + 1
+    with open(path) as f:
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                break
+            rows = []
+            for line in lines:
+                fields = line.replace(',', ' ').split()
+                if len(fields) < n_fields:
+                    continue
+                try:
+                    rows.append([float(fields[i]) for i in columns])
+                except ValueError:
+                    continue
+            if rows:
+                chunk = np.array(rows)
+                yield chunk[:, 0], (chunk[:, 1] if density_column is not None else None)
+
+
+class WindBins(object):
+    """Counts of wind records per (speed, density) bin.
+
+    Speeds are binned to multiples of `speed_step`; densities to multiples of
+    `density_step`, or not at all when it is None (every record then counts
+    at `density`). Records that aren't finite are counted as missing.
+    """
+
+    # density bins are far fewer than this
+    _stride = 2**20
+
+    def __init__(self, speed_step=.5, density_step=None, density=1.225):
+        self.speed_step = speed_step
+        self.density_step = density_step
+        self.density = density
+        self.counts = {}
+        self.n_records = 0
+        self.n_missing = 0
+
+    def add(self, speed, density=None):
+        """count a chunk of records"""
+        speed = np.asarray(speed, dtype=float)
+        if density is None or self.density_step is None:
+            density = np.zeros_like(speed)
+        ok = np.isfinite(speed) & np.isfinite(density) & (density >= 0)
+        self.n_records += speed.size
+        self.n_missing += int((~ok).sum())
+
+        i = np.round(speed[ok]/self.speed_step).astype(np.int64)
+        if self.density_step is None:
+            j = np.zeros_like(i)
+        else:
+            j = np.round(np.asarray(density, dtype=float)[ok]/self.density_step).astype(np.int64)
+
+        # one integer per (speed, density) bin, so a chunk is counted at once
+        keys, inverse = np.unique(i*self._stride + j, return_inverse=True)
+        for key, n in zip(keys, np.bincount(inverse)):
+            key = divmod(int(key), self._stride)
+            self.counts[key] = self.counts.get(key, 0) + int(n)
+
+    def centers(self):
+        """bin centers ``(speed, density)`` and record counts, by speed"""
+        keys = sorted(self.counts)
+        speed = np.array([i*self.speed_step for i, j in keys])
+        if self.density_step is None:
+            density = np.ones(len(keys))*self.density
+        else:
+            density = np.array([j*self.density_step for i, j in keys])
+        return speed, density, np.array([self.counts[k] for k in keys])
+
+
+def bin_wind_records(path, speed_step=.5, density_step=None, density=1.225, **kwargs):
+    """:class:`WindBins` of the records in the file at `path`; `kwargs` go to
+    :func:`read_wind_records`"""
+    bins = WindBins(speed_step, density_step, density)
+    for speed, rho in read_wind_records(path, **kwargs):
+        bins.add(speed, rho)
+    return bins
+
+
+def rotor_power(model, speed, density, cut_in=3., cut_out=25., rated_power=None):
+    """Net power of an AutoBEM design at every (speed, density) point.
+
+    The design itself is not changed: the points are evaluated together by
+    the model's power_curve. Points outside the cut-in and cut-out speeds
+    produce nothing, and power is clipped to ``[0, rated_power]``.
+    """
+    speed = np.asarray(speed, dtype=float)
+    density = np.asarray(density, dtype=float)
+    power = np.zeros(len(speed))
+    on = (cut_in <= speed) & (speed <= cut_out)
+    if on.any():
+        power[on] = model.power_curve(speed[on], density[on])['net_power']
+
+    return np.clip(power, 0., np.inf if rated_power is None else rated_power)
+
+
+def annual_energy_production(model, path, record_interval=600., speed_step=.5,
+                             density_step=None, density=1.225, cut_in=3., cut_out=25.,
+                             rated_power=None, **kwargs):
+    """Annual energy production, in J, of an AutoBEM design over the wind
+    records in `path`, each record covering `record_interval` seconds.
+
+    Returns a dict with the ``aep``, the total ``energy`` over the record,
+    the ``years`` of valid records, and the bin ``speed``, ``density``,
+    ``count`` and ``power`` arrays it was computed from.
+    """
+    bins = bin_wind_records(path, speed_step, density_step, density, **kwargs)
+    speed, rho, count = bins.centers()
+    power = rotor_power(model, speed, rho, cut_in, cut_out, rated_power)
+
+    energy = float(np.dot(power, count))*record_interval
+    years = (bins.n_records - bins.n_missing)*record_interval/SECONDS_PER_YEAR
+    return {'aep': energy/years if years else 0.,
+            'energy': energy,
+            'years': years,
+            'speed': speed,
+            'density': rho,
+            'count': count,
+            'power': power}
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    from bem import AutoBEM
+
+    # three years of 10 minute records from a Weibull distribution
+    n = 3*52596
+    path = os.path.join(tempfile.mkdtemp(), 'wind.npy')
+    np.save(path, np.column_stack([8.*np.random.weibull(2., n), 1.225 + .02*np.random.randn(n)]))
+
+    rotor = AutoBEM(6, engine="vector")
+    result = annual_energy_production(rotor, path, density_column=1, density_step=.025)
+
+    print "bins evaluated:", len(result['count'])
+    print "AEP: %.1f MWh" % (result['aep']/3.6e9)
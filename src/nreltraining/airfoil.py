@@ -0,0 +1,171 @@
+"""Airfoil lift and drag polars shared by the blade element components.
+
+An :class:`AirfoilPolar` resamples its lift and drag tables onto uniform
+angle of attack grids when it is built, so a lookup is an index computation
+rather than a search, and it works on whole arrays of angles at once. Polars
+are immutable, so one instance can be handed to every blade element of every
+rotor. :func:`load_polar` keeps one instance per file for the whole process,
+and it keeps a binary copy of the parsed file next to the original.
+"""
+
+import os
+import re
+from math import pi
+
+import numpy as np
+
+
+class _UniformTable(object):
+    """Piecewise linear table sampled at a constant spacing"""
+
+    def __init__(self, x, y, step, fill_value=None):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+
+        n = int(round((x[-1] - x[0])/step)) + 1
+        self.start = x[0]
+        self.step = (x[-1] - x[0])/(n - 1)
+        self.end = x[-1]
+        self.values = np.interp(np.linspace(x[0], x[-1], n), x, y)
+        self.values.flags.writeable = False
+
+        # outside the table either use the fill value or hold the end values
+        self.fill_value = fill_value
+
+    def __call__(self, x):
+        """value and slope of the table at `x`; complex `x` gives a complex
+        value, whose imaginary part carries the slope, for complex step
+        derivatives"""
+        v = self.values
+        x = np.asarray(x)
+        s = (x - self.start)/self.step
+        # segments and the ends are picked by the real part only
+        x = x.real
+        i = np.clip(np.floor(s.real).astype(int), 0, len(v) - 2)
+        t = s - i
+
+        delta = (v[i+1] - v[i])
+        value = v[i] + t*delta
+        slope = delta/self.step
+
+        outside = (x < self.start) | (x > self.end)
+        if np.any(outside):
+            if self.fill_value is None:
+                value = np.where(x < self.start, v[0], np.where(x > self.end, v[-1], value))
+            else:
+                value = np.where(outside, self.fill_value, value)
+            slope = np.where(outside, 0., slope)
+
+        return value, slope
+
+
+class AirfoilPolar(object):
+    """Lift and drag coefficients of an airfoil as functions of angle of
+    attack (in radians)"""
+
+    def __init__(self, cl_alpha, cl, cd_alpha, cd, step=pi/720, fill_value=None, name=""):
+        self.name = name
+        self._cl = _UniformTable(cl_alpha, cl, step, fill_value)
+        self._cd = _UniformTable(cd_alpha, cd, step, fill_value)
+
+    @classmethod
+    def from_arrays(cls, alpha, cl, cd, **kwargs):
+        """build a polar from lift and drag tabulated on the same angles"""
+        return cls(alpha, cl, alpha, cd, **kwargs)
+
+    @classmethod
+    def from_file(cls, path, cache=True, **kwargs):
+        """Read a polar from a text file.
+
+        Both XFOIL polar output and plain whitespace or comma separated
+        ``alpha C_L C_D`` columns (alpha in degrees) are understood; any line
+        that doesn't start with three numbers is skipped. Unless `cache` is
+        False, the parsed table is saved next to `path` as ``<path>.npz``
+        and reused for as long as the text file is unchanged.
+        """
+        alpha, cl, cd = _read_polar_table(path, cache)
+        kwargs.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+        return cls.from_arrays(alpha*pi/180, cl, cd, **kwargs)
+
+    def lift(self, alpha):
+        """lift coefficient and its slope, ``C_L, dC_L/dalpha``"""
+        return self._cl(alpha)
+
+    def drag(self, alpha):
+        """drag coefficient and its slope, ``C_D, dC_D/dalpha``"""
+        return self._cd(alpha)
+
+    def coefficients(self, alpha):
+        """lift and drag coefficients, ``C_L, C_D``"""
+        return self._cl(alpha)[0], self._cd(alpha)[0]
+
+
+_number = re.compile(r'[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$')
+
+
+def _parse_polar_text(path):
+    rows = []
+    with open(path) as f:
+        for line in f:
+            fields = line.replace(',', ' ').split()
+            if len(fields) >= 3 and all(_number.match(x) for x in fields[:3]):
+                rows.append([float(x) for x in fields[:3]])
+    if len(rows) < 2:
+        raise ValueError("no 'alpha C_L C_D' table found in '%s'" % path)
+
+    table = np.array(rows)
+    table = table[np.argsort(table[:, 0], kind='mergesort')]
+    keep = np.ones(len(table), dtype=bool)
+    keep[1:] = np.diff(table[:, 0]) > 0
+    return table[keep].T
+
+
+def _read_polar_table(path, cache):
+    stat = os.stat(path)
+    cache_path = path + '.npz'
+
+    if cache and os.path.exists(cache_path):
+        try:
+            data = np.load(cache_path)
+            try:
+                if data['mtime'] == stat.st_mtime and data['size'] == stat.st_size:
+                    return data['alpha'], data['cl'], data['cd']
+            finally:
+                data.close()
+        except (IOError, KeyError, ValueError):
+            pass
+
+    alpha, cl, cd = _parse_polar_text(path)
+
+    if cache:
+        try:
+            with open(cache_path, 'wb') as f:
+                np.savez(f, alpha=alpha, cl=cl, cd=cd, mtime=stat.st_mtime, size=stat.st_size)
+        except (IOError, OSError):
+            pass  # read-only location, just parse again next time
+
+    return alpha, cl, cd
+
+
+_polars = {}
+
+
+def load_polar(path, **kwargs):
+    """The :class:`AirfoilPolar` for a polar file, read only once per
+    process no matter how many blade elements use it; files loaded with
+    different keyword arguments are different polars"""
+    key = (os.path.abspath(path), tuple(sorted(kwargs.items())))
+    if key not in _polars:
+        _polars[key] = AirfoilPolar.from_file(path, **kwargs)
+    return _polars[key]
+
+
+def default_polar():
+    """rough linear interpolation from naca 0012 airfoil data, the tables
+    the blade element components have always used"""
+    if None not in _polars:
+        deg = pi/180
+        _polars[None] = AirfoilPolar(np.array([0., 13., 15, 20, 30])*deg, [0, 1.3, .8, .7, 1.1],
+                                     np.array([0., 10, 20, 30, 40])*deg, [0., 0., 0.3, 0.6, 1.],
+                                     step=deg, fill_value=0.001, name="naca0012 (rough)")
+    return _polars[None]
@@ -1,27 +1,297 @@
 
+from functools import partial
 from math import pi, cos, sin, tan
 
 import numpy as np
-from scipy.optimize import fsolve
-from scipy.interpolate import interp1d
 
 from openmdao.main.api import Component, Assembly, VariableTree
-from openmdao.lib.datatypes.api import Float, Int, Array, VarTree
-from openmdao.lib.components.api import LinearDistribution
+from openmdao.lib.datatypes.api import Float, Int, Bool, Array, VarTree
+from openmdao.lib.components.api import LinearDistribution as _LinearDistribution
 
 from openmdao.lib.casehandlers.api import JSONCaseRecorder
 from openmdao.lib.drivers.api import SLSQPdriver
-from openmdao.lib.casehandlers.api import CaseDataset, caseset_query_to_html
 
+from airfoil import default_polar
+from cache import model_variables, restore_values, variable_values
+from patching import patch, unpatch
+from case_report import write_case_report
+from complex_step import ComplexStepDerivatives
+from induction import induction_residual, solve_induction, solve_induction_warm, SolverCounters
 
 
-class BladeElement(Component):
 
-    """Calculations for a single radial slice of a rotor blade"""
+class FlowConditions(VariableTree):
+    rho = Float(1.225, desc="air density", units="kg/m**3")
+    V = Float(7., desc="free stream air velocity", units="m/s")
+
+
+class BEMPerfData(VariableTree):
+    """Container that holds all rotor performance data"""
+
+    net_thrust = Float(desc="net axial thrust", units="N")
+    net_power = Float(desc="net power produced", units="W")
+    Ct = Float(desc="thrust coefficient")
+    Cp = Float(desc="power coefficient")
+    J = Float(desc="advance ratio")
+    tip_speed_ratio = Float(desc="tip speed ratio")
+    #eta = Float(desc="turbine efficiency")
+
+
+class LinearDistribution(_LinearDistribution):
+    """LinearDistribution with analytic derivatives, and the spacing
+    repeated per station as `dr` for components that take a width per
+    element"""
+
+    def __init__(self, n=10, units=None):
+        super(LinearDistribution, self).__init__(n=n, units=units)
+        self._n = n
+        self.add('dr', Array(iotype='out', desc='spacing at each of the %d stations' % n,
+                             default_value=np.zeros((n,)), shape=(n,), dtype=Float, units=units))
+
+    def execute(self):
+        super(LinearDistribution, self).execute()
+        self.dr = self.delta*np.ones(self._n)
+
+    def list_deriv_vars(self):
+        return ('start', 'end', 'offset'), ('output', 'delta', 'dr')
+
+    def provideJ(self):
+        n = self._n
+        J = np.zeros((2*n + 1, 3))
+
+        frac = np.arange(n)/(n - 1.)
+        J[:n, 0] = 1 - frac
+        J[:n, 1] = frac
+        J[:n, 2] = 1.
+
+        J[n:, 0] = -1./(n - 1)
+        J[n:, 1] = 1./(n - 1)
+
+        return J
+
+
+def station_fractions(n, spacing="linear"):
+    """Positions of `n` stations between 0 and 1, including both ends.
+    "cosine" spacing clusters the stations towards both ends. That only
+    pays off where the loading changes fastest there; for the default
+    design, whose roughest loading is a little way out from the hub, it's
+    less accurate than even spacing, and refine_stations does better than
+    either."""
+    if spacing == "linear":
+        return np.linspace(0., 1., n)
+    if spacing == "cosine":
+        return .5*(1 - np.cos(np.linspace(0., pi, n)))
+    raise ValueError("spacing must be 'linear' or 'cosine', not '%s'" % spacing)
+
+
+class StationDistribution(Component):
+    """Distributes a value between start and end at arbitrary fractions of
+    the way, given by the `fractions` input (increasing from 0 to 1).
+
+    `dr` is the width each station stands for: half the distance between
+    its neighbours, or the distance to its only neighbour at the ends. For
+    evenly spaced stations it equals LinearDistribution's `delta`.
+    """
+
+    def __init__(self, fractions, units=None):
+        super(StationDistribution, self).__init__()
+        n = len(fractions)
+        self._n = n
+
+        self.add('start', Float(0., iotype='in', desc='value at the first station', units=units))
+        self.add('end', Float(1., iotype='in', desc='value at the last station', units=units))
+        self.add('offset', Float(0., iotype='in', desc='added to every station value', units=units))
+        self.add('fractions', Array(iotype='in', desc='position of each of the %d stations' % n,
+                                    default_value=np.array(fractions, dtype=float),
+                                    shape=(n,), dtype=Float))
+        self.add('output', Array(iotype='out', desc='value at each of the %d stations' % n,
+                                 default_value=np.zeros((n,)), shape=(n,), dtype=Float, units=units))
+        self.add('dr', Array(iotype='out', desc='width of each of the %d stations' % n,
+                             default_value=np.zeros((n,)), shape=(n,), dtype=Float, units=units))
+
+    def execute(self):
+        span = self.end - self.start
+        self.output = self.start + self.fractions*span + self.offset
+        self.dr = np.gradient(self.fractions)*span
+
+    def list_deriv_vars(self):
+        return ('start', 'end', 'offset'), ('output', 'dr')
+
+    def provideJ(self):
+        n = self._n
+        J = np.zeros((2*n, 3))
+
+        J[:n, 0] = 1 - self.fractions
+        J[:n, 1] = self.fractions
+        J[:n, 2] = 1.
+
+        width = np.gradient(self.fractions)
+        J[n:, 0] = -width
+        J[n:, 1] = width
+
+        return J
+
+
+def _element_derivatives(elem):
+    """Partial derivatives of delta_Ct, delta_Cp and lambda_r with respect to
+    rpm, r, dr, twist, chord, rho and V_inf for a converged BladeElement or
+    BladeElementArray, as a dict keyed by (output, input).
+
+    The induction factors are implicit functions of lambda_r, sigma and
+    twist, so their sensitivities come from the jacobian of the converged
+    induction residual instead of from re-solving.
+    """
+    a, b, lam, phi = elem.a, elem.b, elem.lambda_r, elem.phi
+    twist, chord, dr, r, B = elem.twist, elem.chord, elem.dr, elem.r, elem.B
+
+    # implicit function theorem: dx/dq = -(dR/dx)^-1 dR/dq
+    R_a, R_b, dR = induction_residual(a, b, lam, elem.sigma, twist, elem.polar.lift)
+    det = dR['a', 'a']*dR['b', 'b'] - dR['a', 'b']*dR['b', 'a']
+    d_a, d_b = {}, {}
+    for q in ('lambda_r', 'sigma', 'twist'):
+        d_a[q] = -(dR['b', 'b']*dR['a', q] - dR['a', 'b']*dR['b', q])/det
+        d_b[q] = -(dR['a', 'a']*dR['b', q] - dR['b', 'a']*dR['a', q])/det
+
+    # phi = arctan(lambda_r*(1+b)/(1-a))
+    u = lam*(1 + b)/(1 - a)
+    d_phi = 1./(1 + u**2)/(1 - a)
+    phi_a = d_phi*u
+    phi_b = d_phi*lam
+    phi_lam = d_phi*(1 + b)
+
+    C_L, dC_L = elem.polar.lift(elem.alpha)
+    C_D, dC_D = elem.polar.drag(elem.alpha)
+    sin_phi, cos_phi, tan_phi = np.sin(phi), np.cos(phi), np.tan(phi)
+
+    # delta_Ct = B*chord*dr/(pi*r**2) * W * F
+    W = (1 - a)**2 + lam**2*(1 - b)**2
+    F = C_L*cos_phi - C_D*sin_phi
+    F_twist = -(dC_L*cos_phi - dC_D*sin_phi)  # alpha = pi/2 - twist - phi
+    F_phi = F_twist - C_L*sin_phi - C_D*cos_phi
+    geom = B*chord*dr/(pi*r**2)
+    Ct_a = geom*(-2*(1 - a)*F + W*F_phi*phi_a)
+    Ct_b = geom*(-2*lam**2*(1 - b)*F + W*F_phi*phi_b)
+    Ct_lam = geom*(2*lam*(1 - b)**2*F + W*F_phi*phi_lam)
+    Ct_twist = geom*W*F_twist
+
+    # delta_Cp = b*(1-a)*lambda_r**3 * H
+    H = 1 - C_D/C_L*tan_phi
+    H_twist = (dC_D*C_L - C_D*dC_L)/C_L**2*tan_phi
+    H_phi = H_twist - C_D/C_L/cos_phi**2
+    Cp_0 = b*(1 - a)*lam**3
+    Cp_a = -b*lam**3*H + Cp_0*H_phi*phi_a
+    Cp_b = (1 - a)*lam**3*H + Cp_0*H_phi*phi_b
+    Cp_lam = 3*b*(1 - a)*lam**2*H + Cp_0*H_phi*phi_lam
+    Cp_twist = Cp_0*H_twist
+
+    # totals with respect to the induction parameters
+    dCt = {}
+    dCp = {}
+    for q, Ct_q, Cp_q in (('lambda_r', Ct_lam, Cp_lam), ('sigma', 0., 0.), ('twist', Ct_twist, Cp_twist)):
+        dCt[q] = Ct_q + Ct_a*d_a[q] + Ct_b*d_b[q]
+        dCp[q] = Cp_q + Cp_a*d_a[q] + Cp_b*d_b[q]
+
+    # lambda_r = rpm*2*pi/60*r/V_inf  and  sigma = B*chord/(2*pi*r)
+    lam_rpm = 2*pi/60*r/elem.V_inf
+    lam_r = lam/r
+    lam_V = -lam/elem.V_inf
+    sig_chord = B/(2*pi*r)
+    sig_r = -elem.sigma/r
+
+    J = {}
+    for out, d in (('delta_Ct', dCt), ('delta_Cp', dCp)):
+        J[out, 'rpm'] = d['lambda_r']*lam_rpm
+        J[out, 'r'] = d['lambda_r']*lam_r + d['sigma']*sig_r
+        J[out, 'twist'] = d['twist']
+        J[out, 'chord'] = d['sigma']*sig_chord
+        J[out, 'V_inf'] = d['lambda_r']*lam_V
+        J[out, 'rho'] = 0*lam
+        J[out, 'dr'] = 0*lam
+    J['delta_Ct', 'r'] = J['delta_Ct', 'r'] - 2*elem.delta_Ct/r
+    J['delta_Ct', 'chord'] = J['delta_Ct', 'chord'] + B*dr/(pi*r**2)*W*F
+    J['delta_Ct', 'dr'] = B*chord/(pi*r**2)*W*F
+
+    J['lambda_r', 'rpm'] = lam_rpm
+    J['lambda_r', 'r'] = lam_r
+    J['lambda_r', 'V_inf'] = lam_V
+    for name in ('dr', 'twist', 'chord', 'rho'):
+        J['lambda_r', name] = 0*lam
+
+    return J
+
+
+def _trapz_derivatives(y, x):
+    """d/dy and d/dx of np.trapz(y, x=x)"""
+    dx = np.diff(x)
+    d_y = np.zeros(len(y))
+    d_y[:-1] += .5*dx
+    d_y[1:] += .5*dx
+
+    seg = .5*(y[:-1] + y[1:])
+    d_x = np.zeros(len(x))
+    d_x[:-1] -= seg
+    d_x[1:] += seg
+    return d_y, d_x
+
+
+def _section_loads(a, b, phi, alpha, lambda_r, omega_r, chord, dr, r, B, rho, V_inf, polar):
+    """delta_Ct, delta_Cp, V_0, V_1 and V_2 of solved blade stations; all
+    arguments broadcast, e.g. to (wind speed, station) arrays"""
+    V_0 = V_inf - a*V_inf
+    V_2 = omega_r-b*omega_r
+    V_1 = (V_0**2+V_2**2)**.5
+
+    q_c = B*.5*(rho*V_1**2)*chord*dr
+    C_L, C_D = polar.coefficients(alpha)
+    delta_Ct = q_c*(C_L*np.cos(phi)-C_D*np.sin(phi))/(.5*rho*(V_inf**2)*(pi*r**2))
+    delta_Cp = b*(1-a)*lambda_r**3*(1-C_D/C_L*np.tan(phi))
+    return delta_Ct, delta_Cp, V_0, V_1, V_2
+
+
+def _thrust_weights(lambda_r, tip_speed_ratio):
+    """weights of the stations' delta_Ct in the rotor Ct.
+
+    delta_Ct is the thrust of a station over the area of a disc of its own
+    radius and already carries the station's width dr, which is its
+    trapezoid weight along the blade except at the two ends, where it's
+    twice that. Scaling by (r/r_tip)**2 and halving the end stations
+    integrates the thrust along the blade with the trapezoid rule, so Ct
+    doesn't depend on how the stations are spaced."""
+    weights = (lambda_r/np.asarray(tip_speed_ratio)[..., None])**2
+    ends = np.ones(lambda_r.shape[-1])
+    ends[[0, -1]] = .5
+    return weights*ends
+
+
+def _rotor_performance(delta_Ct, delta_Cp, lambda_r, r, rpm, rho, V_inf):
+    """BEMPerfData values as a dict, integrating the stations along the last
+    axis, so (wind speed, station) arrays give one value per wind speed"""
+    norm = (.5*rho*(V_inf**2)*(pi*r**2))
+    omega = rpm*2*pi/60
+    tip_speed_ratio = omega*r/V_inf
+    Ct = np.sum(delta_Ct*_thrust_weights(lambda_r, tip_speed_ratio), axis=-1)
+    Cp = np.trapz(delta_Cp, x=lambda_r, axis=-1) * 8. / lambda_r.max(axis=-1)**2
+
+    return {'Ct': Ct,
+            'net_thrust': Ct*norm,
+            'Cp': Cp,
+            'net_power': Cp*norm*V_inf,
+            'J': V_inf/(rpm/60.0*2*r),
+            'tip_speed_ratio': tip_speed_ratio}
+
+
+class BladeElement(ComplexStepDerivatives, Component):
+
+    """Calculations for a single radial slice of a rotor blade
+
+    With `complex_step`, provideJ takes complex step derivatives instead of
+    the analytic ones.
+    """
 
     # inputs
     a_init = Float(0.2, iotype="in", desc="initial guess for axial inflow factor")
     b_init = Float(0.01, iotype="in", desc="initial guess for angular inflow factor")
+    warm_start = Bool(False, iotype="in", desc="start the induction solve from the last converged values")
     rpm = Float(106.952, iotype="in", desc="rotations per minute", low=0, units="min**-1")
     r = Float(5., iotype="in", desc="mean radius of the blade element", units="m")
     dr = Float(1., iotype="in", desc="width of the blade element", units="m")
@@ -45,54 +315,208 @@ class BladeElement(Component):
     b = Float(iotype="out", desc="converged value for radial inflow factor")
     lambda_r = Float(8, iotype="out", desc="local tip speed ratio")
     phi = Float(1.487, iotype="out", desc="relative flow angle onto blades", units="rad")
+    iterations = Int(iotype="out", desc="Newton iterations taken by the induction solve")
+    converged = Bool(iotype="out", desc="True if the induction solve converged")
 
-    def __init__(self):
+    def __init__(self, polar=None, complex_step=False):
         super(BladeElement, self).__init__()
 
-        # rough linear interpolation from naca 0012 airfoil data
-        rad = np.array([0., 13., 15, 20, 30])*pi/180
-        self.cl_interp = interp1d(rad, [0, 1.3, .8, .7, 1.1], fill_value=0.001, bounds_error=False)
+        # airfoil data is shared, by default the rough naca 0012 tables
+        self.polar = polar or default_polar()
+        self.complex_step = complex_step
 
-        rad = np.array([0., 10, 20, 30, 40])*pi/180
-        self.cd_interp = interp1d(rad, [0., 0., 0.3, 0.6, 1.], fill_value=0.001, bounds_error=False)
+        self.counters = SolverCounters()
+        self._solution = None
 
     def _coeff_lookup(self, i):
-        C_L = self.cl_interp(i)
-        C_D = self.cd_interp(i)
+        C_L, C_D = self.polar.coefficients(i)
         return C_D, C_L
 
     def execute(self):
-        self.sigma = self.B*self.chord / (2 * np.pi * self.r)
-        self.omega = self.rpm*2*pi/60.0
-        omega_r = self.omega*self.r
-        self.lambda_r = self.omega*self.r/self.V_inf  # need lambda_r for iterates
-        result = fsolve(self._iteration, [self.a_init, self.b_init])
-        self.a = result[0]
-        self.b = result[1]
-
-        self.V_0 = self.V_inf - self.a*self.V_inf
-        self.V_2 = omega_r-self.b*omega_r
-        self.V_1 = (self.V_0**2+self.V_2**2)**.5
-
-        q_c = self.B*.5*(self.rho*self.V_1**2)*self.chord*self.dr
-        cos_phi = cos(self.phi)
-        sin_phi = sin(self.phi)
-        C_D, C_L = self._coeff_lookup(self.alpha)
-        self.delta_Ct = q_c*(C_L*cos_phi-C_D*sin_phi)/(.5*self.rho*(self.V_inf**2)*(pi*self.r**2))
-        self.delta_Cp = self.b*(1-self.a)*self.lambda_r**3*(1-C_D/C_L*tan(self.phi))
-
-    def _iteration(self, X):
-        self.phi = np.arctan(self.lambda_r*(1+X[1])/(1-X[0]))
-        self.alpha = pi/2-self.twist-self.phi
-        C_D, C_L = self._coeff_lookup(self.alpha)
-        self.a = 1./(1 + 4.*(np.cos(self.phi)**2)/(self.sigma*C_L*np.sin(self.phi)))
-        self.b = (self.sigma*C_L) / (4 * self.lambda_r * np.cos(self.phi)) * (1 - self.a)
-
-        return (X[0]-self.a), (X[1]-self.b)
-
-
-class BEMPerf(Component):
-    """collects data from set of BladeElements and calculates aggregate values"""
+        # every input is read once and the intermediates live in locals, so
+        # the only trait validation left is publishing each output once
+        B, chord, r, dr, rho, V_inf = self.B, self.chord, self.r, self.dr, self.rho, self.V_inf
+
+        sigma = B*chord / (2 * np.pi * r)
+        omega = self.rpm*2*pi/60.0
+        omega_r = omega*r
+        lambda_r = omega_r/V_inf
+        previous = self._solution if self.warm_start else None
+        result = solve_induction_warm(lambda_r, sigma, self.twist, self.polar.lift,
+                                      self.a_init, self.b_init, previous, self.counters)
+        self._solution = result
+        a = float(result.a)
+        b = float(result.b)
+        phi = float(result.phi)
+        alpha = float(result.alpha)
+
+        V_0 = V_inf - a*V_inf
+        V_2 = omega_r-b*omega_r
+        V_1 = (V_0**2+V_2**2)**.5
+
+        q_c = B*.5*(rho*V_1**2)*chord*dr
+        cos_phi = cos(phi)
+        sin_phi = sin(phi)
+        C_D, C_L = self._coeff_lookup(alpha)
+
+        self.sigma = sigma
+        self.omega = omega
+        self.lambda_r = lambda_r
+        self.a = a
+        self.b = b
+        self.phi = phi
+        self.alpha = alpha
+        self.iterations = int(result.iterations)
+        self.converged = bool(result.converged)
+        self.V_0 = V_0
+        self.V_1 = V_1
+        self.V_2 = V_2
+        self.delta_Ct = q_c*(C_L*cos_phi-C_D*sin_phi)/(.5*rho*(V_inf**2)*(pi*r**2))
+        self.delta_Cp = b*(1-a)*lambda_r**3*(1-C_D/C_L*tan(phi))
+
+    def list_deriv_vars(self):
+        input_keys = ('rpm', 'r', 'dr', 'twist', 'chord', 'rho', 'V_inf')
+        output_keys = ('delta_Ct', 'delta_Cp', 'lambda_r')
+        return input_keys, output_keys
+
+    def _complex_outputs(self, inputs):
+        rpm, r, dr, twist, chord, rho, V_inf = [inputs[name] for name in self.list_deriv_vars()[0]]
+        omega_r = rpm*2*pi/60.0*r
+        lambda_r = omega_r/V_inf
+        result = solve_induction(lambda_r, self.B*chord/(2*pi*r), twist, self.polar.lift,
+                                 self.a_init, self.b_init)
+        delta_Ct, delta_Cp = _section_loads(result.a, result.b, result.phi, result.alpha,
+                                            lambda_r, omega_r, chord, dr, r, self.B,
+                                            rho, V_inf, self.polar)[:2]
+        return {'delta_Ct': delta_Ct, 'delta_Cp': delta_Cp, 'lambda_r': lambda_r}
+
+    def provideJ(self):
+        if self.complex_step:
+            return self.complex_step_jacobian()
+
+        derivs = _element_derivatives(self)
+        input_keys, output_keys = self.list_deriv_vars()
+
+        J = np.zeros((len(output_keys), len(input_keys)))
+        for i, out in enumerate(output_keys):
+            for j, name in enumerate(input_keys):
+                J[i, j] = derivs[out, name]
+
+        return J
+
+
+class BladeElementArray(Component):
+    """Calculations for all radial slices of a rotor blade at once"""
+
+    # inputs
+    a_init = Float(0.2, iotype="in", desc="initial guess for axial inflow factor")
+    b_init = Float(0.01, iotype="in", desc="initial guess for angular inflow factor")
+    warm_start = Bool(False, iotype="in", desc="start the induction solve from the last converged values")
+    rpm = Float(106.952, iotype="in", desc="rotations per minute", low=0, units="min**-1")
+    B = Int(3, iotype="in", desc="Number of blade elements")
+
+    rho = Float(1.225, iotype="in", desc="air density", units="kg/m**3")
+    V_inf = Float(7, iotype="in", desc="free stream air velocity", units="m/s")
+
+    # outputs
+    omega = Float(iotype="out", desc="angular velocity of the rotor", units="rad/s")
+
+    def __init__(self, n=10, polar=None):
+        super(BladeElementArray, self).__init__()
+
+        # airfoil data is shared, by default the rough naca 0012 tables
+        self.polar = polar or default_polar()
+
+        self.counters = SolverCounters()
+        self._solution = None
+
+        # array size based on number of elements
+        self.add('r', Array(iotype='in', desc='mean radius of %d blade elements' % n,
+                            default_value=np.linspace(1., 5., n), shape=(n,), dtype=Float, units="m"))
+        self.add('twist', Array(iotype='in', desc='local twist angle of %d blade elements' % n,
+                                default_value=np.ones((n,)), shape=(n,), dtype=Float, units="rad"))
+        self.add('chord', Array(iotype='in', desc='local chord length of %d blade elements' % n,
+                                default_value=np.ones((n,)), shape=(n,), dtype=Float, units="m"))
+        self.add('dr', Array(iotype='in', desc='width of %d blade elements' % n,
+                             default_value=np.ones((n,)), shape=(n,), dtype=Float, units="m"))
+
+        for name, desc, units in (('V_0', 'axial flow at propeller disk', 'm/s'),
+                                  ('V_1', 'local flow velocity', 'm/s'),
+                                  ('V_2', 'angular flow at propeller disk', 'm/s'),
+                                  ('sigma', 'local solidity', None),
+                                  ('alpha', 'local angle of attack', 'rad'),
+                                  ('delta_Ct', 'section thrust coefficient', 'N'),
+                                  ('delta_Cp', 'section power coefficient', None),
+                                  ('a', 'converged value for axial inflow factor', None),
+                                  ('b', 'converged value for radial inflow factor', None),
+                                  ('lambda_r', 'local tip speed ratio', None),
+                                  ('phi', 'relative flow angle onto blades', 'rad')):
+            self.add(name, Array(iotype='out', desc='%s of %d blade elements' % (desc, n),
+                                 default_value=np.zeros((n,)), shape=(n,), dtype=Float, units=units))
+
+        self.add('iterations', Array(iotype='out', desc='Newton iterations taken by each induction solve',
+                                     default_value=np.zeros((n,), dtype=int), shape=(n,), dtype=int))
+        self.add('converged', Array(iotype='out', desc='True where the induction solve converged',
+                                    default_value=np.zeros((n,), dtype=bool), shape=(n,), dtype=bool))
+
+    def execute(self):
+        sigma = self.B*self.chord / (2 * np.pi * self.r)
+        omega = self.rpm*2*pi/60.0
+        omega_r = omega*self.r
+        lambda_r = omega_r/self.V_inf
+
+        previous = self._solution if self.warm_start else None
+        result = solve_induction_warm(lambda_r, sigma, self.twist, self.polar.lift,
+                                      self.a_init, self.b_init, previous, self.counters)
+        self._solution = result
+        a, b, phi, alpha = result.a, result.b, result.phi, result.alpha
+        delta_Ct, delta_Cp, V_0, V_1, V_2 = _section_loads(a, b, phi, alpha, lambda_r, omega_r,
+                                                           self.chord, self.dr, self.r, self.B,
+                                                           self.rho, self.V_inf, self.polar)
+
+        self.delta_Ct = delta_Ct
+        self.delta_Cp = delta_Cp
+        self.omega = omega
+        self.sigma = sigma
+        self.lambda_r = lambda_r
+        self.a = a
+        self.b = b
+        self.phi = phi
+        self.alpha = alpha
+        self.V_0 = V_0
+        self.V_1 = V_1
+        self.V_2 = V_2
+        self.iterations = result.iterations
+        self.converged = result.converged
+
+    def list_deriv_vars(self):
+        input_keys = ('r', 'twist', 'chord', 'dr', 'rpm', 'rho', 'V_inf')
+        output_keys = ('delta_Ct', 'delta_Cp', 'lambda_r')
+        return input_keys, output_keys
+
+    def provideJ(self):
+        derivs = _element_derivatives(self)
+        n = len(self.r)
+
+        # every station only depends on its own r, twist, chord and dr, so
+        # those blocks are diagonal; the scalar inputs feed every station
+        J = np.zeros((3*n, 4*n + 3))
+        for i, out in enumerate(('delta_Ct', 'delta_Cp', 'lambda_r')):
+            rows = slice(i*n, (i+1)*n)
+            for j, name in enumerate(('r', 'twist', 'chord', 'dr')):
+                J[rows, j*n:(j+1)*n] = np.diag(derivs[out, name])
+            for j, name in enumerate(('rpm', 'rho', 'V_inf')):
+                J[rows, 4*n + j] = derivs[out, name]
+
+        return J
+
+
+class BEMPerf(ComplexStepDerivatives, Component):
+    """collects data from set of BladeElements and calculates aggregate values
+
+    With `complex_step`, provideJ takes complex step derivatives instead of
+    the analytic ones.
+    """
 
     r = Float(.8, iotype="in", desc="tip radius of the rotor", units="m")
     rpm = Float(2100, iotype="in", desc="rotations per minute", low=0, units="min**-1")
@@ -102,8 +526,9 @@ class BEMPerf(Component):
     data = VarTree(BEMPerfData(), iotype="out")
 
     # this lets the size of the arrays vary for different numbers of elements
-    def __init__(self, n=10):
+    def __init__(self, n=10, complex_step=False):
         super(BEMPerf, self).__init__()
+        self.complex_step = complex_step
 
         # needed initialization for VTs
         self.add('data', BEMPerfData())
@@ -118,43 +543,95 @@ class BEMPerf(Component):
                                default_value=np.ones((n,)), shape=(n,), dtype=Float))
 
     def execute(self):
-        self.data = BEMPerfData()  # empty the variable tree
-
+        # the variable tree is reused, every one of its values is rewritten
+        perf = _rotor_performance(self.delta_Ct, self.delta_Cp, self.lambda_r, self.r, self.rpm,
+                                  self.free_stream.rho, self.free_stream.V)
+        data = self.data
+        for name, value in perf.items():
+            setattr(data, name, value)
+
+    def list_deriv_vars(self):
+        input_keys = ('delta_Ct', 'delta_Cp', 'lambda_r', 'r', 'rpm', 'free_stream.V', 'free_stream.rho')
+        output_keys = ('data.Ct', 'data.net_thrust', 'data.Cp', 'data.net_power', 'data.J',
+                       'data.tip_speed_ratio')
+        return input_keys, output_keys
+
+    def _complex_outputs(self, inputs):
+        perf = _rotor_performance(inputs['delta_Ct'], inputs['delta_Cp'], inputs['lambda_r'],
+                                  inputs['r'], inputs['rpm'], inputs['free_stream.rho'],
+                                  inputs['free_stream.V'])
+        return dict(('data.' + name, value) for name, value in perf.items())
+
+    def provideJ(self):
+        if self.complex_step:
+            return self.complex_step_jacobian()
+
+        n = len(self.lambda_r)
         V_inf = self.free_stream.V
         rho = self.free_stream.rho
-
         norm = (.5*rho*(V_inf**2)*(pi*self.r**2))
-        self.data.Ct = np.trapz(self.delta_Ct, x=self.lambda_r)
-        self.data.net_thrust = self.data.Ct*norm
 
-        self.data.Cp = np.trapz(self.delta_Cp, x=self.lambda_r) * 8. / self.lambda_r.max()**2
-        self.data.net_power = self.data.Cp*norm*V_inf
-
-        self.data.J = V_inf/(self.rpm/60.0*2*self.r)
-
-        omega = self.rpm*2*pi/60
-        self.data.tip_speed_ratio = omega*self.r/self.free_stream.V
-
-
-class FlowConditions(VariableTree):
-    rho = Float(1.225, desc="air density", units="kg/m**3")
-    V = Float(7., desc="free stream air velocity", units="m/s")
-
-
-class BEMPerfData(VariableTree):
-    """Container that holds all rotor performance data"""
-
-    net_thrust = Float(desc="net axial thrust", units="N")
-    net_power = Float(desc="net power produced", units="W")
-    Ct = Float(desc="thrust coefficient")
-    Cp = Float(desc="power coefficient")
-    J = Float(desc="advance ratio")
-    tip_speed_ratio = Float(desc="tip speed ratio")
-    #eta = Float(desc="turbine efficiency")
+        # column offsets of the inputs
+        i_Ct, i_Cp, i_lam = 0, n, 2*n
+        i_r, i_rpm, i_V, i_rho = 3*n, 3*n + 1, 3*n + 2, 3*n + 3
+        J = np.zeros((6, 3*n + 4))
+
+        # Ct and net_thrust; Ct goes with 1/tip_speed_ratio**2
+        weights = _thrust_weights(self.lambda_r, self.data.tip_speed_ratio)
+        J[0, i_Ct:i_Ct+n] = weights
+        J[0, i_lam:i_lam+n] = 2*self.delta_Ct*weights/self.lambda_r
+        J[0, i_r] = -2*self.data.Ct/self.r
+        J[0, i_rpm] = -2*self.data.Ct/self.rpm
+        J[0, i_V] = 2*self.data.Ct/V_inf
+        J[1] = J[0]*norm
+        J[1, i_r] += self.data.Ct*2*norm/self.r
+        J[1, i_V] += self.data.Ct*2*norm/V_inf
+        J[1, i_rho] = self.data.Ct*norm/rho
+
+        # Cp and net_power, scaled by the largest local tip speed ratio
+        d_y, d_x = _trapz_derivatives(self.delta_Cp, self.lambda_r)
+        lam_max = self.lambda_r.max()
+        J[2, i_Cp:i_Cp+n] = d_y*8./lam_max**2
+        J[2, i_lam:i_lam+n] = d_x*8./lam_max**2
+        J[2, i_lam + self.lambda_r.argmax()] -= 2*self.data.Cp/lam_max
+        J[3] = J[2]*norm*V_inf
+        J[3, i_r] = self.data.Cp*2*norm*V_inf/self.r
+        J[3, i_V] = self.data.Cp*3*norm
+        J[3, i_rho] = self.data.Cp*norm*V_inf/rho
+
+        # J = 30*V_inf/(rpm*r)  and  tip_speed_ratio = rpm*2*pi/60*r/V_inf
+        J[4, i_V] = self.data.J/V_inf
+        J[4, i_rpm] = -self.data.J/self.rpm
+        J[4, i_r] = -self.data.J/self.r
+        J[5, i_V] = -self.data.tip_speed_ratio/V_inf
+        J[5, i_rpm] = 2*pi/60*self.r/V_inf
+        J[5, i_r] = self.rpm*2*pi/60/V_inf
+
+        return J
 
 
 class AutoBEM(Assembly):
-    """Blade Rotor with user specified number BladeElements"""
+    """Blade Rotor with user specified number BladeElements
+
+    With ``engine="element"`` every blade station is its own BladeElement,
+    BE0 to BE<n-1>, with a dozen connections each, so building the rotor
+    takes time proportional to `n_elements`. ``engine="vector"`` solves all
+    stations in one BladeElementArray wired with whole-array connections,
+    and builds in about the same time for any number of elements; use it
+    for large element counts and for rotors built over and over, as in DOE
+    workers.
+
+    `spacing` places the stations between hub and tip: "linear" (evenly),
+    "cosine" (clustered at both ends), or an increasing array of fractions
+    from 0 to 1, whose length then sets the number of elements. Each element
+    is as wide as the stretch of blade it stands for. See
+    radial_refinement.refine_stations for choosing the fractions adaptively.
+
+    With an EvaluationCache as `cache`, every run of the driver's workflow,
+    optimizer iterates, line search and finite difference steps alike, is
+    looked up by the design inputs first; on a hit every component takes
+    its outputs from the cache instead of executing.
+    """
 
     # physical properties inputs
     r_hub = Float(0.2, iotype="in", desc="blade hub radius", units="m", low=0)
@@ -166,15 +643,169 @@ class AutoBEM(Assembly):
     pitch = Float(0, iotype="in", desc="overall blade pitch", units="deg")
     rpm = Float(107, iotype="in", desc="rotations per minute", low=0, units="min**-1")
     B = Int(3, iotype="in", desc="number of blades", low=1)
+    warm_start = Bool(False, iotype="in", desc="seed each induction solve from the last converged one")
 
     # wind condition inputs
     free_stream = VarTree(FlowConditions(), iotype="in")
 
 
-    def __init__(self, n_elements=6):
+    # inputs that fully determine the rotor performance, in cache key order
+    _design_inputs = ('chord_hub', 'chord_tip', 'twist_hub', 'twist_tip', 'rpm', 'r_hub', 'r_tip',
+                      'pitch', 'B', 'free_stream.V', 'free_stream.rho')
+
+    def __init__(self, n_elements=6, engine="element", polar=None, cache=None, spacing="linear"):
+        if engine not in ("element", "vector"):
+            raise ValueError("engine must be 'element' or 'vector', not '%s'" % engine)
+        if isinstance(spacing, basestring):
+            self._fractions = station_fractions(n_elements, spacing)
+        else:
+            self._fractions = np.array(spacing, dtype=float)
+            n_elements = len(self._fractions)
+        self._spacing = spacing
         self._n_elements = n_elements
+        self._engine = engine
+        self._polar = polar or default_polar()
+        self.cache = cache
         super(AutoBEM, self).__init__()
 
+    def _cache_prefix(self):
+        # rotors with different discretizations or airfoils can share a cache
+        prefix = '%d:%s:' % (self._n_elements, self._polar.name)
+        if not isinstance(self._spacing, basestring) or self._spacing != "linear":
+            prefix += ','.join('%.12g' % f for f in self._fractions) + ':'
+        return prefix
+
+    def _cache_workflow(self):
+        """Wrap the driver's workflow run in the cache lookup. On a hit the
+        workflow still runs, so values are passed along and the case is
+        recorded as usual, only the components don't execute."""
+        workflow = self.driver.workflow
+
+        def restore(comp, values):
+            return lambda execute: partial(restore_values, comp, values)
+
+        def cached(run):
+            def cached_run(*args, **kwargs):
+                if self.cache is None:
+                    return run(*args, **kwargs)
+
+                key = self.cache.key([self.get(name) for name in self._design_inputs],
+                                     self._cache_prefix())
+                outputs = self.cache.get(key)
+                comps = [self.get(name) for name in workflow.get_names()]
+                if outputs is None:
+                    run(*args, **kwargs)
+                    values = [variable_values(comp, model_variables(comp, comp.list_outputs()))
+                              for comp in comps]
+                    self.cache.put(key, values)
+                    return
+
+                patches = [patch(comp, 'execute', restore(comp, values))
+                           for comp, values in zip(comps, outputs)]
+                try:
+                    run(*args, **kwargs)
+                finally:
+                    for patched in patches:
+                        unpatch(patched)
+            return cached_run
+
+        patch(workflow, 'run', cached)
+
+    def induction_stats(self):
+        """iteration counts and convergence flags of the last induction
+        solve at every blade station, ordered hub to tip"""
+        if self._engine == "vector":
+            return self.elements.iterations.copy(), self.elements.converged.copy()
+
+        elements = self._elements()
+        return (np.array([be.iterations for be in elements]),
+                np.array([be.converged for be in elements]))
+
+    def _elements(self):
+        if self._engine == "vector":
+            return [self.elements]
+        return [getattr(self, 'BE%d' % i) for i in range(self._n_elements)]
+
+    def power_curve(self, V, rho=None, rpm=None, pitch=None, chord_hub=None, chord_tip=None,
+                    twist_hub=None, twist_tip=None, previous=None):
+        """Performance of the design at every wind speed in `V`, and air
+        density in `rho` (default free_stream.rho). `rpm`, `pitch` and the
+        chord and twist at hub and tip can give a value per wind speed too,
+        by default those of the design, so one call can evaluate operating
+        points and perturbed blades alike.
+
+        The stations are laid out from those values the way the
+        distribution components do, and the induction equations of every
+        (wind speed, station) pair are solved together in one batch without
+        running the workflow, so an extra wind speed costs far less than
+        another run. With the `induction` of an earlier call at nearby
+        points as `previous`, its converged stations seed the solves, as in
+        induction.solve_induction_warm.
+
+        Returns a dict of arrays with one value per wind speed for every
+        BEMPerfData value, `converged`, True where every station's induction
+        solve converged, and `induction`, the InductionSolution of every
+        (wind speed, station) pair.
+        """
+        stations = self._solve_stations(self._fractions, V, rho, rpm, pitch, chord_hub,
+                                        chord_tip, twist_hub, twist_tip, previous)
+        result = stations['induction']
+        perf = _rotor_performance(stations['delta_Ct'], stations['delta_Cp'],
+                                  stations['lambda_r'], self.r_tip, stations['rpm'],
+                                  stations['rho'], stations['V'])
+        perf.update(converged=result.converged.all(axis=-1), induction=result)
+        return perf
+
+    def _solve_stations(self, f, V, rho=None, rpm=None, pitch=None, chord_hub=None,
+                        chord_tip=None, twist_hub=None, twist_tip=None, previous=None):
+        """lambda_r, delta_Ct, delta_Cp and the induction solution of the
+        stations at fractions `f` of the span, as (wind speed, station)
+        arrays, with the per wind speed V, rho and rpm they were solved at;
+        the arguments are those of :meth:`power_curve`. The stations are
+        independent, so any subset of them can be solved on its own, except
+        that delta_Ct takes its width dr from the neighbours in `f`."""
+        V = np.atleast_1d(np.asarray(V, dtype=float))
+        ones = np.ones(V.shape)
+
+        def per_point(value, name):
+            return ones*(self.get(name) if value is None else value)
+
+        rho = per_point(rho, 'free_stream.rho')
+        rpm = per_point(rpm, 'rpm')
+        pitch = per_point(pitch, 'pitch')
+        f = np.asarray(f, dtype=float)
+
+        def stations(hub, tip):
+            return hub[:, None] + f*(tip - hub)[:, None]
+
+        # (wind speed, station) arrays
+        r = stations(ones*self.r_hub, ones*self.r_tip)
+        dr = (np.gradient(f) if len(f) > 1 else np.ones(f.shape))*(self.r_tip - self.r_hub)
+        chord = stations(per_point(chord_hub, 'chord_hub'), per_point(chord_tip, 'chord_tip'))
+        twist = np.radians(stations(per_point(twist_hub, 'twist_hub'),
+                                    per_point(twist_tip, 'twist_tip')) + pitch[:, None])
+        first = self._elements()[0]
+
+        V_inf = V[:, None]
+        omega_r = rpm[:, None]*2*pi/60.*r
+        lambda_r = omega_r/V_inf
+        sigma = self.B*chord/(2*pi*r)
+        result = solve_induction_warm(lambda_r, sigma, twist, self._polar.lift,
+                                      first.a_init, first.b_init, previous)
+        delta_Ct, delta_Cp = _section_loads(result.a, result.b, result.phi, result.alpha,
+                                            lambda_r, omega_r, chord, dr, r, self.B,
+                                            rho[:, None], V_inf, self._polar)[:2]
+
+        return {'lambda_r': lambda_r, 'delta_Ct': delta_Ct, 'delta_Cp': delta_Cp,
+                'induction': result, 'V': V, 'rho': rho, 'rpm': rpm}
+
+    def solver_counters(self):
+        """SolverCounters totalled over every blade element"""
+        total = SolverCounters()
+        for elem in self._elements():
+            total += elem.counters
+        return total
+
     def configure(self):
 
         self.add('free_stream', VarTree(FlowConditions(), iotype="in"))  # initialize
@@ -184,15 +815,21 @@ class AutoBEM(Assembly):
 
         self.add('driver', SLSQPdriver())
 
-        self.add('radius_dist', LinearDistribution(n=n_elements, units="m"))
+        # chord and twist vary linearly with radius, whatever the spacing
+        if isinstance(self._spacing, basestring) and self._spacing == "linear":
+            distribution = lambda units: LinearDistribution(n=n_elements, units=units)
+        else:
+            distribution = lambda units: StationDistribution(self._fractions, units=units)
+
+        self.add('radius_dist', distribution("m"))
         self.connect('r_hub', 'radius_dist.start')
         self.connect('r_tip', 'radius_dist.end')
 
-        self.add('chord_dist', LinearDistribution(n=n_elements, units="m"))
+        self.add('chord_dist', distribution("m"))
         self.connect('chord_hub', 'chord_dist.start')
         self.connect('chord_tip', 'chord_dist.end')
 
-        self.add('twist_dist', LinearDistribution(n=n_elements, units="deg"))
+        self.add('twist_dist', distribution("deg"))
         self.connect('twist_hub', 'twist_dist.start')
         self.connect('twist_tip', 'twist_dist.end')
         self.connect('pitch', 'twist_dist.offset')
@@ -207,26 +844,49 @@ class AutoBEM(Assembly):
         self.connect('rpm', 'perf.rpm')
         self.connect('free_stream', 'perf.free_stream')
 
-        for i in range(n_elements):
-
-            name = 'BE%d' % i
-            self.add(name, BladeElement())
-            self.driver.workflow.add(name)
+        if self._engine == "vector":
+            # a single component solves every station, so the wiring is
+            # whole arrays rather than one connection per element
+            self.add('elements', BladeElementArray(n=n_elements, polar=self._polar))
+            self.driver.workflow.add('elements')
+
+            self.connect('radius_dist.output', 'elements.r')
+            self.connect('radius_dist.dr', 'elements.dr')
+            self.connect('twist_dist.output', 'elements.twist')
+            self.connect('chord_dist.output', 'elements.chord')
+
+            self.connect('B', 'elements.B')
+            self.connect('rpm', 'elements.rpm')
+            self.connect('warm_start', 'elements.warm_start')
+
+            self.connect('free_stream.rho', 'elements.rho')
+            self.connect('free_stream.V', 'elements.V_inf')
+            self.connect('elements.delta_Ct', 'perf.delta_Ct')
+
+            self.connect('elements.delta_Cp', 'perf.delta_Cp')
+            self.connect('elements.lambda_r', 'perf.lambda_r')
+        else:
+            for i in range(n_elements):
+
+                name = 'BE%d' % i
+                self.add(name, BladeElement(polar=self._polar))
+                self.driver.workflow.add(name)
             
-            self.connect('radius_dist.output[%d]' % i, name+'.r')
-            self.connect('radius_dist.delta', name+'.dr')
-            self.connect('twist_dist.output[%d]' % i, name+'.twist')
-            self.connect('chord_dist.output[%d]' % i, name+".chord")
+                self.connect('radius_dist.output[%d]' % i, name+'.r')
+                self.connect('radius_dist.dr[%d]' % i, name+'.dr')
+                self.connect('twist_dist.output[%d]' % i, name+'.twist')
+                self.connect('chord_dist.output[%d]' % i, name+".chord")
 
-            self.connect('B', name+'.B')
-            self.connect('rpm', name+'.rpm')
+                self.connect('B', name+'.B')
+                self.connect('rpm', name+'.rpm')
+                self.connect('warm_start', name+'.warm_start')
 
-            self.connect('free_stream.rho', name+'.rho')
-            self.connect('free_stream.V', name+'.V_inf')
-            self.connect(name+'.delta_Ct', 'perf.delta_Ct[%d]' % i)
+                self.connect('free_stream.rho', name+'.rho')
+                self.connect('free_stream.V', name+'.V_inf')
+                self.connect(name+'.delta_Ct', 'perf.delta_Ct[%d]' % i)
 
-            self.connect(name+'.delta_Cp', 'perf.delta_Cp[%d]' % i)
-            self.connect(name+'.lambda_r', 'perf.lambda_r[%d]' % i)
+                self.connect(name+'.delta_Cp', 'perf.delta_Cp[%d]' % i)
+                self.connect(name+'.lambda_r', 'perf.lambda_r[%d]' % i)
 
         self.driver.workflow.add('perf')
 
@@ -240,6 +900,8 @@ class AutoBEM(Assembly):
 
         self.driver.add_objective('-data.Cp')
 
+        self._cache_workflow()
+
 
 if __name__ == "__main__":
 
@@ -259,5 +921,4 @@ if __name__ == "__main__":
     print 'top.b.chord_tip: ', top.chord_tip
     print 'lambda: ', top.perf.data.tip_speed_ratio
 
-    cds = CaseDataset("bem.json", 'json')
-    caseset_query_to_html(cds.data)
+    write_case_report("bem.json", "bem_report")
@@ -0,0 +1,352 @@
+"""Benchmark suite for the models in this package.
+
+Every benchmark is a setup function returning the callable to be timed, so
+building models stays out of the measurement unless it is what's being
+measured. A ``teardown`` attribute of the callable, if it has one, is called
+after the timing, for cleanup that isn't part of the measurement either.
+Each is timed `repeat` times with a fresh setup, and its minimum, median and
+mean are kept. Results are saved as JSON, and a later run can be compared
+against a saved baseline; a benchmark whose minimum time grew by more than
+the allowed fraction counts as a regression.
+
+Run from the command line::
+
+    python -m nreltraining.benchmarks -o results.json
+    python -m nreltraining.benchmarks -b results.json --max-slowdown .2
+
+which exits with status 1 when there are regressions.
+"""
+
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# name -> (setup, repeat)
+_benchmarks = OrderedDict()
+
+
+def benchmark(name, repeat=5):
+    """register a setup function as benchmark `name`"""
+    def register(setup):
+        _benchmarks[name] = (setup, repeat)
+        return setup
+    return register
+
+
+def benchmark_names():
+    return list(_benchmarks)
+
+
+@benchmark('blade_element')
+def _blade_element():
+    from bem import BladeElement
+    be = BladeElement()
+    return be.run
+
+
+def _calls(func, n):
+    def run():
+        for _ in range(n):
+            func()
+    return run
+
+
+# many calls of a single component, where the per call overhead of reading
+# inputs and publishing outputs is what's measured
+@benchmark('blade_element_x1000')
+def _blade_element_calls():
+    from bem import BladeElement
+    return _calls(BladeElement().run, 1000)
+
+
+@benchmark('bem_perf_x1000')
+def _bem_perf_calls():
+    from bem import BEMPerf
+    return _calls(BEMPerf(50).run, 1000)
+
+
+def _autobem_run(n, engine):
+    def setup():
+        from bem import AutoBEM
+        rotor = AutoBEM(n, engine=engine)
+        return rotor.driver.workflow.run
+    return setup
+
+for _n in (6, 20, 50, 200):
+    benchmark('autobem_n%d' % _n)(_autobem_run(_n, 'element'))
+benchmark('autobem_vector_n200')(_autobem_run(200, 'vector'))
+
+
+@benchmark('power_curve_v45')
+def _power_curve():
+    from bem import AutoBEM
+    rotor = AutoBEM(20, engine="vector")
+    return lambda: rotor.power_curve(np.linspace(3., 25., 45))
+
+
+@benchmark('monte_carlo_4096')
+def _monte_carlo():
+    from bem import AutoBEM
+    from uq import Normal, monte_carlo
+    rotor = AutoBEM(20, engine="vector")
+    uncertain = {'free_stream.V': Normal(10., .5), 'free_stream.rho': Normal(1.225, .02),
+                 'chord_tip': Normal(.187, .005), 'twist_tip': Normal(-3.58, .5)}
+    return lambda: monte_carlo(rotor, uncertain, max_samples=4096, seed=0)
+
+
+def _jacobian(method):
+    def setup():
+        from bem import BladeElement
+        from complex_step import finite_difference_jacobian
+        element = BladeElement(complex_step=True)
+        element.run()
+        if method == "complex_step":
+            return element.provideJ
+        return lambda: finite_difference_jacobian(element, method)
+    return setup
+
+for _method in ('forward', 'central', 'complex_step'):
+    benchmark('blade_element_jacobian_%s' % _method)(_jacobian(_method))
+
+
+def _autobem_construct(n, engine):
+    def setup():
+        from bem import AutoBEM
+        return lambda: AutoBEM(n, engine=engine)
+    return setup
+
+for _n in (6, 50, 200, 500):
+    for _engine in ('element', 'vector'):
+        benchmark('construct_%s_n%d' % (_engine, _n))(_autobem_construct(_n, _engine))
+
+
+def construction_scaling(sizes=(6, 20, 50, 100, 200, 500), engines=('element', 'vector'),
+                         repeat=3):
+    """Best of `repeat` AutoBEM construction times for every engine and
+    number of elements, as ``{engine: [(n, seconds, seconds per element)]}``"""
+    from bem import AutoBEM
+
+    scaling = OrderedDict()
+    for engine in engines:
+        scaling[engine] = []
+        for n in sizes:
+            times = []
+            for _ in range(repeat):
+                t0 = time.time()
+                AutoBEM(n, engine=engine)
+                times.append(time.time() - t0)
+            scaling[engine].append((n, min(times), min(times)/n))
+    return scaling
+
+
+def _windfarm(n, search):
+    def setup():
+        from windfarm import WindFarm
+        return WindFarm(n, search).run
+    return setup
+
+for _n in (100, 1000, 10000):
+    benchmark('windfarm_n%d' % _n)(_windfarm(_n, 'index'))
+for _n in (100, 1000):
+    benchmark('windfarm_all_n%d' % _n)(_windfarm(_n, 'all'))
+
+
+@benchmark('betz_limit_slsqp')
+def _betz_limit():
+    from betz_limit import Betz_Limit
+    return Betz_Limit().run
+
+
+@benchmark('autobem_doe', repeat=1)
+def _autobem_doe():
+    from openmdao.main.api import Assembly, set_as_top
+    from openmdao.lib.drivers.api import DOEdriver
+    from openmdao.lib.doegenerators.api import FullFactorial
+    from bem import AutoBEM
+
+    # the DOE of the AutoBEM tests, at two levels per parameter
+    top = set_as_top(Assembly())
+    top.add('b', AutoBEM())
+    top.add('driver', DOEdriver())
+    top.driver.workflow.add('b')
+    top.driver.DOEgenerator = FullFactorial(2)
+    top.driver.add_parameter('b.chord_hub', low=.1, high=2)
+    top.driver.add_parameter('b.chord_tip', low=.1, high=2)
+    top.driver.add_parameter('b.rpm', low=20, high=300)
+    top.driver.add_parameter('b.twist_hub', low=-5, high=50)
+    top.driver.add_parameter('b.twist_tip', low=-5, high=50)
+    return top.run
+
+
+@benchmark('derivatives_simple_opt')
+def _derivatives_simple():
+    from derivatives_simple import opt
+    return opt().run
+
+
+class _Recording(object):
+    """a Betz_Limit run recorded to a temporary directory"""
+
+    def __init__(self, recorder_classes):
+        from betz_limit import Betz_Limit
+        self.dir = tempfile.mkdtemp()
+        self.top = Betz_Limit()
+        self.paths = [os.path.join(self.dir, 'cases%d' % i) for i in range(len(recorder_classes))]
+        self.top.recorders = [cls(path) for cls, path in zip(recorder_classes, self.paths)]
+
+    def __call__(self):
+        self.top.run()
+        for recorder in self.top.recorders:
+            recorder.close()
+
+    def teardown(self):
+        shutil.rmtree(self.dir)
+
+
+@benchmark('record_json_csv')
+def _record():
+    from openmdao.lib.casehandlers.api import JSONCaseRecorder, CSVCaseRecorder
+    return _Recording([JSONCaseRecorder, CSVCaseRecorder])
+
+
+def _recorded_json():
+    from openmdao.lib.casehandlers.api import JSONCaseRecorder
+    recording = _Recording([JSONCaseRecorder])
+    recording.top.run()
+    recording.top.recorders[0].close()
+    return recording
+
+
+@benchmark('query_json')
+def _query_json():
+    from openmdao.lib.casehandlers.api import CaseDataset
+    recording = _recorded_json()
+
+    def query():
+        CaseDataset(recording.paths[0], 'json').data.vars(['aDisc.a', 'aDisc.Cp']).fetch()
+    query.teardown = recording.teardown
+    return query
+
+
+@benchmark('query_json_indexed')
+def _query_indexed():
+    from case_index import CaseIndex
+    recording = _recorded_json()
+    CaseIndex(recording.paths[0])  # build the sidecar outside the timing
+
+    def query():
+        CaseIndex(recording.paths[0]).query(['aDisc.a', 'aDisc.Cp'])
+    query.teardown = recording.teardown
+    return query
+
+
+def run_benchmarks(names=None, repeat=None, stream=None):
+    """Time the benchmarks `names` (default all); `repeat` overrides the
+    number of repetitions of every benchmark. Returns the results dict."""
+    results = OrderedDict()
+    results['_meta'] = {'python': platform.python_version(),
+                        'numpy': np.__version__,
+                        'machine': platform.machine(),
+                        'node': platform.node(),
+                        'date': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+    for name in names or _benchmarks:
+        setup, default_repeat = _benchmarks[name]
+        times = []
+        for _ in range(repeat or default_repeat):
+            func = setup()
+            try:
+                t0 = time.time()
+                func()
+                times.append(time.time() - t0)
+            finally:
+                if hasattr(func, 'teardown'):
+                    func.teardown()
+        results[name] = {'min': min(times),
+                         'median': float(np.median(times)),
+                         'mean': float(np.mean(times)),
+                         'repeat': len(times)}
+        if stream is not None:
+            stream.write('%-28s %10.4f s\n' % (name, min(times)))
+    return results
+
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, max_slowdown=.25, thresholds=None):
+    """Benchmarks that got slower than their baseline by more than
+    `max_slowdown` (a fraction), as ``(name, ratio)`` pairs. `thresholds`
+    can give other limits for individual benchmarks."""
+    thresholds = thresholds or {}
+    regressions = []
+    for name, result in results.items():
+        if name.startswith('_') or name not in baseline:
+            continue
+        ratio = result['min']/baseline[name]['min']
+        if ratio > 1 + thresholds.get(name, max_slowdown):
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="run the nreltraining benchmarks")
+    parser.add_argument('names', nargs='*', help="benchmarks to run (default: all)")
+    parser.add_argument('-o', '--output', help="save the results to this JSON file")
+    parser.add_argument('-b', '--baseline', help="compare against these saved results")
+    parser.add_argument('--max-slowdown', type=float, default=.25,
+                        help="allowed slowdown against the baseline, as a fraction")
+    parser.add_argument('-r', '--repeat', type=int, help="repetitions of every benchmark")
+    parser.add_argument('-l', '--list', action='store_true', help="list the benchmarks")
+    parser.add_argument('--construction', action='store_true',
+                        help="show how AutoBEM construction time scales with n_elements")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print '\n'.join(benchmark_names())
+        return 0
+
+    if args.construction:
+        print "%-8s %6s %12s %16s" % ('engine', 'n', 'time (s)', 'per element (us)')
+        for engine, rows in construction_scaling().items():
+            for n, seconds, per_element in rows:
+                print "%-8s %6d %12.4f %16.1f" % (engine, n, seconds, per_element*1e6)
+        return 0
+
+    for name in args.names:
+        if name not in _benchmarks:
+            parser.error("unknown benchmark '%s'" % name)
+
+    results = run_benchmarks(args.names, args.repeat, sys.stdout)
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        regressions = compare(results, baseline, args.max_slowdown)
+        for name, ratio in regressions:
+            print "REGRESSION %s: %.2fx the baseline time" % (name, ratio)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
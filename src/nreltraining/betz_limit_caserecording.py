@@ -1,13 +1,15 @@
 from betz_limit import Betz_Limit
 from openmdao.lib.casehandlers.api import JSONCaseRecorder, CSVCaseRecorder
+from columnar_recorder import ColumnarCaseRecorder
 
 
 assembly = Betz_Limit()
 
 JSON_recorder = JSONCaseRecorder('betz_limit.json')
 CSV_recorder = CSVCaseRecorder('betz_limit.csv')
+columnar_recorder = ColumnarCaseRecorder('betz_limit.cases')
 
-assembly.recorders = [JSON_recorder, CSV_recorder]
+assembly.recorders = [JSON_recorder, CSV_recorder, columnar_recorder]
 
 assembly.run()
 
@@ -0,0 +1,24 @@
+"""The Betz_Limit tutorial with its actuator disc opted in to complex step
+derivatives: the assembly is unchanged, its ActuatorDisc is replaced by a
+ComplexStepActuatorDisc, so SLSQP gets its gradients from the disc's
+provideJ instead of central differences."""
+
+import time
+
+from betz_limit import Betz_Limit
+from complex_step import ComplexStepActuatorDisc
+
+
+if __name__ == "__main__":
+
+    for name, complex_step in (("central differences", False), ("complex step", True)):
+        assembly = Betz_Limit()
+        assembly.driver.gradient_options.fd_form = 'central'
+        if complex_step:
+            assembly.replace('aDisc', ComplexStepActuatorDisc())
+        t = time.time()
+        assembly.run()
+        print name
+        print "  time:", time.time() - t
+        print "  execution count:", assembly.aDisc.exec_count
+        print "  Cp:", assembly.aDisc.Cp
@@ -0,0 +1,130 @@
+"""Memoization of expensive model evaluations.
+
+An :class:`EvaluationCache` maps a rounded design vector to whatever the
+model produced for it. Recently used entries are kept in memory up to
+`maxsize`; with a `path` every entry is also written to an on-disk shelf, so
+a restarted optimization or sweep picks up where the last one left off.
+Processes can share entries instead through a `store` mapping such as a
+``multiprocessing.Manager().dict()``.
+
+:func:`variable_values` and :func:`restore_values` copy the variables of a
+component out and back in, variable trees included, for caching what a
+component computed; :func:`model_variables` leaves out the ones, such as
+``exec_count``, that belong to the framework rather than to the model.
+"""
+
+import copy
+import shelve
+from collections import OrderedDict
+
+from openmdao.main.api import VariableTree
+
+
+class EvaluationCache(object):
+    """LRU cache keyed on design vectors rounded to multiples of
+    `tolerance`, so designs closer than that share an entry, backed by an
+    optional persistent store at `path` or by any other `store` mapping"""
+
+    def __init__(self, maxsize=1024, tolerance=1e-10, path=None, store=None):
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.path = path
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        if store is not None:
+            self._store = store
+        else:
+            self._store = shelve.open(path, protocol=2) if path else None
+
+    def key(self, values, prefix=''):
+        """cache key for a sequence of numbers"""
+        return prefix + ','.join('%d' % round(v/self.tolerance) for v in values)
+
+    def get(self, key):
+        """the cached value for `key`, or None"""
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            if self._store is not None and key in self._store:
+                value = self._store[key]
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                return None
+        else:
+            self.hits += 1
+
+        self._entries[key] = value  # most recently used goes last
+        self._evict()
+        return value
+
+    def put(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        self._evict()
+        if self._store is not None:
+            self._store[key] = value
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """hit/miss counts and the fraction of lookups that were hits"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'hit_rate': (self.hits + self.disk_hits)/float(lookups) if lookups else 0.}
+
+    def sync(self):
+        """write the persistent store to disk"""
+        if hasattr(self._store, 'sync'):
+            self._store.sync()
+
+    def close(self):
+        if hasattr(self._store, 'close'):
+            self._store.close()
+        self._store = None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _TreeValues(dict):
+    """values of the variables of a variable tree"""
+
+
+def model_variables(comp, names):
+    """`names` without the framework variables every component has, such
+    as exec_count, which no model computes and no cache should rewind"""
+    return [name for name in names if not comp.trait(name).framework_var]
+
+
+def variable_values(obj, names):
+    """copies of the values of the variables `names` of `obj`, with
+    variable trees as the values of their own variables"""
+    values = {}
+    for name in names:
+        value = getattr(obj, name)
+        if isinstance(value, VariableTree):
+            value = _TreeValues(variable_values(value, value.list_vars()))
+        else:
+            value = copy.deepcopy(value)
+        values[name] = value
+    return values
+
+
+def restore_values(obj, values):
+    """set the variables of `obj` back to what variable_values returned;
+    variable trees are updated in place"""
+    for name, value in values.items():
+        if isinstance(value, _TreeValues):
+            restore_values(getattr(obj, name), value)
+        else:
+            setattr(obj, name, copy.deepcopy(value))
@@ -0,0 +1,182 @@
+"""Indexed queries on recorded case files.
+
+Loading a JSON case file through ``CaseDataset`` parses every case and every
+variable on each query. A :class:`CaseIndex` parses the file once and keeps
+a sidecar next to it, ``<file>.index``, holding every numeric value in the
+columnar format of :mod:`nreltraining.columnar_recorder` along with where
+each case sits in the JSON text and which driver iteration recorded it.
+Later queries memory-map the sidecar and read only the columns and cases
+they ask for. Files written by
+:class:`~nreltraining.columnar_recorder.ColumnarCaseRecorder` need no
+sidecar, they are queried directly.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+
+from columnar_recorder import (MAGIC, META_COLUMNS, ColumnarCaseReader, _flatten,
+                               write_columns)
+
+
+INDEX_COLUMNS = META_COLUMNS + ('_offset', '_length')
+
+_key = re.compile(r'\s*,?\s*"((?:[^"\\]|\\.)*)"\s*:\s*')
+
+
+def _scan_json(text):
+    """(key, value, start, end) for every top level entry of a JSON object"""
+    decoder = json.JSONDecoder()
+    pos = text.index('{') + 1
+    while True:
+        match = _key.match(text, pos)
+        if match is None:
+            break
+        start = match.end()
+        value, end = decoder.raw_decode(text, start)
+        yield match.group(1), value, start, end
+        pos = end
+
+
+def build_index(path, index_path=None, chunk_size=1024):
+    """Parse the JSON case file at `path` and write its sidecar index"""
+    if index_path is None:
+        index_path = path + '.index'
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        text = f.read().decode('latin-1')  # one character per byte keeps offsets
+
+    drivers = {}
+    driver_ids = []
+    constants = {}
+    columns = dict((name, i) for i, name in enumerate(INDEX_COLUMNS))
+    rows = []
+    iterations = {}
+
+    for key, value, start, end in _scan_json(text):
+        if key.startswith('driver_info'):
+            drivers[value.get('_id')] = value.get('name', value.get('_id'))
+            if value.get('_id') not in driver_ids:
+                driver_ids.append(value.get('_id'))
+        elif key.startswith('simulation_info'):
+            for name, x in value.get('constants', {}).items():
+                try:
+                    constants[name] = float(x)
+                except (TypeError, ValueError):
+                    pass
+        elif key.startswith('iteration_case'):
+            driver = value.get('_driver_id')
+            if driver not in driver_ids:
+                driver_ids.append(driver)
+            iterations[driver] = iterations.get(driver, 0) + 1
+            row = {0: driver, 1: iterations[driver],
+                   2: 0. if value.get('error_status') in (None, '') else 1.,
+                   3: start, 4: end - start}
+            for name, x in value.get('data', {}).items():
+                for column, v in zip(*_flatten(name, x)):
+                    row[columns.setdefault(column, len(columns))] = v
+            rows.append(row)
+
+    # drivers are numbered in the order they appear in the file
+    driver_number = dict((d, i) for i, d in enumerate(driver_ids))
+
+    values = np.empty((len(rows), len(columns)))
+    values.fill(np.nan)
+    for i, row in enumerate(rows):
+        row[0] = driver_number[row[0]]
+        values[i, list(row.keys())] = list(row.values())
+
+    names = sorted(columns, key=columns.get)
+    constants['__source_size__'] = stat.st_size
+    constants['__source_mtime__'] = stat.st_mtime
+    write_columns(index_path, names, values, chunk_size,
+                  [str(drivers.get(d, d)) for d in driver_ids], constants)
+    return index_path
+
+
+def _is_columnar(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class CaseIndex(object):
+    """Query interface for a JSON or columnar case file.
+
+    The sidecar index of a JSON file is built the first time it is opened
+    and rebuilt whenever the case file changes size or modification time.
+    """
+
+    def __init__(self, path, rebuild=False):
+        self.path = path
+        if _is_columnar(path):
+            self.index_path = path
+            self._json = False
+        else:
+            self.index_path = path + '.index'
+            self._json = True
+            if rebuild or not self._index_current():
+                build_index(path, self.index_path)
+        self._reader = ColumnarCaseReader(self.index_path)
+
+    def _index_current(self):
+        try:
+            constants = ColumnarCaseReader(self.index_path).constants
+        except (IOError, OSError, ValueError):
+            return False
+        stat = os.stat(self.path)
+        return (constants.get('__source_size__') == stat.st_size and
+                constants.get('__source_mtime__') == stat.st_mtime)
+
+    def __len__(self):
+        return len(self._reader)
+
+    @property
+    def drivers(self):
+        """names of the drivers that recorded cases"""
+        return self._reader.drivers
+
+    def var_names(self):
+        """names of the recorded variables; array elements are listed as
+        ``name[i]``"""
+        return [name for name in self._reader.columns if name not in INDEX_COLUMNS]
+
+    def _values(self, name, start, stop):
+        columns = self._reader._index
+        if name in columns:
+            return self._reader.column(name, start, stop)
+        if name + '[0]' in columns:  # whole array variable, one row per case
+            size = 0
+            while '%s[%d]' % (name, size) in columns:
+                size += 1
+            return np.column_stack([self._reader.column('%s[%d]' % (name, i), start, stop)
+                                    for i in range(size)])
+        raise KeyError("no variable named '%s' in %s" % (name, self.path))
+
+    def query(self, names, start=0, stop=None, driver=None):
+        """Values of the variables `names` for the cases `start` to `stop`,
+        as a dict of arrays. Give a `driver` name to keep only the cases that
+        driver recorded."""
+        result = dict((name, self._values(name, start, stop)) for name in names)
+        if driver is not None:
+            keep = self._reader.column('_driver', start, stop) == self.drivers.index(driver)
+            result = dict((name, values[keep]) for name, values in result.items())
+        return result
+
+    def iterations(self, start=0, stop=None):
+        """driver name and iteration number of the cases `start` to `stop`"""
+        drivers = self._reader.column('_driver', start, stop).astype(int)
+        counts = self._reader.column('_iteration', start, stop).astype(int)
+        return [(self.drivers[d], n) for d, n in zip(drivers, counts)]
+
+    def case(self, i):
+        """The full record of case `i`, read from the JSON file. Only
+        available for JSON case files."""
+        if not self._json:
+            raise ValueError("'%s' doesn't keep full case records" % self.path)
+        offset = int(self._reader.column('_offset', i, i + 1)[0])
+        length = int(self._reader.column('_length', i, i + 1)[0])
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length).decode('latin-1'))
@@ -1,25 +1,26 @@
-from openmdao.lib.casehandlers.api import CaseDataset , caseset_query_to_html
-
 import matplotlib.pyplot as plt
 
-# Import case data set
-cds = CaseDataset("betz_limit.json", 'json')
+from case_index import CaseIndex
+from case_report import write_case_report
+
+# Index the case data set, only parsed the first time
+cases = CaseIndex("betz_limit.json")
 
 # show all variable names
-print cds.data.var_names().fetch()
+print cases.var_names()
 
 # pick some that we want
 variables = ["aDisc.a", "aDisc.Cp"]
 
-# get all cases that have data for those variables
-our_data = cds.data.vars(variables).fetch()
+# get the values of just those variables, as arrays
+our_data = cases.query(variables)
 
 
-caseset_query_to_html(cds.data)
+# browsable report, written to betz_limit_report/index.html
+write_case_report(cases, "betz_limit_report")
 
 # make some plots
-for area, cp in our_data:
-    plt.plot(area, cp, "ko")
+plt.plot(our_data["aDisc.a"], our_data["aDisc.Cp"], "ko")
 plt.xlabel("a")
 plt.ylabel("Cp")
-plt.show()
\ No newline at end of file
+plt.show()
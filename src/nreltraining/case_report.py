@@ -0,0 +1,184 @@
+"""HTML report of recorded cases that stays small however many cases there are.
+
+:func:`write_case_report` writes a directory holding a fixed size
+``index.html``, one ``plot.js`` with every variable downsampled to at most
+`plot_points` min/max pairs, and the case table split into pages of
+`page_size` cases, ``pages/page_<n>.js``. The browser only loads the page
+being viewed. The shards are script files rather than plain JSON so that the
+report also works when opened straight from disk.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from case_index import CaseIndex
+
+
+def downsample(values, n_points):
+    """Min and max of `values` over `n_points` equal runs of cases.
+
+    Returns ``(first_case, min, max)`` arrays, `first_case` being the index of
+    the first case of every run. Extremes survive, so spikes in a long run
+    of cases still show up in the plot.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0:
+        return np.zeros(0, dtype=int), np.zeros(0), np.zeros(0)
+    edges = np.unique(np.linspace(0, n, min(n, n_points) + 1).astype(int))[:-1]
+
+    with np.errstate(invalid='ignore'):
+        low = np.fmin.reduceat(values, edges)
+        high = np.fmax.reduceat(values, edges)
+    return edges, low, high
+
+
+def _json_values(values):
+    """list for json, with NaN as null"""
+    return [None if x != x else x for x in np.asarray(values, dtype=float).tolist()]
+
+
+def write_case_report(cases, directory, variables=None, page_size=500, plot_points=500):
+    """Write an HTML report of `cases` (a :class:`~nreltraining.case_index.CaseIndex`
+    or the path of a case file) into `directory`. `variables` defaults to
+    all recorded variables. Returns the path of ``index.html``.
+    """
+    if not isinstance(cases, CaseIndex):
+        cases = CaseIndex(cases)
+    if variables is None:
+        variables = cases.var_names()
+    variables = list(variables)
+
+    pages_dir = os.path.join(directory, 'pages')
+    if not os.path.isdir(pages_dir):
+        os.makedirs(pages_dir)
+
+    n_cases = len(cases)
+    n_pages = max(1, (n_cases + page_size - 1)//page_size)
+    for page in range(n_pages):
+        start = page*page_size
+        data = cases.query(variables, start, start + page_size)
+        iterations = cases.iterations(start, start + page_size)
+        rows = [[start + i, '%s %d' % it] for i, it in enumerate(iterations)]
+        for name in variables:
+            for row, x in zip(rows, _json_values(data[name])):
+                row.append(x)
+        with open(os.path.join(pages_dir, 'page_%d.js' % page), 'w') as f:
+            f.write('caseReport.page(%d, %s);\n' % (page, json.dumps(rows)))
+
+    plots = {}
+    for name in variables:
+        first, low, high = downsample(cases.query([name])[name], plot_points)
+        plots[name] = {'case': first.tolist(),
+                       'min': _json_values(low),
+                       'max': _json_values(high)}
+    with open(os.path.join(directory, 'plot.js'), 'w') as f:
+        f.write('caseReport.plots(%s);\n' % json.dumps(plots))
+
+    info = {'source': os.path.basename(cases.path),
+            'n_cases': n_cases,
+            'n_pages': n_pages,
+            'page_size': page_size,
+            'columns': ['case', 'iteration'] + variables}
+    index = os.path.join(directory, 'index.html')
+    with open(index, 'w') as f:
+        f.write(_TEMPLATE.replace('/*INFO*/', json.dumps(info)))
+    return index
+
+
+_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Case report</title>
+<style>
+body { font-family: sans-serif; margin: 1em; }
+table { border-collapse: collapse; font-size: 12px; }
+td, th { border: 1px solid #ccc; padding: 2px 6px; text-align: right; }
+#pager { margin: .5em 0; }
+</style>
+</head>
+<body>
+<h2 id="title"></h2>
+<div>
+  <select id="var"></select>
+  <canvas id="plot" width="800" height="300"></canvas>
+</div>
+<div id="pager">
+  <button id="prev">&lt;</button> <span id="where"></span> <button id="next">&gt;</button>
+</div>
+<table id="table"></table>
+<script>
+var caseReport = (function () {
+  var info = /*INFO*/;
+  var pages = {}, plotData = null, current = 0;
+
+  function el(id) { return document.getElementById(id); }
+
+  function load(src) {
+    var script = document.createElement('script');
+    script.src = src;
+    document.body.appendChild(script);
+  }
+
+  function fmt(x) { return x === null ? '' : (typeof x === 'number' ? x.toPrecision(6) : x); }
+
+  function showPage(n) {
+    current = Math.max(0, Math.min(info.n_pages - 1, n));
+    el('where').textContent = 'page ' + (current + 1) + ' of ' + info.n_pages;
+    if (!(current in pages)) { load('pages/page_' + current + '.js'); return; }
+    var html = '<tr><th>' + info.columns.join('</th><th>') + '</th></tr>';
+    pages[current].forEach(function (row) {
+      html += '<tr><td>' + row.map(fmt).join('</td><td>') + '</td></tr>';
+    });
+    el('table').innerHTML = html;
+  }
+
+  function drawPlot() {
+    var data = plotData[el('var').value], canvas = el('plot');
+    var ctx = canvas.getContext('2d'), w = canvas.width, h = canvas.height;
+    ctx.clearRect(0, 0, w, h);
+    if (!data || !data.case.length) { return; }
+    var lo = Infinity, hi = -Infinity;
+    data.min.forEach(function (x) { if (x !== null) { lo = Math.min(lo, x); } });
+    data.max.forEach(function (x) { if (x !== null) { hi = Math.max(hi, x); } });
+    if (hi === lo) { hi += 1; lo -= 1; }
+    var n = Math.max(1, info.n_cases - 1);
+    function y(v) { return h - 10 - (v - lo)/(hi - lo)*(h - 20); }
+    ctx.strokeStyle = '#000';
+    ctx.fillStyle = '#000';
+    ctx.fillText(hi.toPrecision(4), 2, 10);
+    ctx.fillText(lo.toPrecision(4), 2, h - 2);
+    data.case.forEach(function (c, i) {
+      if (data.min[i] === null) { return; }
+      var x = 50 + c/n*(w - 60);
+      ctx.beginPath();
+      ctx.moveTo(x, y(data.min[i]));
+      ctx.lineTo(x, y(data.max[i]) - 1);
+      ctx.stroke();
+    });
+  }
+
+  el('title').textContent = info.source + ': ' + info.n_cases + ' cases';
+  el('prev').onclick = function () { showPage(current - 1); };
+  el('next').onclick = function () { showPage(current + 1); };
+  el('var').onchange = drawPlot;
+  info.columns.slice(2).forEach(function (name) {
+    var option = document.createElement('option');
+    option.value = option.textContent = name;
+    el('var').appendChild(option);
+  });
+
+  window.onload = function () { showPage(0); load('plot.js'); };
+
+  return {
+    page: function (n, rows) { pages[n] = rows; if (n === current) { showPage(n); } },
+    plots: function (data) { plotData = data; drawPlot(); }
+  };
+})();
+</script>
+</body>
+</html>
+"""
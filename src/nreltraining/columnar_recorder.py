@@ -0,0 +1,268 @@
+"""Case recorder that streams cases into a chunked, columnar binary file.
+
+File layout (all little endian)::
+
+    b'NRELCASE'                  magic
+    uint32 version, uint32 n     n = length of the JSON header
+    uint64 count                 number of cases recorded so far
+    n bytes of JSON              column names, chunk size, drivers, constants
+    padding to 8 bytes
+    chunk 0, chunk 1, ...        each chunk is one float64 column after
+                                 another, chunk_size values per column
+
+The current chunk and the count are memory-mapped. Every case assigns its
+row of the chunk in one go and bumps the count, so a crashed run loses at
+most the case in progress and memory use doesn't grow with the number of
+cases. A chunk is filled with NaN when it's started, so values a case
+doesn't provide read back as NaN. Array variables are stored as one column
+per element, ``name[0]``, ``name[1]``...
+Constants are kept in the header: numbers as floats, arrays as lists,
+strings, booleans and None as they are and any other value as its repr.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+
+MAGIC = b'NRELCASE'
+VERSION = 1
+_PREFIX = struct.Struct('<8sIIQ')
+
+# bookkeeping columns stored with every case
+META_COLUMNS = ('_driver', '_iteration', '_error')
+
+
+def _flatten(name, value):
+    """column names and float values for one variable"""
+    try:
+        arr = np.asarray(value, dtype=float)
+    except (TypeError, ValueError):
+        return [name], [np.nan]
+    if arr.ndim == 0:
+        return [name], [float(arr)]
+    arr = arr.ravel()
+    return ['%s[%d]' % (name, i) for i in range(arr.size)], list(arr)
+
+
+def _constant(value):
+    """`value` in a form the JSON header keeps"""
+    if value is None or isinstance(value, (basestring, bool)):
+        return value
+    try:
+        arr = np.asarray(value, dtype=float)
+    except (TypeError, ValueError):
+        return repr(value)
+    return float(arr) if arr.ndim == 0 else arr.tolist()
+
+
+def _write_header(f, columns, chunk_size, drivers, constants, count=0):
+    """write the file header, returns the offset of the first chunk"""
+    header = json.dumps({'columns': columns,
+                         'chunk_size': chunk_size,
+                         'drivers': drivers,
+                         'constants': constants}).encode('utf-8')
+    f.write(_PREFIX.pack(MAGIC, VERSION, len(header), count))
+    f.write(header)
+    data_offset = (_PREFIX.size + len(header) + 7)//8*8
+    f.write(b'\0'*(data_offset - _PREFIX.size - len(header)))
+    return data_offset
+
+
+def write_columns(filename, columns, values, chunk_size=1024, drivers=(), constants=None):
+    """Write a complete table in the format of :class:`ColumnarCaseRecorder`.
+
+    `values` is an (n_cases, len(columns)) array; the bookkeeping columns are
+    not added, include them in `columns` where they are wanted.
+    """
+    values = np.asarray(values, dtype='<f8').reshape(-1, len(columns))
+    count = len(values)
+    with open(filename, 'wb') as f:
+        _write_header(f, list(columns), chunk_size, list(drivers), constants or {}, count)
+        for start in range(0, count, chunk_size):
+            chunk = np.empty((len(columns), chunk_size), dtype='<f8')
+            chunk.fill(np.nan)
+            block = values[start:start + chunk_size]
+            chunk[:, :len(block)] = block.T
+            f.write(chunk.tostring())
+
+
+class ColumnarCaseRecorder(object):
+    """Records cases to a columnar binary file that
+    :class:`ColumnarCaseReader` memory-maps.
+
+    The columns are fixed by the first recorded case: every variable
+    registered by any driver up to then, with arrays sized by their value in
+    that case (or by the current value of the variable in the driver's
+    assembly). Recording a case with a value under any other name, such as
+    an array that has grown, raises ValueError rather than lose the value.
+    """
+
+    def __init__(self, filename, chunk_size=1024):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self._cfg_map = {}
+        self._drivers = []
+        self._iterations = []
+        self._constants = {}
+        self._file = None
+        self._columns = None
+        self._count = 0
+        self._chunk = None
+        self._count_map = None
+
+    def startup(self):
+        """Open the file; any previous contents are lost"""
+        self._file = open(self.filename, 'w+b')
+        self._columns = None
+        self._count = 0
+        self._chunk = self._count_map = None
+        self._iterations = [0]*len(self._drivers)
+
+    def register(self, driver, inputs, outputs):
+        """Register names for later record calls from `driver`"""
+        if driver in self._cfg_map:
+            index = self._cfg_map[driver][0]
+        else:
+            index = len(self._drivers)
+            self._drivers.append(driver)
+            self._iterations.append(0)
+        self._cfg_map[driver] = (index, list(inputs) + list(outputs))
+
+    def record_constants(self, constants):
+        """Keep constants in the file header"""
+        for name, value in constants:
+            self._constants[name] = _constant(value)
+
+    def _start(self, driver, values):
+        columns = list(META_COLUMNS)
+        for other in self._drivers:
+            index, names = self._cfg_map[other]
+            for i, name in enumerate(names):
+                if other is driver:
+                    value = values[i]
+                else:
+                    try:
+                        value = other.parent.get(name)
+                    except Exception:
+                        value = 0.
+                for column in _flatten(name, value)[0]:
+                    if column not in columns:
+                        columns.append(column)
+
+        self._data_offset = _write_header(self._file, columns, self.chunk_size,
+                                          [d.get_pathname() for d in self._drivers],
+                                          self._constants)
+        self._columns = dict((name, i) for i, name in enumerate(columns))
+        self._chunk_bytes = 8*self.chunk_size*len(columns)
+        self._blank_chunk = np.empty(self.chunk_size*len(columns), dtype='<f8')
+        self._blank_chunk.fill(np.nan)
+        self._file.flush()
+        self._count_map = np.memmap(self._file, dtype='<u8', mode='r+',
+                                    offset=_PREFIX.size - 8, shape=(1,))
+
+    def _new_chunk(self, chunk):
+        """append a chunk of NaN to the file and map it"""
+        offset = self._data_offset + chunk*self._chunk_bytes
+        self._file.seek(offset)
+        self._file.write(self._blank_chunk.tostring())
+        self._file.flush()
+        self._chunk = np.memmap(self._file, dtype='<f8', mode='r+', offset=offset,
+                                shape=(len(self._columns), self.chunk_size))
+
+    def record(self, driver, inputs, outputs, exc, case_uuid, parent_uuid):
+        """Store one case"""
+        if self._file is None:
+            self.startup()
+
+        index, names = self._cfg_map[driver]
+        values = list(inputs) + list(outputs)
+        if self._columns is None:
+            self._start(driver, values)
+
+        columns = [0, 1, 2]
+        row = [index, self._iterations[index] + 1, 0. if exc is None else 1.]
+        for name, value in zip(names, values):
+            flat_names, flat_values = _flatten(name, value)
+            for column in flat_names:
+                if column not in self._columns:
+                    raise ValueError("'%s' has no column in '%s', the columns are fixed by the "
+                                     "first case recorded" % (column, self.filename))
+                columns.append(self._columns[column])
+            row.extend(flat_values)
+        self._iterations[index] += 1
+
+        chunk, slot = divmod(self._count, self.chunk_size)
+        if slot == 0:
+            self._new_chunk(chunk)
+        self._chunk[columns, slot] = row
+
+        self._count += 1
+        self._count_map[0] = self._count
+
+    def close(self):
+        """Close the file; the recorded cases stay readable"""
+        if self._file is not None:
+            if self._columns is None:  # no cases, still leave a valid file
+                self._start(None, [])
+            for mapped in (self._chunk, self._count_map):
+                if mapped is not None:
+                    mapped.flush()
+            self._chunk = self._count_map = None
+            self._file.close()
+            self._file = None
+
+    def get_iterator(self):
+        return None
+
+
+class ColumnarCaseReader(object):
+    """Read access to a file written by :class:`ColumnarCaseRecorder`. The
+    data is memory-mapped, so only the columns and case ranges that are
+    actually used are read from disk."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            magic, version, header_len, count = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError("'%s' is not a columnar case file" % filename)
+            header = json.loads(f.read(header_len).decode('utf-8'))
+
+        self.columns = header['columns']
+        self.chunk_size = header['chunk_size']
+        self.drivers = header['drivers']
+        self.constants = header['constants']
+        self._index = dict((name, i) for i, name in enumerate(self.columns))
+        self._count = count
+
+        n_chunks = (count + self.chunk_size - 1)//self.chunk_size
+        offset = (_PREFIX.size + header_len + 7)//8*8
+        if n_chunks:
+            self._data = np.memmap(filename, dtype='<f8', mode='r', offset=offset,
+                                   shape=(n_chunks, len(self.columns), self.chunk_size))
+        else:
+            self._data = np.zeros((0, len(self.columns), self.chunk_size))
+
+    def __len__(self):
+        return self._count
+
+    def var_names(self):
+        """names of the recorded variables, without bookkeeping columns"""
+        return [name for name in self.columns if name not in META_COLUMNS]
+
+    def column(self, name, start=0, stop=None):
+        """values of one column for cases `start` to `stop`"""
+        stop = self._count if stop is None else min(stop, self._count)
+        start = min(start, stop)
+        i = self._index[name]
+        size = self.chunk_size
+
+        first, last = start//size, (stop + size - 1)//size
+        values = np.asarray(self._data[first:last, i, :]).ravel()
+        return values[start - first*size:stop - first*size]
+
+    def fetch(self, names, start=0, stop=None):
+        """dict of column arrays for the cases `start` to `stop`"""
+        return dict((name, self.column(name, start, stop)) for name in names)
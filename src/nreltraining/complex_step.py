@@ -0,0 +1,170 @@
+"""Complex step derivatives for components without a hand written jacobian.
+
+A finite difference needs a step big enough to beat the rounding error of
+the difference and small enough to keep the truncation error down, and a
+component with an iterative solver inside adds the solver's tolerance to
+that rounding error. A central difference halves the truncation error at
+twice the runs. The complex step ``f'(x) = Im f(x + ih)/h`` has no
+difference at all, so `h` can be tiny and the derivative is as accurate as
+the function, from one (complex) evaluation per input.
+
+A component opts in by mixing in :class:`ComplexStepDerivatives` and
+defining ``_complex_outputs(inputs)``, which computes the outputs of
+`list_deriv_vars` from a dict of input values the way `execute` does, but
+without touching the component's variables, which only hold real values.
+Every function on that path has to be complex safe: no ``float()``, no
+``abs()`` where the sign matters, comparisons on real parts only. The
+airfoil tables and the induction solver are.
+:class:`ComplexStepActuatorDisc` is the tutorial's ActuatorDisc opted in;
+its `execute` publishes the real parts of ``_complex_outputs``, so the
+formulas are written once. Opting in is per component and manual: an
+assembly keeps whatever components it adds, so the Betz_Limit tutorial
+still differentiates its ActuatorDisc by central differences unless the
+disc is replaced, as betz_limit_complex_step.py does.
+
+:func:`compare_derivatives` measures the evaluations and accuracy of the
+complex step against forward and central differences.
+"""
+
+import numpy as np
+
+from actuator_disc import ActuatorDisc
+
+
+class ComplexStepDerivatives(object):
+    """provideJ by complex step over the component's list_deriv_vars"""
+
+    # far below rounding error, the derivative doesn't depend on it
+    complex_step_size = 1e-30
+
+    def complex_step_jacobian(self):
+        """jacobian of the outputs of list_deriv_vars with respect to its
+        inputs, one complex evaluation per input value"""
+        input_keys, output_keys = self.list_deriv_vars()
+        h = self.complex_step_size
+        values = dict((name, np.asarray(self.get(name), dtype=complex)) for name in input_keys)
+
+        columns = []
+        for name in input_keys:
+            x = values[name]
+            for k in range(x.size):
+                stepped = x.copy()
+                stepped.flat[k] += h*1j
+                outputs = self._complex_outputs(dict(values, **{name: stepped}))
+                columns.append(np.hstack([np.ravel(outputs[out]).imag for out in output_keys])/h)
+
+        return np.array(columns).T
+
+    def provideJ(self):
+        return self.complex_step_jacobian()
+
+
+class ComplexStepActuatorDisc(ComplexStepDerivatives, ActuatorDisc):
+    """ActuatorDisc with complex step derivatives; see
+    actuator_disc_derivatives.ActuatorDisc for the hand written jacobian"""
+
+    def execute(self):
+        # the formulas live in _complex_outputs only, the outputs are its
+        # real parts
+        inputs = dict((name, self.get(name)) for name in self.list_deriv_vars()[0])
+        for name, value in self._complex_outputs(inputs).items():
+            setattr(self, name, float(np.real(value)))
+
+    def list_deriv_vars(self):
+        return ('a', 'Area', 'rho', 'Vu'), ('Vr', 'Vd', 'Ct', 'thrust', 'Cp', 'power')
+
+    def _complex_outputs(self, inputs):
+        a, Vu = inputs['a'], inputs['Vu']
+        qA = .5*inputs['rho']*inputs['Area']*Vu**2
+
+        Vd = Vu*(1-2 * a)
+        Ct = 4*a*(1-a)
+        Cp = Ct*(1-a)
+        return {'Vd': Vd, 'Vr': .5*(Vu + Vd),
+                'Ct': Ct, 'thrust': Ct*qA,
+                'Cp': Cp, 'power': Cp*qA*Vu}
+
+
+def finite_difference_jacobian(comp, form="forward", step=1e-6):
+    """Jacobian of the outputs of `comp`'s list_deriv_vars with respect to
+    its inputs by ``form="forward"`` or ``"central"`` differences of
+    `step` relative to each input (absolute for inputs at zero), running
+    the component for every step"""
+    input_keys, output_keys = comp.list_deriv_vars()
+
+    def outputs():
+        comp.run()
+        return np.hstack([np.ravel(comp.get(out)) for out in output_keys])
+
+    base = outputs() if form == "forward" else None
+    columns = []
+    for name in input_keys:
+        x = np.array(comp.get(name), dtype=float)
+        for k in range(x.size):
+            h = step*(abs(x.flat[k]) or 1.)
+            stepped = x.copy()
+            stepped.flat[k] += h
+            comp.set(name, stepped if x.ndim else float(stepped))
+            forward = outputs()
+            if form == "central":
+                stepped.flat[k] -= 2*h
+                comp.set(name, stepped if x.ndim else float(stepped))
+                columns.append((forward - outputs())/(2*h))
+            else:
+                columns.append((forward - base)/h)
+            comp.set(name, x if x.ndim else float(x))
+
+    comp.run()
+    return np.array(columns).T
+
+
+def compare_derivatives(comp, reference=None, steps=(1e-4, 1e-6, 1e-8)):
+    """Component evaluations and worst error, relative to the largest
+    reference entry, of forward and central differences at each of `steps`
+    and of the complex step, as a list of ``(method, evaluations, error)``.
+
+    `comp` must be an opted in component that has been run. The reference
+    is the `reference` jacobian, by default the complex step's own.
+    """
+    complex_J = comp.complex_step_jacobian()
+    reference = complex_J if reference is None else reference
+    scale = abs(reference).max()
+    n_inputs = complex_J.shape[1]
+
+    rows = []
+    for form in ("forward", "central"):
+        for step in steps:
+            J = finite_difference_jacobian(comp, form, step)
+            evaluations = n_inputs*(2 if form == "central" else 1) + (form == "forward")
+            rows.append(("%s %.0e" % (form, step), evaluations, abs(J - reference).max()/scale))
+    rows.append(("complex step", n_inputs, abs(complex_J - reference).max()/scale))
+    return rows
+
+
+if __name__ == "__main__":
+    from actuator_disc_derivatives import ActuatorDisc as AnalyticActuatorDisc
+    from bem import BEMPerf, BladeElement
+
+    disc = ComplexStepActuatorDisc()
+    disc.a = .3
+    disc.run()
+    analytic = AnalyticActuatorDisc()
+    analytic.a, analytic.Vu = .3, disc.Vu
+    analytic.run()
+
+    element = BladeElement()
+    element.run()
+
+    perf = BEMPerf(20)
+    perf.delta_Ct = np.linspace(.01, .05, 20)
+    perf.delta_Cp = np.linspace(.1, .5, 20)
+    perf.lambda_r = np.linspace(1., 8., 20)
+    perf.run()
+
+    # the reference jacobians are the analytic ones
+    for name, comp, reference in (("ActuatorDisc", disc, analytic.provideJ()),
+                                  ("BladeElement", element, element.provideJ()),
+                                  ("BEMPerf(20)", perf, perf.provideJ())):
+        print name
+        for method, evaluations, error in compare_derivatives(comp, reference):
+            print "  %-14s %4d evaluations  error %.1e" % (method, evaluations, error)
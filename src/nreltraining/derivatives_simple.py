@@ -62,11 +62,12 @@ class opt(Assembly):
         self.driver.add_objective('comp2.z')
 
 
-import time
-assm = opt()
+if __name__ == "__main__":
+
+    assm = opt()
 
-t = time.time()
-assm.run()
-print time.time() - t
+    t = time.time()
+    assm.run()
+    print time.time() - t
 
-print "z:", assm.comp2.z
\ No newline at end of file
+    print "z:", assm.comp2.z
@@ -0,0 +1,251 @@
+"""Batched Newton solver for the blade element induction factors.
+
+Every blade element has to find the axial (a) and angular (b) inflow factors
+that reproduce themselves through the momentum equations::
+
+    phi   = arctan(lambda_r*(1+b)/(1-a))
+    alpha = pi/2 - twist - phi
+    a'    = 1/(1 + 4*cos(phi)**2/(sigma*C_L*sin(phi)))
+    b'    = a'/(lambda_r*tan(phi))
+
+The stations are independent, so the residual ``(a - a', b - b')`` has a
+2x2 jacobian per station. It is formed in closed form and inverted directly,
+so all of the stations of a rotor (or of many rotors) take their Newton
+steps together.
+"""
+
+from collections import namedtuple
+from math import pi
+
+import numpy as np
+
+
+InductionSolution = namedtuple('InductionSolution',
+                               ['a', 'b', 'phi', 'alpha', 'iterations', 'converged'])
+
+
+def induction_residual(a, b, lambda_r, sigma, twist, lift):
+    """Residual of the induction equations and its partial derivatives.
+
+    `lift` is called with an array of angles of attack and must return the
+    lift coefficients and their slopes, ``C_L, dC_L/dalpha``.
+
+    Returns ``(R_a, R_b, dR)`` where `dR` is a dict of partial derivatives
+    keyed by ``(residual, variable)``, e.g. ``dR['a', 'b']`` is dR_a/db.
+    """
+    one_minus_a = 1. - a
+    u = lambda_r*(1. + b)/one_minus_a
+    phi = np.arctan(u)
+    alpha = pi/2 - twist - phi
+    C_L, dC_L = lift(alpha)
+
+    sin_phi = np.sin(phi)
+    cos_phi = np.cos(phi)
+    tan_phi = sin_phi/cos_phi
+
+    K = 4.*cos_phi**2/(sigma*C_L*sin_phi)
+    A = 1./(1. + K)
+    B = A/(lambda_r*tan_phi)
+
+    # phi as a function of a, b and lambda_r
+    d_phi = 1./(1. + u**2)
+    phi_a = d_phi*u/one_minus_a
+    phi_b = d_phi*lambda_r/one_minus_a
+    phi_lambda = d_phi*(1. + b)/one_minus_a
+
+    # K depends on phi directly and through C_L(alpha(phi))
+    K_phi = K*(dC_L/C_L - 2.*tan_phi - 1./tan_phi)
+    K_sigma = -K/sigma
+    K_twist = K*dC_L/C_L
+
+    # A = 1/(1+K)  and  B = A*cot(phi)/lambda_r
+    A_K = -A**2
+    B_A = B/A
+    B_phi = -B/(sin_phi*cos_phi)
+    B_lambda = -B/lambda_r
+
+    A_phi = A_K*K_phi
+    B_phi = B_A*A_phi + B_phi
+
+    dR = {}
+    dR['a', 'a'] = 1. - A_phi*phi_a
+    dR['a', 'b'] = -A_phi*phi_b
+    dR['b', 'a'] = -B_phi*phi_a
+    dR['b', 'b'] = 1. - B_phi*phi_b
+
+    dR['a', 'lambda_r'] = -A_phi*phi_lambda
+    dR['b', 'lambda_r'] = -(B_phi*phi_lambda + B_lambda)
+    dR['a', 'sigma'] = -A_K*K_sigma
+    dR['b', 'sigma'] = -B_A*A_K*K_sigma
+    dR['a', 'twist'] = -A_K*K_twist
+    dR['b', 'twist'] = -B_A*A_K*K_twist
+
+    return a - A, b - B, dR
+
+
+def solve_induction(lambda_r, sigma, twist, lift, a_init=0.2, b_init=0.01,
+                    tol=1e-10, maxiter=50, max_step=0.1):
+    """Solve the induction equations for any number of blade stations.
+
+    All arguments broadcast against each other, so scalars, per-station
+    arrays and (case, station) arrays are all fine. Each station stops
+    taking steps as soon as its residual drops below `tol`; steps are capped
+    at `max_step` and halved while they increase the residual.
+
+    Complex inputs are solved in complex arithmetic, for complex step
+    derivatives. The imaginary part of a Newton iterate is the derivative
+    at the previous iterate, so a complex station takes one more full step
+    after its residual drops below `tol`.
+
+    Returns an :class:`InductionSolution` whose fields have the broadcast
+    shape, including the number of Newton iterations each station took and
+    whether it converged.
+    """
+    inputs = np.broadcast_arrays(lambda_r, sigma, twist, a_init, b_init)
+    dtype = np.result_type(float, *inputs)
+    lambda_r, sigma, twist, a, b = [np.array(x, dtype=dtype) for x in inputs]
+    shape = a.shape
+    lambda_r, sigma, twist, a, b = [x.ravel() for x in (lambda_r, sigma, twist, a, b)]
+
+    iterations = np.zeros(a.shape, dtype=int)
+    converged = np.zeros(a.shape, dtype=bool)
+    active = np.arange(a.size)
+    complex_step = np.iscomplexobj(a)
+    settled = np.zeros(a.shape, dtype=bool)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        R_a, R_b, dR = induction_residual(a, b, lambda_r, sigma, twist, lift)
+        norm = np.maximum(abs(R_a), abs(R_b))
+
+        for i in range(maxiter + 1):
+            done = norm <= tol
+            if complex_step:
+                done, settled = done & settled, done
+            converged[active[done]] = True
+            keep = ~done & np.isfinite(norm)
+            if i == maxiter or not keep.any():
+                break
+
+            active = active[keep]
+            R_a, R_b, norm, settled = R_a[keep], R_b[keep], norm[keep], settled[keep]
+            J = dict((k, v[keep]) for k, v in dR.items())
+            iterations[active] += 1
+
+            # invert the 2x2 jacobian of every station directly
+            det = J['a', 'a']*J['b', 'b'] - J['a', 'b']*J['b', 'a']
+            step_a = -(J['b', 'b']*R_a - J['a', 'b']*R_b)/det
+            step_b = -(J['a', 'a']*R_b - J['b', 'a']*R_a)/det
+
+            scale = np.minimum(1., max_step/np.maximum(abs(step_a), abs(step_b)))
+            scale[~np.isfinite(scale)] = 0.
+
+            a_old, b_old = a[active], b[active]
+            lam, sig, tw = lambda_r[active], sigma[active], twist[active]
+            for _ in range(10):
+                a_new = a_old + scale*step_a
+                b_new = b_old + scale*step_b
+                R_a_new, R_b_new, dR_new = induction_residual(a_new, b_new, lam, sig, tw, lift)
+                norm_new = np.maximum(abs(R_a_new), abs(R_b_new))
+
+                worse = ~(norm_new < norm) & ~settled
+                if not worse.any():
+                    break
+                scale[worse] *= .5
+
+            # give up on stations that can't take a finite step, but keep
+            # their last finite iterate
+            lost = ~np.isfinite(norm_new)
+            a_new[lost], b_new[lost] = a_old[lost], b_old[lost]
+
+            a[active], b[active] = a_new, b_new
+            R_a, R_b, dR, norm = R_a_new, R_b_new, dR_new, norm_new
+
+        phi = np.arctan(lambda_r*(1. + b)/(1. - a))
+    alpha = pi/2 - twist - phi
+
+    return InductionSolution(a.reshape(shape), b.reshape(shape),
+                             phi.reshape(shape), alpha.reshape(shape),
+                             iterations.reshape(shape), converged.reshape(shape))
+
+
+class SolverCounters(object):
+    """Running totals of induction solves and Newton iterations, kept
+    separately for warm and cold started stations"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.solves = {True: 0, False: 0}
+        self.iterations = {True: 0, False: 0}
+        self.fallbacks = 0
+
+    def record(self, iterations, warm, fallbacks=0):
+        """add the iteration counts of one solve; `warm` flags the stations
+        that were seeded from a previous solution"""
+        iterations, warm = np.broadcast_arrays(iterations, warm)
+        for flag in (True, False):
+            mask = warm == flag
+            self.solves[flag] += int(mask.sum())
+            self.iterations[flag] += int(iterations[mask].sum())
+        self.fallbacks += int(fallbacks)
+
+    def mean_iterations(self, warm=None):
+        """average Newton iterations per station solve; pass `warm` to only
+        count warm (True) or cold (False) started stations"""
+        flags = (True, False) if warm is None else (warm,)
+        solves = sum(self.solves[f] for f in flags)
+        return sum(self.iterations[f] for f in flags)/float(solves) if solves else 0.
+
+    def __iadd__(self, other):
+        for flag in (True, False):
+            self.solves[flag] += other.solves[flag]
+            self.iterations[flag] += other.iterations[flag]
+        self.fallbacks += other.fallbacks
+        return self
+
+    def summary(self):
+        return {'warm_solves': self.solves[True],
+                'cold_solves': self.solves[False],
+                'mean_iterations_warm': self.mean_iterations(True),
+                'mean_iterations_cold': self.mean_iterations(False),
+                'fallbacks': self.fallbacks}
+
+
+def solve_induction_warm(lambda_r, sigma, twist, lift, a_init=0.2, b_init=0.01,
+                         previous=None, counters=None, **kwargs):
+    """:func:`solve_induction`, seeded from the converged stations of a
+    `previous` solution.
+
+    Stations that don't converge from their warm seed are solved again from
+    ``a_init, b_init``; their iterations include both attempts. When given,
+    `counters` (a :class:`SolverCounters`) records the cost of the solve.
+    """
+    if previous is None:
+        result = solve_induction(lambda_r, sigma, twist, lift, a_init, b_init, **kwargs)
+        if counters is not None:
+            counters.record(result.iterations, False)
+        return result
+
+    warm = previous.converged
+    a0 = np.where(warm, previous.a, a_init)
+    b0 = np.where(warm, previous.b, b_init)
+    result = solve_induction(lambda_r, sigma, twist, lift, a0, b0, **kwargs)
+
+    retry = warm & ~result.converged
+    if retry.any():
+        lambda_r, sigma, twist = np.broadcast_arrays(lambda_r, sigma, twist, result.a)[:3]
+        cold = solve_induction(lambda_r[retry], sigma[retry], twist[retry], lift,
+                               a_init, b_init, **kwargs)
+
+        fields = [np.array(x) for x in result]
+        for i, value in enumerate(cold):
+            if result._fields[i] == 'iterations':
+                fields[i][retry] += value  # both attempts count
+            else:
+                fields[i][retry] = value
+        result = InductionSolution(*fields)
+
+    if counters is not None:
+        counters.record(result.iterations, warm, retry.sum())
+    return result
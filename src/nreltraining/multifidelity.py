@@ -0,0 +1,168 @@
+"""Multi-fidelity optimization of an AutoBEM design.
+
+Optimizing a rotor with many blade elements directly spends every
+objective and finite difference evaluation on the expensive model.
+:func:`multifidelity_optimize` optimizes a coarse rotor (few elements)
+instead, with its Cp corrected to match the fine rotor at the current
+design, either by adding the difference (``"additive"``) or by scaling with
+the ratio (``"multiplicative"``). The corrected coarse Cp is also held below
+the Betz limit, 16/27, which keeps the coarse model from wandering into
+designs that beat momentum theory whatever its discretization. Each
+correction round costs one fine evaluation, against
+a finite difference gradient and a line search per iteration of a direct
+fine optimization. When the exact fine optimum matters, the fine rotor's
+own optimizer can polish the result, starting from the corrected coarse
+optimum.
+"""
+
+from openmdao.main.api import Component
+from openmdao.lib.datatypes.api import Float
+
+from bem import AutoBEM
+
+
+CORRECTIONS = ("additive", "multiplicative")
+
+# the largest Cp of an ActuatorDisc, at a = 1/3
+BETZ_LIMIT = 16/27.
+
+
+class FidelityCorrection(Component):
+    """Low fidelity Cp corrected towards a high fidelity model"""
+
+    # inputs
+    Cp = Float(iotype="in", desc="low fidelity power coefficient")
+    scale = Float(1., iotype="in", desc="multiplicative correction")
+    shift = Float(0., iotype="in", desc="additive correction")
+
+    # outputs
+    corrected_Cp = Float(iotype="out", desc="corrected power coefficient")
+
+    def execute(self):
+        self.corrected_Cp = self.scale*self.Cp + self.shift
+
+
+def correction_factors(correction, high, low):
+    """``(scale, shift)`` that correct the low fidelity Cp `low` to the
+    high fidelity `high`. The ratio means nothing for a `low` that isn't
+    positive, so there the multiplicative correction falls back to the
+    additive one."""
+    if correction == "multiplicative" and low > 0:
+        return high/low, 0.
+    return 1., high - low
+
+
+def _design(rotor):
+    return [rotor.get(name) for name in rotor.driver.get_parameters()]
+
+
+def _set_design(rotor, design):
+    for name, value in zip(rotor.driver.get_parameters(), design):
+        rotor.set(name, value)
+
+
+def _evaluate(rotor, design):
+    _set_design(rotor, design)
+    rotor.driver.workflow.run()
+    return rotor.data.Cp
+
+
+def corrected_rotor(n_elements=6, engine="vector", **kwargs):
+    """An AutoBEM whose optimizer maximizes the corrected Cp, under the
+    Betz limit. Further arguments go to AutoBEM."""
+    rotor = AutoBEM(n_elements, engine=engine, **kwargs)
+
+    rotor.add('correction', FidelityCorrection())
+    rotor.connect('perf.data.Cp', 'correction.Cp')
+
+    rotor.driver.workflow.add('correction')
+    rotor.driver.clear_objectives()
+    rotor.driver.add_objective('-correction.corrected_Cp')
+    rotor.driver.add_constraint('correction.corrected_Cp <= %r' % BETZ_LIMIT)
+    return rotor
+
+
+def multifidelity_optimize(fine, coarse=None, correction="additive", max_rounds=10, tol=1e-4,
+                           polish=False):
+    """Maximize the Cp of the AutoBEM `fine` over its optimizer's
+    parameters, starting from its current design.
+
+    `coarse` is a rotor from :func:`corrected_rotor`, six vector engine
+    elements by default. Correction rounds stop once the fine Cp improves by
+    less than `tol`, after which, with `polish`, the fine rotor's own
+    optimizer runs from the best design found. Returns a dict with the
+    design, Cp, the number of fine and coarse rotor evaluations and the
+    ``(fine Cp, coarse Cp)`` history of the rounds.
+    """
+    if correction not in CORRECTIONS:
+        raise ValueError("correction must be one of %s, not '%s'" % (CORRECTIONS, correction))
+    if coarse is None:
+        coarse = corrected_rotor()
+
+    fine_start = fine.perf.exec_count
+    coarse_start = coarse.perf.exec_count
+
+    design = _design(fine)
+    Cp = _evaluate(fine, design)
+    history = []
+    for _ in range(max_rounds):
+        low = _evaluate(coarse, design)
+        coarse.correction.scale, coarse.correction.shift = correction_factors(correction, Cp, low)
+        history.append((Cp, low))
+
+        _set_design(coarse, design)
+        coarse.run()
+        candidate = _design(coarse)
+        candidate_Cp = _evaluate(fine, candidate)
+
+        improved = candidate_Cp > Cp
+        if improved:
+            design, Cp = candidate, candidate_Cp
+        if not improved or candidate_Cp - history[-1][0] < tol:
+            break
+
+    _set_design(fine, design)
+    if polish:
+        fine.run()
+        design, Cp = _design(fine), fine.data.Cp
+    else:
+        fine.driver.workflow.run()
+
+    return {'design': dict(zip(fine.driver.get_parameters(), design)),
+            'Cp': Cp,
+            'fine_evaluations': fine.perf.exec_count - fine_start,
+            'coarse_evaluations': coarse.perf.exec_count - coarse_start,
+            'history': history}
+
+
+def compare_with_direct(n_fine=200, n_coarse=6, correction="additive", engine="vector",
+                        polish=False):
+    """Optimize the default design both ways; returns the multi-fidelity
+    result, the direct Cp and fine evaluation count, and the fine
+    evaluations saved"""
+    direct = AutoBEM(n_fine, engine=engine)
+    direct.run()
+    direct_evaluations = direct.perf.exec_count
+
+    result = multifidelity_optimize(AutoBEM(n_fine, engine=engine),
+                                    corrected_rotor(n_coarse, engine=engine), correction,
+                                    polish=polish)
+    result['direct_Cp'] = direct.data.Cp
+    result['direct_evaluations'] = direct_evaluations
+    result['evaluations_saved'] = direct_evaluations - result['fine_evaluations']
+    return result
+
+
+if __name__ == "__main__":
+    import time
+
+    for correction, polish in (("additive", False), ("multiplicative", False), ("additive", True)):
+        t0 = time.time()
+        result = compare_with_direct(correction=correction, polish=polish)
+        print "%s correction%s (%.1f s)" % (correction, polish and ", polished" or "",
+                                           time.time() - t0)
+        print "  multi-fidelity Cp: %.6f with %d fine and %d coarse evaluations" % (
+            result['Cp'], result['fine_evaluations'], result['coarse_evaluations'])
+        print "  direct Cp:         %.6f with %d fine evaluations" % (
+            result['direct_Cp'], result['direct_evaluations'])
+        print "  fine evaluations saved: %d" % result['evaluations_saved']
@@ -0,0 +1,209 @@
+"""Multi-start optimization of an AutoBEM design in a pool of processes.
+
+SLSQP finds the optimum nearest its starting point, so a single run from
+the default design can miss better ones. :func:`multistart_optimize` starts
+one SLSQP run from each of `n_starts` Latin hypercube points over the
+bounds of the model's optimizer parameters and spreads the runs over worker
+processes, as ParallelDOEdriver does with DOE cases.
+
+The workers share an EvaluationCache whose store lives in a
+``multiprocessing.Manager``, so a design any run has evaluated is never
+evaluated again, and a list of the optima found so far. A run whose
+accepted iterate comes within `radius` (as a fraction of the parameter
+ranges) of one of those optima is stopped early and recorded as a
+duplicate of it.
+"""
+
+import multiprocessing
+
+import numpy as np
+
+from cache import EvaluationCache
+
+
+# per worker: the model, the shared cache and the optima found so far
+_worker = {}
+
+
+def latin_hypercube(n, n_dims, seed=None):
+    """`n` points in the unit cube with exactly one point in each of the
+    `n` equal slices of every dimension"""
+    rng = np.random.RandomState(seed)
+    points = (rng.rand(n, n_dims) + np.arange(n)[:, None])/n
+    for j in range(n_dims):
+        points[:, j] = points[rng.permutation(n), j]
+    return points
+
+
+class _Duplicate(Exception):
+    def __init__(self, optimum):
+        self.optimum = optimum
+
+
+def _init_worker(factory, model, store, optima):
+    _worker['model'] = factory() if factory is not None else model
+    _worker['cache'] = EvaluationCache(maxsize=0, store=store) if store is not None else None
+    _worker['optima'] = optima
+
+
+def _optimize(args):
+    """one SLSQP run from the normalized design `start`"""
+    from scipy.optimize import fmin_slsqp
+
+    start, names, low, high, objective, radius, tol, maxiter, step = args
+    model, cache, optima = _worker['model'], _worker['cache'], _worker['optima']
+    span = high - low
+    counts = {'evaluations': 0, 'cache_hits': 0}
+    # the optima seen so far, only the new ones are fetched from the
+    # shared list
+    known = []
+
+    def evaluate(u):
+        x = low + np.clip(u, 0., 1.)*span
+        key = cache.key(x) if cache is not None else None
+        value = cache.get(key) if cache is not None else None
+        if value is None:
+            for name, v in zip(names, x):
+                model.set(name, v)
+            model.driver.workflow.run()
+            value = model.get(objective)
+            counts['evaluations'] += 1
+            if cache is not None:
+                cache.put(key, value)
+        else:
+            counts['cache_hits'] += 1
+        return -value
+
+    def check_duplicate(u):
+        """called by SLSQP with each accepted iterate"""
+        known.extend(optima[len(known):])
+        for i, (optimum, _) in enumerate(known):
+            if np.sqrt(np.mean((u - optimum)**2)) < radius:
+                raise _Duplicate(i)
+
+    def gradient(u):
+        f0 = evaluate(u)
+        grad = np.zeros(len(u))
+        for i in range(len(u)):
+            # step inwards at the upper bound
+            h = step if u[i] + step <= 1. else -step
+            perturbed = np.array(u)
+            perturbed[i] += h
+            grad[i] = (evaluate(perturbed) - f0)/h
+        return grad
+
+    result = {'start': low + start*span}
+    try:
+        u, f, iterations, mode, message = fmin_slsqp(evaluate, start, fprime=gradient,
+                                                     bounds=[(0., 1.)]*len(start), acc=tol,
+                                                     iter=maxiter, iprint=0, full_output=True,
+                                                     callback=check_duplicate)
+    except _Duplicate as dup:
+        u, value = known[dup.optimum]
+        result.update(status='duplicate', duplicate_of=dup.optimum, objective=value)
+    else:
+        # modes other than 0 did not converge, keep their result out of
+        # the early stopping list
+        result.update(status='converged' if mode == 0 else message, objective=-f)
+        if mode == 0:
+            optima.append((np.array(u), -f))
+
+    result['design'] = low + np.clip(u, 0., 1.)*span
+    result.update(counts)
+    return result
+
+
+# statuses of the runs that ended at an optimum
+FINISHED = ('converged', 'duplicate')
+
+
+def rank_optima(runs, names, low, high, radius=.02):
+    """Distinct optima among the `runs` of :func:`multistart_optimize`, best
+    objective first, each as a dict of its design, objective and the number
+    of runs that ended there. Designs closer than `radius`, as a fraction of
+    the ranges between `low` and `high`, are the same optimum. Runs whose
+    status isn't 'converged' or 'duplicate' stopped short of an optimum and
+    are left out."""
+    optima = []
+    finished = [run for run in runs if run['status'] in FINISHED]
+    for run in sorted(finished, key=lambda r: -r['objective']):
+        u = (run['design'] - low)/(high - low)
+        for optimum, u_optimum in optima:
+            if np.sqrt(np.mean((u - u_optimum)**2)) < radius:
+                optimum['runs'] += 1
+                break
+        else:
+            optima.append(({'design': dict(zip(names, run['design'])),
+                            'objective': run['objective'], 'runs': 1}, u))
+    return [optimum for optimum, _ in optima]
+
+
+def multistart_optimize(model, n_starts=8, n_workers=0, seed=None, factory=None,
+                        objective='data.Cp', radius=.02, tol=1e-6, maxiter=50, step=1e-6):
+    """Maximize `objective` of `model` over the parameters of its driver
+    with SLSQP runs from `n_starts` Latin hypercube points.
+
+    `n_workers` is the number of processes, 0 for one per CPU. As with
+    ParallelDOEdriver, workers are forked with a copy of `model` unless a
+    picklable `factory` for it is given. Returns the ranked distinct optima
+    (see :func:`rank_optima`) and a result dict per run, in start order,
+    with its start and final design, objective, status ('converged',
+    'duplicate' or the optimizer's message), the number of model
+    evaluations it made and the number it found in the shared cache. Only
+    converged and duplicate runs count towards the optima; the others
+    are reported among the runs alone.
+    """
+    params = model.driver.get_parameters()
+    names = list(params)
+    low = np.array([p.low for p in params.values()], dtype=float)
+    high = np.array([p.high for p in params.values()], dtype=float)
+
+    starts = latin_hypercube(n_starts, len(names), seed)
+    tasks = [(start, names, low, high, objective, radius, tol, maxiter, step) for start in starts]
+
+    n_workers = n_workers or multiprocessing.cpu_count()
+    if n_workers == 1:
+        _init_worker(factory, model, {}, [])
+        try:
+            runs = [_optimize(task) for task in tasks]
+        finally:
+            _worker.clear()
+    else:
+        manager = multiprocessing.Manager()
+        pool = multiprocessing.Pool(n_workers, _init_worker,
+                                    (factory, model if factory is None else None,
+                                     manager.dict(), manager.list()))
+        try:
+            runs = pool.map(_optimize, tasks, 1)
+        finally:
+            pool.close()
+            pool.join()
+            manager.shutdown()
+
+    return rank_optima(runs, names, low, high, radius), runs
+
+
+if __name__ == "__main__":
+    import time
+
+    from bem import AutoBEM
+
+    model = AutoBEM(20, engine="vector")
+    t0 = time.time()
+    optima, runs = multistart_optimize(model, n_starts=16, seed=0)
+    print "%d runs in %.1f s" % (len(runs), time.time() - t0)
+    for run in runs:
+        if run['status'] in FINISHED:
+            print "  %-10s Cp %.5f  %4d evaluations, %4d cache hits" % (
+                run['status'], run['objective'], run['evaluations'], run['cache_hits'])
+    print
+    for optimum in optima:
+        print "Cp %.5f reached by %d runs" % (optimum['objective'], optimum['runs'])
+        print "  " + ", ".join("%s=%.4g" % item for item in sorted(optimum['design'].items()))
+
+    failed = [run for run in runs if run['status'] not in FINISHED]
+    if failed:
+        print
+        print "%d runs didn't converge:" % len(failed)
+        for run in failed:
+            print "  Cp %.5f  %s" % (run['objective'], run['status'])
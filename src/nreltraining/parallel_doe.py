@@ -0,0 +1,220 @@
+"""DOE driver that evaluates its cases in a pool of worker processes.
+
+Every worker holds its own, already configured, copy of the model, so the
+cost of building it is paid once per worker rather than once per case.
+
+Every case starts from the model as it was when the driver started: the
+unconnected inputs of the workflow components, and of every component
+inside them, are captured once and sent along with each case, and the
+worker puts them back before it sets the case's parameters. The results
+don't depend on how the cases are split over the workers. A stock
+DOEdriver starts each case from wherever the one before left the model
+instead; the two agree exactly on cases that leave no inputs behind, but
+where a case moves inputs the next one starts from, such as the design
+AutoBEM's own optimizer moves, only these results are independent of the
+case order. State kept outside of variables isn't captured.
+
+The cases, their order and their recording are otherwise DOEdriver's own.
+As soon as the cases are generated they are handed to the workers, and
+while DOEdriver steps through them as usual, each component of the
+workflow skips its execute and takes on what its copy in a worker left
+behind for the case: the unconnected inputs, which its own drivers may
+have moved, the outputs and the execution counts of the component and of
+every component inside it, and the cases the drivers inside it recorded,
+which go to the recorders of this process. The model is left as the last
+case left it.
+"""
+
+import copy
+import multiprocessing
+from collections import deque
+
+from openmdao.main.api import Component
+from openmdao.lib.datatypes.api import Int
+from openmdao.lib.drivers.api import DOEdriver
+
+from cache import model_variables, restore_values, variable_values
+from patching import patch, unpatch
+
+
+# the model each worker evaluates cases on
+_worker_model = None
+
+# what the recorders of the worker's model were given during a case
+_worker_records = []
+
+
+def _top(comp):
+    while comp.parent is not None:
+        comp = comp.parent
+    return comp
+
+
+class _CaseCapture(object):
+    """the recorder of a worker's model, keeps the cases for the parent"""
+
+    def startup(self):
+        pass
+
+    def register(self, driver, inputs, outputs):
+        pass
+
+    def record_constants(self, constants):
+        pass
+
+    def record(self, driver, inputs, outputs, exc, case_uuid, parent_uuid):
+        _worker_records.append((driver, list(inputs), list(outputs), exc, case_uuid, parent_uuid))
+
+    def close(self):
+        pass
+
+    def get_iterator(self):
+        return None
+
+
+def _init_worker(factory, model):
+    global _worker_model
+    _worker_model = factory() if factory is not None else model
+    if _worker_model is not None:
+        # cases are only written by the recorders of the parent process
+        top = _top(_worker_model)
+        for recorder in top.recorders:
+            patch(recorder, 'record', lambda record: lambda *args: None)
+        top.recorders = [_CaseCapture()]
+
+
+def _components(comp, path):
+    """(path, component) of `comp` and of every component inside it"""
+    yield path, comp
+    for name in comp.list_containers():
+        child = getattr(comp, name)
+        if isinstance(child, Component):
+            for item in _components(child, '%s.%s' % (path, name)):
+                yield item
+
+
+def _run_case(args):
+    """put back the `start` inputs, set the parameters of one case, run the
+    workflow once and return, for every workflow component, the unconnected
+    inputs, outputs and number of executions of it and of all the
+    components inside it, and the cases the drivers inside it recorded"""
+    targets, values, driver_name, comp_names, start = args
+    model = _worker_model
+
+    for path, inputs in start:
+        restore_values(model.get(path), copy.deepcopy(inputs))
+    for paths, value in zip(targets, values):
+        for path in paths:
+            model.set(path, value)
+
+    trees = [list(_components(model.get(name), name)) for name in comp_names]
+    before = [[comp.exec_count for path, comp in tree] for tree in trees]
+    del _worker_records[:]
+    model.get(driver_name).workflow.run()
+
+    paths = dict((id(comp), path) for tree in trees for path, comp in tree)
+    records = dict((name, []) for name in comp_names)
+    for record in _worker_records:
+        # this driver's own case is recorded by the parent
+        path = paths.get(id(record[0]))
+        if path is not None:
+            records[path.split('.')[0]].append((path,) + record[1:])
+
+    def values(comp):
+        names = comp.list_inputs(connected=False) + comp.list_outputs()
+        return variable_values(comp, model_variables(comp, names))
+
+    return [([(path, values(comp), comp.exec_count - count)
+              for (path, comp), count in zip(tree, counts)], records[name])
+            for name, tree, counts in zip(comp_names, trees, before)]
+
+
+class ParallelDOEdriver(DOEdriver):
+    """DOEdriver that spreads its cases over local worker processes.
+
+    With no `factory`, workers are forked from the current process and
+    evaluate cases on their inherited copy of the model, so nothing is
+    reconfigured at all. Where processes can't be forked, pass a picklable
+    `factory` returning a top assembly with a driver of this driver's name
+    and workflow; each worker calls it once, and a single worker runs in
+    this process.
+    """
+
+    n_workers = Int(0, iotype="in", low=0, desc="number of worker processes, 0 for one per CPU")
+    chunksize = Int(1, iotype="in", low=1, desc="number of cases sent to a worker at a time")
+
+    def __init__(self, factory=None):
+        super(ParallelDOEdriver, self).__init__()
+        self.factory = factory
+        self._pool = None
+        self._results = None
+        self._pending = {}
+        self._patches = []
+
+    def execute(self):
+        try:
+            super(ParallelDOEdriver, self).execute()
+        finally:
+            self._stop_workers()
+
+    def _get_cases(self):
+        cases = [list(values) for values in super(ParallelDOEdriver, self)._get_cases()]
+        if cases:
+            self._start_workers(cases, self.n_workers or multiprocessing.cpu_count())
+        return cases
+
+    def _start_workers(self, cases, n_workers):
+        targets = [tuple(p.targets) for p in self.get_parameters().values()]
+        comp_names = self.workflow.get_names()
+        start = []
+        for name in comp_names:
+            for path, comp in _components(self.parent.get(name), name):
+                inputs = model_variables(comp, comp.list_inputs(connected=False))
+                start.append((path, variable_values(comp, inputs)))
+        tasks = [(targets, values, self.name, comp_names, start) for values in cases]
+
+        if n_workers == 1 and self.factory is not None:
+            _init_worker(self.factory, None)
+            self._results = (_run_case(task) for task in tasks)
+        else:
+            model = self.parent if self.factory is None else None
+            self._pool = multiprocessing.Pool(n_workers, _init_worker, (self.factory, model))
+            self._results = self._pool.imap(_run_case, tasks, self.chunksize)
+
+        self._pending = dict((name, deque()) for name in comp_names)
+        self._patches = [patch(self.parent.get(name), 'execute', self._replay(name))
+                         for name in comp_names]
+
+    def _replay(self, name):
+        comp = self.parent.get(name)
+
+        def execute(*args, **kwargs):
+            pending = self._pending[name]
+            if not pending:
+                for comp_name, result in zip(self.workflow.get_names(), next(self._results)):
+                    self._pending[comp_name].append(result)
+            states, records = pending.popleft()
+
+            for path, inputs, outputs, exc, case_uuid, parent_uuid in records:
+                for recorder in _top(self).recorders:
+                    recorder.record(self.parent.get(path), inputs, outputs, exc,
+                                    case_uuid, parent_uuid)
+
+            for path, values, count in states:
+                target = self.parent.get(path)
+                restore_values(target, values)
+                if target is not comp:  # the component's own run counts itself
+                    target.exec_count += count
+        return lambda original: execute
+
+    def _stop_workers(self):
+        for key in self._patches:
+            unpatch(key)
+        self._patches = []
+        self._pending = {}
+        self._results = None
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        _init_worker(None, None)
@@ -0,0 +1,64 @@
+"""Instance level patches of component methods that stack.
+
+Several tools take a method of a component over for a while by setting it
+in the instance's ``__dict__``: the Profiler wraps ``execute`` to time it,
+ParallelDOEdriver replaces it with what a worker computed, and the AutoBEM
+cache with what it stored. Done independently, the tool that comes second
+saves the first one's patch as "the original", and puts it back, or
+deletes it, at the wrong time.
+
+:func:`patch` keeps the patches of every method in a stack instead. The
+method seen is the class's (or the instance's own, unpatched) method
+wrapped by each patch in the order they were made, and :func:`unpatch`
+takes a patch out in any order, rebuilding the method from the ones
+left.
+"""
+
+
+# id of a patched object -> (object, {attribute: (unpatched, [(key, make_wrapper)])})
+_patched = {}
+
+
+class _Key(object):
+    """identifies one patch"""
+
+    def __init__(self, obj, attr):
+        self.obj, self.attr = obj, attr
+
+
+def _rebuild(obj, attr):
+    base, stack = _patched[id(obj)][1][attr]
+    if base is None:
+        obj.__dict__.pop(attr, None)
+    else:
+        obj.__dict__[attr] = base
+
+    if stack:
+        method = getattr(obj, attr)
+        for key, make_wrapper in stack:
+            method = make_wrapper(method)
+        obj.__dict__[attr] = method
+    else:
+        del _patched[id(obj)][1][attr]
+        if not _patched[id(obj)][1]:
+            del _patched[id(obj)]
+
+
+def patch(obj, attr, make_wrapper):
+    """Replace the method `attr` of `obj` with ``make_wrapper(method)``,
+    where `method` includes the patches already made. Returns the key to
+    :func:`unpatch` it with."""
+    methods = _patched.setdefault(id(obj), (obj, {}))[1]
+    if attr not in methods:
+        methods[attr] = (obj.__dict__.get(attr), [])
+    key = _Key(obj, attr)
+    methods[attr][1].append((key, make_wrapper))
+    _rebuild(obj, attr)
+    return key
+
+
+def unpatch(key):
+    """take out the patch made by the :func:`patch` call that returned `key`"""
+    stack = _patched[id(key.obj)][1][key.attr][1]
+    stack[:] = [(k, make_wrapper) for k, make_wrapper in stack if k is not key]
+    _rebuild(key.obj, key.attr)
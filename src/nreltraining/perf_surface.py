@@ -0,0 +1,165 @@
+"""Precomputed rotor performance surfaces.
+
+A :class:`PerformanceSurface` tabulates Cp and Ct of a fixed blade geometry
+over a uniform grid of tip speed ratio and pitch. Lookups are bilinear
+interpolations on whole arrays of query points, with the grid cell found by
+index arithmetic, so millions of queries take a fraction of a second instead
+of one AutoBEM run each. The grid itself is solved in one batch by
+AutoBEM.power_curve. The surface is saved as a small ``.npz`` file along
+with the mask of grid points whose induction solve converged and the
+largest interpolation error found when it was checked against direct BEM
+solves.
+"""
+
+from math import pi
+
+import numpy as np
+
+
+def _performance(model, tsr, pitch, V):
+    """Cp, Ct and convergence flags of `model` at arrays of operating
+    points, solved in one batch without moving the design"""
+    tsr = np.asarray(tsr, dtype=float)
+    curve = model.power_curve(V*np.ones(tsr.shape), rpm=tsr*V/model.r_tip*60/(2*pi),
+                              pitch=pitch)
+    return curve['Cp'], curve['Ct'], curve['converged']
+
+
+class PerformanceSurface(object):
+    """Cp and Ct over uniform grids of tip speed ratio and pitch (deg).
+
+    `Cp` and `Ct` have one row per tip speed ratio and one column per pitch.
+    Queries outside the grid are clamped to its edges. `converged` is False
+    at the grid points whose induction solve didn't converge, all True by
+    default; interpolation uses their values all the same.
+    """
+
+    def __init__(self, tsr, pitch, Cp, Ct, error=None, converged=None):
+        self.tsr = np.asarray(tsr, dtype=float)
+        self.pitch = np.asarray(pitch, dtype=float)
+        self.Cp = np.asarray(Cp, dtype=float)
+        self.Ct = np.asarray(Ct, dtype=float)
+        for x in (self.tsr, self.pitch):
+            if len(x) < 2 or not np.allclose(np.diff(x), x[1] - x[0]):
+                raise ValueError("grids must be uniform with at least two points")
+        if self.Cp.shape != (len(self.tsr), len(self.pitch)) or self.Ct.shape != self.Cp.shape:
+            raise ValueError("Cp and Ct must have shape (len(tsr), len(pitch))")
+        if converged is None:
+            converged = np.ones(self.Cp.shape, dtype=bool)
+        self.converged = np.asarray(converged, dtype=bool)
+        if self.converged.shape != self.Cp.shape:
+            raise ValueError("converged must have the shape of Cp")
+
+        # largest |interpolated - direct| found by check(), for Cp and Ct,
+        # and how many of the check points didn't converge
+        self.error = error
+        self.unconverged = 0
+
+    @classmethod
+    def generate(cls, model, tsr, pitch, V=7., check=0):
+        """Tabulate an AutoBEM design at every (tsr, pitch) grid point at wind
+        speed `V`, changing only its rpm and pitch. With `check`, the error
+        bound is estimated from that many extra off-grid points.
+        :attr:`unconverged_nodes` tells how many grid points didn't converge.
+        """
+        T, P = np.meshgrid(np.asarray(tsr, dtype=float), np.asarray(pitch, dtype=float),
+                           indexing='ij')
+        Cp, Ct, converged = _performance(model, T.ravel(), P.ravel(), V)
+        surface = cls(tsr, pitch, Cp.reshape(T.shape), Ct.reshape(T.shape),
+                      converged=converged.reshape(T.shape))
+
+        if check:
+            surface.check(model, check, V)
+        return surface
+
+    @property
+    def unconverged_nodes(self):
+        """number of grid points whose solve didn't converge"""
+        return int(self.converged.size - self.converged.sum())
+
+    def __call__(self, tsr, pitch):
+        """interpolated ``Cp, Ct`` at arrays of tip speed ratios and pitches"""
+        tsr, pitch = np.broadcast_arrays(np.asarray(tsr, dtype=float),
+                                         np.asarray(pitch, dtype=float))
+        n_t, n_p = self.Cp.shape
+
+        s = np.clip((tsr - self.tsr[0])/(self.tsr[1] - self.tsr[0]), 0, n_t - 1)
+        u = np.clip((pitch - self.pitch[0])/(self.pitch[1] - self.pitch[0]), 0, n_p - 1)
+        i = np.minimum(s.astype(int), n_t - 2)
+        j = np.minimum(u.astype(int), n_p - 2)
+        s -= i
+        u -= j
+
+        w00 = (1 - s)*(1 - u)
+        w01 = (1 - s)*u
+        w10 = s*(1 - u)
+        w11 = s*u
+
+        results = []
+        for table in (self.Cp, self.Ct):
+            flat = table.ravel()
+            k = i*n_p + j
+            results.append(w00*flat[k] + w01*flat[k + 1] + w10*flat[k + n_p] + w11*flat[k + n_p + 1])
+        return tuple(results)
+
+    def check(self, model, n_points=20, V=7., seed=0):
+        """Compare the surface with direct BEM solves at `n_points` random
+        points inside the grid; sets and returns the largest absolute
+        errors ``(Cp, Ct)`` over the points that converged, and sets
+        `unconverged` to the number that didn't. With none converged the
+        errors are NaN."""
+        rng = np.random.RandomState(seed)
+        tsr = rng.uniform(self.tsr[0], self.tsr[-1], n_points)
+        pitch = rng.uniform(self.pitch[0], self.pitch[-1], n_points)
+
+        direct_Cp, direct_Ct, converged = _performance(model, tsr, pitch, V)
+        Cp, Ct = self(tsr, pitch)
+
+        self.unconverged = int(n_points - converged.sum())
+        if converged.any():
+            self.error = (float(abs(Cp - direct_Cp)[converged].max()),
+                          float(abs(Ct - direct_Ct)[converged].max()))
+        else:
+            self.error = (np.nan, np.nan)
+        return self.error
+
+    def save(self, path):
+        """write the surface to a compressed ``.npz`` file"""
+        error = np.array(self.error if self.error is not None else (np.nan, np.nan))
+        np.savez_compressed(path, tsr=self.tsr, pitch=self.pitch, Cp=self.Cp, Ct=self.Ct,
+                            error=error, converged=self.converged)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        try:
+            error = tuple(float(x) for x in data['error'])
+            if np.isnan(error).all():
+                error = None
+            converged = data['converged'] if 'converged' in data.files else None
+            return cls(data['tsr'], data['pitch'], data['Cp'], data['Ct'], error, converged)
+        finally:
+            data.close()
+
+
+if __name__ == "__main__":
+    import time
+
+    from bem import AutoBEM
+
+    rotor = AutoBEM(6, engine="vector")
+
+    t0 = time.time()
+    surface = PerformanceSurface.generate(rotor, np.linspace(2, 12, 41),
+                                          np.linspace(-5, 10, 31), check=20)
+    print "surface generated in %.2f s" % (time.time() - t0)
+    print "error bound Cp: %.2e  Ct: %.2e" % surface.error
+    print "%d grid points and %d check points didn't converge" % (surface.unconverged_nodes,
+                                                                    surface.unconverged)
+
+    n = 1000000
+    tsr = np.random.uniform(2, 12, n)
+    pitch = np.random.uniform(-5, 10, n)
+    t0 = time.time()
+    Cp, Ct = surface(tsr, pitch)
+    print "%.1f million queries per second" % (n/(time.time() - t0)/1e6)
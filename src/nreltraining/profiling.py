@@ -0,0 +1,199 @@
+"""Per component timing and call statistics for a running model.
+
+A :class:`Profiler` wraps the ``execute`` and ``provideJ`` methods of every
+component under a top assembly (drivers and nested assemblies included) and
+the ``calc_gradient`` of every driver workflow. For each component it keeps
+
+- ``calls`` and wall ``time`` of execute, and ``self_time``, the part of it
+  not spent in other instrumented components,
+- ``fd_calls``, the executions made while a gradient was being computed,
+  i.e. finite difference steps,
+- ``provideJ_calls`` and ``provideJ_time``, analytic derivative evaluations,
+- ``solver_iterations``, summed over the ``iterations`` output of the blade
+  elements' induction solves.
+
+A wrapped call costs a couple of timer reads and dict updates, a few
+microseconds, so the profiler can stay on for production runs. Results
+export to JSON and to the collapsed stack format read by flame graph tools
+(``flamegraph.pl``, speedscope), with self times in microseconds.
+"""
+
+import json
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from openmdao.main.api import Component
+
+from patching import patch, unpatch
+
+
+_timer = time.time
+
+
+def _components(top, name=None):
+    """(pathname, component) for `top` and every component below it"""
+    found = [(name or top.get_pathname() or type(top).__name__, top)]
+    for child in top.list_containers():
+        obj = getattr(top, child)
+        if isinstance(obj, Component):
+            found.extend(_components(obj, obj.get_pathname() or child))
+    return found
+
+
+def _new_stats():
+    return {'calls': 0, 'time': 0., 'self_time': 0., 'fd_calls': 0,
+            'provideJ_calls': 0, 'provideJ_time': 0., 'solver_iterations': 0}
+
+
+class Profiler(object):
+    """Collects statistics for every component under `top` between
+    :meth:`start` and :meth:`stop`; also usable as a context manager::
+
+        with Profiler(top) as prof:
+            top.run()
+        print prof.report()
+    """
+
+    def __init__(self, top):
+        self.top = top
+        self.stats = defaultdict(_new_stats)
+        self.stacks = defaultdict(float)
+        self._stack = []
+        self._child_time = [0.]
+        self._gradient_depth = 0
+        self._wrapped = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def reset(self):
+        self.stats.clear()
+        self.stacks.clear()
+
+    def start(self):
+        """instrument the model"""
+        if self._wrapped:
+            return
+        for name, comp in _components(self.top):
+            self._wrap(comp, 'execute', self._execute_wrapper(name, comp))
+            if hasattr(comp, 'provideJ'):
+                self._wrap(comp, 'provideJ', self._provideJ_wrapper(name, comp))
+            workflow = getattr(comp, 'workflow', None)
+            if workflow is not None and hasattr(workflow, 'calc_gradient'):
+                self._wrap(workflow, 'calc_gradient', self._gradient_wrapper(name, workflow))
+
+    def stop(self):
+        """remove the instrumentation, the statistics are kept"""
+        for key in reversed(self._wrapped):
+            unpatch(key)
+        self._wrapped = []
+
+    def _wrap(self, obj, attr, make_wrapper):
+        self._wrapped.append(patch(obj, attr, make_wrapper))
+
+    def _timed(self, frame, func, args, kwargs):
+        """run func as a new frame of the call stack; returns its result,
+        wall time and the part of that not spent in instrumented calls
+        below it"""
+        self._stack.append(frame)
+        self._child_time.append(0.)
+        t0 = _timer()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            elapsed = _timer() - t0
+            self_time = elapsed - self._child_time.pop()
+            self._child_time[-1] += elapsed
+            self.stacks[';'.join(self._stack)] += self_time
+            self._stack.pop()
+        return result, elapsed, self_time
+
+    def _execute_wrapper(self, name, comp):
+        has_iterations = hasattr(comp, 'iterations')
+
+        def make(execute):
+            def wrapper(*args, **kwargs):
+                result, elapsed, self_time = self._timed(name, execute, args, kwargs)
+                stats = self.stats[name]
+                stats['calls'] += 1
+                stats['time'] += elapsed
+                stats['self_time'] += self_time
+                if self._gradient_depth:
+                    stats['fd_calls'] += 1
+                if has_iterations:
+                    stats['solver_iterations'] += int(np.sum(comp.iterations))
+                return result
+            return wrapper
+        return make
+
+    def _provideJ_wrapper(self, name, comp):
+        def make(provideJ):
+            def wrapper(*args, **kwargs):
+                result, elapsed, self_time = self._timed(name + '.provideJ', provideJ, args, kwargs)
+                stats = self.stats[name]
+                stats['provideJ_calls'] += 1
+                stats['provideJ_time'] += elapsed
+                return result
+            return wrapper
+        return make
+
+    def _gradient_wrapper(self, name, workflow):
+        def make(calc_gradient):
+            def wrapper(*args, **kwargs):
+                self._gradient_depth += 1
+                try:
+                    return self._timed(name + '.calc_gradient', calc_gradient, args, kwargs)[0]
+                finally:
+                    self._gradient_depth -= 1
+            return wrapper
+        return make
+
+    def component_stats(self):
+        """statistics of every component that ran, keyed by pathname"""
+        return dict((name, dict(stats)) for name, stats in self.stats.items())
+
+    def save_json(self, path):
+        """write the statistics and the self time of every call stack"""
+        with open(path, 'w') as f:
+            json.dump({'components': self.component_stats(),
+                       'stacks': dict(self.stacks)}, f, indent=2, sort_keys=True)
+
+    def save_collapsed(self, path):
+        """write the call stacks in collapsed stack format, one
+        ``frame;frame;frame microseconds`` line per stack"""
+        with open(path, 'w') as f:
+            for stack in sorted(self.stacks):
+                f.write('%s %d\n' % (stack, int(round(self.stacks[stack]*1e6))))
+
+    def report(self):
+        """table of the components, most expensive first"""
+        lines = ['%-24s %8s %10s %10s %8s %8s %10s' % ('component', 'calls', 'time (s)', 'self (s)',
+                                                       'fd', 'provideJ', 'iterations')]
+        stats = self.component_stats()
+        for name in sorted(stats, key=lambda n: -stats[n]['self_time']):
+            s = stats[name]
+            lines.append('%-24s %8d %10.4f %10.4f %8d %8d %10d' % (
+                name, s['calls'], s['time'], s['self_time'], s['fd_calls'],
+                s['provideJ_calls'], s['solver_iterations']))
+        return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+    from betz_limit import Betz_Limit
+
+    # profile the Betz limit optimization; given a path prefix, also write
+    # <prefix>.json and the flame graph input <prefix>.folded
+    assembly = Betz_Limit()
+    with Profiler(assembly) as prof:
+        assembly.run()
+    print prof.report()
+    if len(sys.argv) > 1:
+        prof.save_json(sys.argv[1] + '.json')
+        prof.save_collapsed(sys.argv[1] + '.folded')
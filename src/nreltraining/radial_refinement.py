@@ -0,0 +1,134 @@
+"""Adaptive placement of the radial stations of an AutoBEM rotor.
+
+BEMPerf integrates the element loading over the local speed ratio with the
+trapezoidal rule, whose error on an interval of width h is about
+h**3/12*|y''|. :func:`refine_stations` starts from a few evenly spaced
+stations, estimates that error for every interval, and splits the intervals
+that contribute the most until the estimated error of Cp is below a
+tolerance. Only the new stations are solved in each round. Near the hub the
+angle of attack sweeps through the kinks of the airfoil tables, and over a
+band of radii the induction equations have no solution at all, so stations
+end up clustered there. The smooth outer blade keeps few stations.
+
+For the default design, 81 stations reach 8e-5 of the Cp of 8001 even
+stations. Even spacing needs about 370 stations to stay that close.
+"""
+
+import numpy as np
+
+
+def _second_derivative(x, y):
+    """y'' at every point of a non-uniform grid; the ends repeat their
+    neighbours"""
+    h = np.diff(x)
+    d = np.diff(y)/h
+    inner = 2*np.diff(d)/(h[:-1] + h[1:])
+    return np.hstack([inner[:1], inner, inner[-1:]])
+
+
+def interval_errors(x, y, converged=None):
+    """Estimated trapezoidal rule error of every interval of (x, y).
+
+    Where the curvature can't be trusted, on intervals next to a station
+    whose induction solve didn't converge (False in `converged`), the bound
+    h*|dy|/2, which holds for any monotone y, is used instead. It only
+    shrinks as fast as h, so a jump in the loading gets refined until it's
+    pinned down.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    h = np.diff(x)
+    bound = .5*h*np.abs(np.diff(y))
+    if len(x) < 3:
+        return bound
+    curvature = np.abs(_second_derivative(x, y))
+    errors = h**3/12.*np.maximum(curvature[:-1], curvature[1:])
+    if converged is not None:
+        converged = np.asarray(converged, dtype=bool)
+        rough = ~(converged[:-1] & converged[1:])
+        errors[rough] = np.maximum(errors, bound)[rough]
+    return errors
+
+
+def refine_fractions(fractions, errors, fraction=.5):
+    """Split every interval whose error is at least `fraction` of the
+    largest at its midpoint; returns the new station fractions"""
+    fractions = np.asarray(fractions, dtype=float)
+    split = errors >= fraction*errors.max()
+    mids = .5*(fractions[:-1] + fractions[1:])[split]
+    return np.sort(np.hstack([fractions, mids]))
+
+
+def _solve(template, fractions):
+    """lambda_r, delta_Cp and convergence of the stations at `fractions`
+    for the design of `template`"""
+    stations = template._solve_stations(fractions, template.free_stream.V)
+    return (stations['lambda_r'][0], stations['delta_Cp'][0],
+            stations['induction'].converged[0])
+
+
+def refine_stations(template, tol=1e-4, n_start=9, max_elements=200, fraction=.5):
+    """Find radial stations for the design of the AutoBEM `template` that
+    give its Cp to within about `tol`.
+
+    Starting from `n_start` evenly spaced stations, every round splits the
+    intervals with the largest estimated integration error of Cp, solving
+    only the new stations: every station is independent of the others, so
+    the ones already solved are kept. Refinement stops when the estimated
+    error summed over the intervals is below `tol`, or when the next round
+    would exceed `max_elements` stations, so the number of induction solves
+    is the final number of stations.
+
+    Returns a vector engine rotor with the template's design on the final
+    stations, not yet run, and the history of ``(n_elements, Cp, estimated
+    error, unconverged stations)`` of every round.
+    """
+    from bem import AutoBEM
+
+    fractions = np.linspace(0., 1., n_start)
+    lambda_r, delta_Cp, converged = _solve(template, fractions)
+    history = []
+
+    while True:
+        # BEMPerf's Cp: the trapezoidal integral scaled by 8/lambda_tip**2
+        scale = 8./lambda_r[-1]**2
+        errors = scale*interval_errors(lambda_r, delta_Cp, converged)
+        history.append((len(fractions), scale*np.trapz(delta_Cp, x=lambda_r), errors.sum(),
+                        int((~converged).sum())))
+
+        refined = refine_fractions(fractions, errors, fraction)
+        if errors.sum() <= tol or len(refined) > max_elements:
+            break
+
+        new = np.setdiff1d(refined, fractions)
+        order = np.argsort(np.hstack([fractions, new]))
+        fractions = np.hstack([fractions, new])[order]
+        lambda_r, delta_Cp, converged = [np.hstack([old, values])[order] for old, values
+                                         in zip((lambda_r, delta_Cp, converged),
+                                                _solve(template, new))]
+
+    rotor = AutoBEM(engine="vector", polar=template._polar, spacing=fractions)
+    for name in template._design_inputs:
+        rotor.set(name, template.get(name))
+    return rotor, history
+
+
+if __name__ == "__main__":
+    from bem import AutoBEM
+
+    # the reference is the Cp of 8001 even stations
+    template = AutoBEM(8001, engine="vector")
+    V = [template.free_stream.V]
+    reference = template.power_curve(V)['Cp'][0]
+
+    rotor, history = refine_stations(template, tol=3e-4)
+    for n, Cp, error, unconverged in history:
+        print "%4d stations  Cp: %.6f  estimated error: %.1e  unconverged: %d" % (
+            n, Cp, error, unconverged)
+    error = abs(history[-1][1] - reference)
+    print "adaptive: %d solves, error %.1e" % (history[-1][0], error)
+
+    # from how many even stations on the error stays as small
+    worse = [n for n in range(5, 401)
+             if abs(AutoBEM(n, engine="vector").power_curve(V)['Cp'][0] - reference) > error]
+    print "even spacing: within %.1e from %d stations on" % (error, worse[-1] + 1)
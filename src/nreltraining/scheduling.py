@@ -0,0 +1,201 @@
+"""Optimal rpm and pitch schedules over wind speed.
+
+At every wind speed the best rpm and pitch of a fixed blade design are the
+solution of a small, independent, two variable problem. Solving them one
+after the other means a separate optimization, and separate model runs,
+per wind speed. :func:`optimal_schedule` advances all of them together
+instead, so that each model evaluation is one call of AutoBEM's batched
+power curve covering every wind speed.
+
+It starts each wind speed from the best point of a coarse grid over the
+bounds and refines it by compass search: every iteration tries eight
+steps around the current point of each wind speed that hasn't finished,
+all in one batch, moves to the best improvement and halves the step where
+there is none. Since the optimal tip speed ratio and pitch hardly change
+with wind speed, each wind speed then tries those of every other one's
+optimum, in one more batch, and searches again from any improvement.
+Every point is solved from the default induction seed, so the schedule is
+reproduced by a plain power_curve call, and a point where any station's
+induction solve didn't converge is never accepted.
+:func:`sequential_schedule` is the one at a time SLSQP loop over workflow
+runs, with or without warm starts, for comparison.
+"""
+
+from math import pi
+
+import numpy as np
+
+# compass search directions in normalized (rpm, pitch)
+_DIRECTIONS = np.array([(1., 0.), (-1., 0.), (0., 1.), (0., -1.),
+                        (1., 1.), (1., -1.), (-1., 1.), (-1., -1.)])
+
+
+def _rpm(tip_speed_ratio, V, r_tip):
+    return tip_speed_ratio*V/r_tip*60/(2*pi)
+
+
+def _normalize(x, bounds):
+    low, high = bounds
+    return (np.asarray(x, dtype=float) - low)/(high - low)
+
+
+def optimal_schedule(rotor, V, rho=None, rpm_bounds=(20., 300.), pitch_bounds=(-5., 30.),
+                     tol=1e-6, n_grid=9):
+    """rpm and pitch maximizing the power of the AutoBEM `rotor` at every
+    wind speed in `V` (air density `rho`, default free_stream.rho), all
+    solved together.
+
+    Each wind speed starts from the best converged point of an `n_grid` by
+    `n_grid` grid over the bounds, and the compass search stops once its
+    step is below `tol`, as a fraction of the bounds. The design itself,
+    including its rpm and pitch, is left as it was. Returns a dict with
+    ``V``, the ``rpm`` and ``pitch`` schedules, the resulting power curve
+    arrays (as from AutoBEM.power_curve) and the number of batched
+    ``evaluations``. Raises ValueError if no grid point of some wind speed
+    converges.
+    """
+    V = np.atleast_1d(np.asarray(V, dtype=float))
+    rho = np.ones(V.shape)*(rotor.free_stream.rho if rho is None else rho)
+    m = len(V)
+    low = np.array([rpm_bounds[0], pitch_bounds[0]], dtype=float)
+    span = np.array([rpm_bounds[1], pitch_bounds[1]], dtype=float) - low
+    counts = [0]
+
+    def Cp(index, u):
+        """Cp at normalized points `u` of the wind speeds at `index`, minus
+        infinity where unconverged"""
+        counts[0] += 1
+        x = low + u*span
+        curve = rotor.power_curve(V[index], rho[index], x[:, 0], x[:, 1])
+        return np.where(curve['converged'], curve['Cp'], -np.inf)
+
+    # coarse grid, cell centres
+    g = (np.arange(n_grid) + .5)/n_grid
+    grid = np.transpose([np.repeat(g, n_grid), np.tile(g, n_grid)])
+    values = Cp(np.repeat(np.arange(m), len(grid)), np.tile(grid, (m, 1))).reshape(m, len(grid))
+    best = values.argmax(axis=1)
+    f = values[np.arange(m), best]
+    if np.isinf(f).any():
+        raise ValueError("no grid point converged at V = %s" % V[np.isinf(f)])
+    u = grid[best]
+
+    k = len(_DIRECTIONS)
+    step = np.ones(m)*.5/n_grid
+    while True:
+        while (step >= tol).any():
+            active = np.nonzero(step >= tol)[0]
+            trial = np.clip(u[active, None, :] + step[active, None, None]*_DIRECTIONS, 0., 1.)
+            values = Cp(np.repeat(active, k), trial.reshape(-1, 2)).reshape(len(active), k)
+            j = values.argmax(axis=1)
+            better = values[np.arange(len(active)), j] > f[active]
+
+            moved = active[better]
+            u[moved] = trial[better, j[better]]
+            f[moved] = values[better, j[better]]
+            step[active[~better]] *= .5
+
+        # a search can stall against unconverged regions; try every wind
+        # speed at the tip speed ratio and pitch of every other one's
+        # optimum, and search again from any improvement
+        if m == 1:
+            break
+        rpm, pitch = (low + u*span).T
+        tsr = rpm*2*pi/60*rotor.r_tip/V
+        trial = np.empty((m, m, 2))
+        trial[..., 0] = _normalize(_rpm(tsr, V[:, None], rotor.r_tip), rpm_bounds)
+        trial[..., 1] = _normalize(pitch, pitch_bounds)
+        trial = np.clip(trial, 0., 1.)
+        values = Cp(np.repeat(np.arange(m), m), trial.reshape(-1, 2)).reshape(m, m)
+        j = values.argmax(axis=1)
+        better = values[np.arange(m), j] > f + tol
+        if not better.any():
+            break
+        u[better] = trial[better, j[better]]
+        f[better] = values[better, j[better]]
+        step[better] = 2*tol
+
+    rpm, pitch = (low + u*span).T
+    result = rotor.power_curve(V, rho, rpm, pitch)
+    result.update(V=V, rpm=rpm, pitch=pitch, evaluations=counts[0] + 1)
+    return result
+
+
+def sequential_schedule(rotor, V, rho=None, rpm_bounds=(20., 300.), pitch_bounds=(-5., 30.),
+                        tol=1e-6, maxiter=100, step=1e-6, warm_start=True):
+    """The schedule of :func:`optimal_schedule` found one wind speed at a
+    time, each with its own SLSQP run over workflow runs of the model.
+    With `warm_start` each wind speed starts from the previous one's tip
+    speed ratio and pitch, otherwise from the design's rpm and pitch.
+    `evaluations` counts workflow runs. Unconverged stations aren't
+    rejected here; ``converged`` tells where the result has any.
+    """
+    from scipy.optimize import fmin_slsqp
+
+    V = np.atleast_1d(np.asarray(V, dtype=float))
+    rho = np.ones(V.shape)*(rotor.free_stream.rho if rho is None else rho)
+    saved = rotor.rpm, rotor.pitch, rotor.free_stream.V, rotor.free_stream.rho
+    bounds = np.array([rpm_bounds, pitch_bounds], dtype=float)
+    span = bounds[:, 1] - bounds[:, 0]
+    counts = [0]
+
+    def Cp(u):
+        counts[0] += 1
+        rotor.rpm, rotor.pitch = bounds[:, 0] + np.clip(u, 0., 1.)*span
+        rotor.driver.workflow.run()
+        return rotor.data.Cp
+
+    def gradient(u):
+        Cp_0 = Cp(u)
+        grad = np.zeros(2)
+        for i in range(2):
+            h = step if u[i] + step <= 1. else -step
+            perturbed = np.array(u)
+            perturbed[i] += h
+            grad[i] = -(Cp(perturbed) - Cp_0)/h
+        return grad
+
+    rpm = np.zeros(V.shape)
+    pitch = np.zeros(V.shape)
+    tsr, start_pitch = saved[0]*2*pi/60*rotor.r_tip/V[0], saved[1]
+    try:
+        for k in range(len(V)):
+            rotor.free_stream.V, rotor.free_stream.rho = V[k], rho[k]
+            start = (_rpm(tsr, V[k], rotor.r_tip) if warm_start else saved[0],
+                     start_pitch if warm_start else saved[1])
+            u = fmin_slsqp(lambda u: -Cp(u), np.clip((np.array(start) - bounds[:, 0])/span, 0., 1.),
+                           fprime=gradient, bounds=[(0., 1.)]*2, acc=tol, iter=maxiter, iprint=0)
+            rpm[k], pitch[k] = bounds[:, 0] + np.clip(u, 0., 1.)*span
+            tsr, start_pitch = rpm[k]*2*pi/60*rotor.r_tip/V[k], pitch[k]
+    finally:
+        rotor.rpm, rotor.pitch, rotor.free_stream.V, rotor.free_stream.rho = saved
+
+    # leave the outputs at the design
+    rotor.driver.workflow.run()
+    result = rotor.power_curve(V, rho, rpm, pitch)
+    result.update(V=V, rpm=rpm, pitch=pitch, evaluations=counts[0])
+    return result
+
+
+if __name__ == "__main__":
+    import time
+
+    from bem import AutoBEM
+
+    rotor = AutoBEM(20, engine="vector")
+    V = np.arange(4., 12.01, .5)
+
+    for name, schedule, kwargs in (("batched", optimal_schedule, {}),
+                                   ("sequential, warm", sequential_schedule, {}),
+                                   ("sequential, cold", sequential_schedule, {'warm_start': False})):
+        t0 = time.time()
+        result = schedule(rotor, V, **kwargs)
+        print "%-18s %6.2f s  %5d evaluations  mean Cp %.5f  %2d unconverged" % (
+            name, time.time() - t0, result['evaluations'], result['Cp'].mean(),
+            len(V) - result['converged'].sum())
+
+    result = optimal_schedule(rotor, V)
+    print
+    print "%6s %8s %8s %8s %12s" % ('V', 'rpm', 'pitch', 'Cp', 'power (kW)')
+    for k in range(len(V)):
+        print "%6.1f %8.2f %8.2f %8.4f %12.2f" % (V[k], result['rpm'][k], result['pitch'][k],
+                                                  result['Cp'][k], result['net_power'][k]/1e3)
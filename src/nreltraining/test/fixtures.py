@@ -0,0 +1,12 @@
+"""Helpers shared by the test modules"""
+
+from openmdao.main.api import set_as_top
+
+from nreltraining.bem import AutoBEM
+
+
+def run_rotor(n=6, engine="vector", **kwargs):
+    """an AutoBEM rotor with its workflow run once at the initial design"""
+    rotor = set_as_top(AutoBEM(n, engine=engine, **kwargs))
+    rotor.driver.workflow.run()
+    return rotor
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+from openmdao.util.testutil import assert_rel_error
+
+from nreltraining.actuator_disc_derivatives import ActuatorDisc, ActuatorDiscBatch
+
+
+class ActuatorDiscBatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.points = [(.3, 10., 1.225, 8.), (.25, 12., 1.1, 11.), (1./3, 9., 1.3, 14.)]
+
+    def single(self, a, Area, rho, Vu):
+        comp = ActuatorDisc()
+        comp.a, comp.Area, comp.rho, comp.Vu = a, Area, rho, Vu
+        comp.run()
+        return comp
+
+    def dense(self, batch, transpose=False):
+        """the full jacobian, column by column from apply_deriv or row by
+        row from apply_derivT"""
+        inputs, outputs = batch.list_deriv_vars()
+        if transpose:
+            inputs, outputs = outputs, inputs
+        sizes = [np.size(getattr(batch, name)) for name in inputs]
+        columns = []
+        for name, size in zip(inputs, sizes):
+            for k in range(size):
+                arg = {name: np.zeros(size)}
+                arg[name][k] = 1.
+                result = dict((out, np.zeros(np.size(getattr(batch, out)))) for out in outputs)
+                (batch.apply_derivT if transpose else batch.apply_deriv)(arg, result)
+                columns.append(np.concatenate([result[out] for out in outputs]))
+        J = np.array(columns).T
+        return J.T if transpose else J
+
+    def test_matches_scalar_component(self):
+        batch = ActuatorDiscBatch(3)
+        batch.a, batch.Area, batch.rho, batch.Vu = [np.array(x) for x in zip(*self.points)]
+        batch.run()
+        blocks = batch.provideJ()
+
+        self.assertEqual(blocks.shape, (6, 4, 3))
+        for k, point in enumerate(self.points):
+            comp = self.single(*point)
+            J_single = comp.provideJ()
+            for i, name in enumerate(('Vr', 'Vd', 'Ct', 'thrust', 'Cp', 'power')):
+                assert_rel_error(self, getattr(batch, name)[k], getattr(comp, name), 1e-12)
+            np.testing.assert_allclose(blocks[:, :, k], J_single, rtol=1e-12,
+                                       atol=1e-12*abs(J_single).max())
+
+        J = self.dense(batch)
+        np.testing.assert_allclose(self.dense(batch, transpose=True), J, rtol=1e-14)
+        for k in range(3):
+            np.testing.assert_array_equal(J[k::3, k::3], blocks[:, :, k])
+
+        # the jacobian doesn't couple operating points
+        mask = np.kron(np.ones((6, 4)), np.eye(3))
+        self.assertEqual(abs(J*(1 - mask)).max(), 0.)
+
+    def test_broadcast(self):
+        batch = ActuatorDiscBatch(1)
+        batch.Vu = np.array([8., 11., 14.])
+        batch.run()
+        batch.provideJ()
+
+        self.assertEqual(batch.power.shape, (3,))
+        assert_rel_error(self, batch.power[2], self.single(.5, 10., 1.225, 14.).power, 1e-12)
+
+        # shared inputs get a single column
+        J = self.dense(batch)
+        self.assertEqual(J.shape, (18, 6))
+        np.testing.assert_allclose(self.dense(batch, transpose=True), J, rtol=1e-14)
+        J_single = self.single(.5, 10., 1.225, 11.).provideJ()
+        assert_rel_error(self, J[3*5 + 1, 1], J_single[5, 1], 1e-12)
+        assert_rel_error(self, J[3*5 + 1, 4], J_single[5, 3], 1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from openmdao.util.testutil import assert_rel_error
+
+from nreltraining.aep import (annual_energy_production, bin_wind_records, read_wind_records,
+                              rotor_power, SECONDS_PER_YEAR)
+from nreltraining.bem import AutoBEM
+
+
+class AEPTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'wind.csv')
+        with open(self.path, 'w') as f:
+            f.write('time, speed, density\n')
+            for k, V in enumerate([7., 7.1, 9., 2., 'nan', 9.1, 30., 7.]):
+                f.write('%d, %s, 1.2\n' % (k, V))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_chunked_read(self):
+        chunks = list(read_wind_records(self.path, 1, 2, chunk_size=3))
+        self.assertEqual([len(V) for V, rho in chunks], [2, 3, 3])
+        self.assertEqual(chunks[0][1][0], 1.2)
+
+        npy = os.path.join(self.tempdir, 'wind.npy')
+        np.save(npy, np.array([[7., 1.2], [8., 1.1], [9., 1.]]))
+        V, rho = next(read_wind_records(npy, density_column=1))
+        np.testing.assert_array_equal(rho, [1.2, 1.1, 1.])
+
+    def test_bins(self):
+        bins = bin_wind_records(self.path, speed_step=.5, speed_column=1, chunk_size=3)
+        speed, rho, count = bins.centers()
+
+        self.assertEqual(bins.n_records, 8)
+        self.assertEqual(bins.n_missing, 1)
+        np.testing.assert_array_equal(speed, [2., 7., 9., 30.])
+        np.testing.assert_array_equal(count, [1, 3, 2, 1])
+        np.testing.assert_array_equal(rho, 1.225)
+
+    def test_energy(self):
+        rotor = AutoBEM(6, engine="vector")
+        result = annual_energy_production(rotor, self.path, speed_column=1, rated_power=1e9)
+
+        power = rotor_power(rotor, [7., 9.], [1.225, 1.225])
+        self.assertTrue((power > 0).all())
+        for V, P in zip([7., 9.], power):
+            rotor.free_stream.V = V
+            rotor.driver.workflow.run()
+            assert_rel_error(self, P, rotor.data.net_power, 1e-10)
+        energy = 600.*(3*power[0] + 2*power[1])
+        assert_rel_error(self, result['energy'], energy, 1e-10)
+        assert_rel_error(self, result['aep'], energy/(7*600./SECONDS_PER_YEAR), 1e-10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+from math import pi
+
+import numpy as np
+from scipy.interpolate import interp1d
+
+from nreltraining.airfoil import AirfoilPolar, default_polar, load_polar
+
+
+XFOIL_POLAR = """
+       XFOIL         Version 6.99
+
+ Calculated polar for: NACA 4412
+
+ 1 1 Reynolds number fixed          Mach number fixed
+
+ xtrf =   1.000 (top)        1.000 (bottom)
+ Mach =   0.000     Re =     1.000 e 6     Ncrit =   9.000
+
+   alpha    CL        CD       CDp       CM     Top_Xtr  Bot_Xtr
+  ------ -------- --------- --------- -------- -------- --------
+  -2.000   0.2000   0.00600   0.00100  -0.1000   0.7000   1.0000
+   0.000   0.4000   0.00650   0.00120  -0.1000   0.6500   1.0000
+   2.000   0.6000   0.00700   0.00150  -0.1000   0.6000   1.0000
+   4.000   0.8000   0.00800   0.00200  -0.1000   0.5000   1.0000
+"""
+
+
+class AirfoilPolarTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'naca4412.pol')
+        with open(self.path, 'w') as f:
+            f.write(XFOIL_POLAR)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_default_matches_interp1d(self):
+        polar = default_polar()
+        self.assertTrue(polar is default_polar())
+
+        alpha = np.linspace(-5, 45, 1001)*pi/180
+        rad = np.array([0., 13., 15, 20, 30])*pi/180
+        cl = interp1d(rad, [0, 1.3, .8, .7, 1.1], fill_value=0.001, bounds_error=False)
+        rad = np.array([0., 10, 20, 30, 40])*pi/180
+        cd = interp1d(rad, [0., 0., 0.3, 0.6, 1.], fill_value=0.001, bounds_error=False)
+
+        C_L, C_D = polar.coefficients(alpha)
+        np.testing.assert_allclose(C_L, cl(alpha), atol=1e-12)
+        np.testing.assert_allclose(C_D, cd(alpha), atol=1e-12)
+
+    def test_slope(self):
+        C_L, dC_L = default_polar().lift(np.array([5., 14., 50.])*pi/180)
+        np.testing.assert_allclose(dC_L, [1.3/13*180/pi, -.25*180/pi, 0.])
+
+    def test_read_xfoil(self):
+        polar = AirfoilPolar.from_file(self.path)
+        self.assertEqual(polar.name, 'naca4412')
+
+        C_L, C_D = polar.coefficients(np.array([-1., 3., 10.])*pi/180)
+        np.testing.assert_allclose(C_L, [.3, .7, .8])
+        np.testing.assert_allclose(C_D, [.00625, .0075, .008])
+
+    def test_binary_cache(self):
+        AirfoilPolar.from_file(self.path)
+        self.assertTrue(os.path.exists(self.path + '.npz'))
+
+        # a stale cache is ignored
+        with open(self.path, 'a') as f:
+            f.write("   6.000   1.0000   0.01000   0.00200  -0.1000   0.5000   1.0000\n")
+        os.utime(self.path, (0, 0))
+        C_L, C_D = AirfoilPolar.from_file(self.path).coefficients(5*pi/180)
+        self.assertAlmostEqual(C_L, .9)
+
+    def test_load_once(self):
+        self.assertTrue(load_polar(self.path) is load_polar(self.path))
+
+        coarse = load_polar(self.path, step=pi/180)
+        self.assertFalse(coarse is load_polar(self.path))
+        self.assertTrue(coarse is load_polar(self.path, step=pi/180))
+        self.assertTrue(coarse._cl.step > load_polar(self.path)._cl.step)
+
+
+if __name__ == '__main__':
+    unittest.main()
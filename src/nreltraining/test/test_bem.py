@@ -0,0 +1,180 @@
+import unittest
+
+import numpy as np
+
+from openmdao.util.testutil import assert_rel_error
+
+from nreltraining.bem import AutoBEM, BladeElement, BladeElementArray, BEMPerf, \
+    LinearDistribution, StationDistribution, station_fractions
+from nreltraining.test.fixtures import run_rotor
+
+
+class VectorEngineTestCase(unittest.TestCase):
+
+    def test_matches_element_engine(self):
+        elem = run_rotor(6, "element")
+        vect = run_rotor(6, "vector")
+
+        assert_rel_error(self, vect.data.Cp, elem.data.Cp, 1e-6)
+        assert_rel_error(self, vect.data.Ct, elem.data.Ct, 1e-6)
+        assert_rel_error(self, vect.data.tip_speed_ratio, elem.data.tip_speed_ratio, 1e-12)
+
+    def test_bad_engine(self):
+        self.assertRaises(ValueError, AutoBEM, 6, engine="spam")
+
+
+def fd_jacobian(comp, step=1e-6):
+    """forward difference jacobian over the component's list_deriv_vars"""
+    inputs, outputs = comp.list_deriv_vars()
+
+    def flat_outputs():
+        return np.hstack([np.atleast_1d(comp.get(name)).ravel() for name in outputs])
+
+    comp.run()
+    base = flat_outputs()
+    columns = []
+    for name in inputs:
+        value = comp.get(name)
+        flat = np.atleast_1d(np.array(value, dtype=float))
+        for i in range(flat.size):
+            perturbed = flat.copy()
+            h = step*max(1., abs(perturbed[i]))
+            perturbed[i] += h
+            comp.set(name, perturbed if np.ndim(value) else perturbed[0])
+            comp.run()
+            columns.append((flat_outputs() - base)/h)
+        comp.set(name, value)
+    comp.run()
+
+    return np.array(columns).T
+
+
+class DerivativesTestCase(unittest.TestCase):
+
+    def assert_jacobian(self, comp):
+        J_fd = fd_jacobian(comp)
+        J = comp.provideJ()
+        self.assertEqual(J.shape, J_fd.shape)
+        np.testing.assert_allclose(J, J_fd, rtol=1e-3, atol=1e-4)
+
+    def test_blade_element(self):
+        comp = BladeElement()
+        comp.r = 3.
+        comp.chord = .4
+        comp.twist = .1
+        self.assert_jacobian(comp)
+        self.assertTrue(comp.converged)
+
+    def test_blade_element_array(self):
+        comp = BladeElementArray(5)
+        comp.r = np.linspace(1, 5, 5)
+        comp.twist = np.linspace(.4, -.05, 5)
+        comp.chord = np.linspace(.7, .2, 5)
+        self.assert_jacobian(comp)
+        self.assertTrue(comp.converged.all())
+
+    def test_linear_distribution(self):
+        comp = LinearDistribution(n=5)
+        comp.start, comp.end, comp.offset = .2, 5., .1
+        self.assert_jacobian(comp)
+
+    def test_station_distribution(self):
+        comp = StationDistribution(station_fractions(5, "cosine"))
+        comp.start, comp.end, comp.offset = .2, 5., .1
+        self.assert_jacobian(comp)
+
+    def test_bem_perf(self):
+        comp = BEMPerf(5)
+        comp.delta_Ct = np.array([.1, .3, .2, .5, .4])
+        comp.delta_Cp = np.array([.2, .1, .4, .3, .6])
+        comp.lambda_r = np.array([1., 2.5, 3., 7., 6.5])
+        comp.r = 5.
+        comp.rpm = 100.
+        self.assert_jacobian(comp)
+
+        # the output tree is reused rather than rebuilt on every run
+        data = comp.data
+        comp.run()
+        self.assertTrue(comp.data is data)
+
+
+class RadialSpacingTestCase(unittest.TestCase):
+
+    def test_linear_fractions_match_linear_distribution(self):
+        linear = run_rotor(6, "vector", spacing="linear")
+        fractions = run_rotor(6, "vector", spacing=station_fractions(6))
+        assert_rel_error(self, fractions.data.Cp, linear.data.Cp, 1e-12)
+
+    def test_cosine_engines_agree(self):
+        elem = run_rotor(8, "element", spacing="cosine")
+        vect = run_rotor(8, "vector", spacing="cosine")
+        assert_rel_error(self, vect.data.Cp, elem.data.Cp, 1e-6)
+        self.assertTrue(np.diff(vect.elements.dr)[:3].max() > 0)
+
+    def test_ct_independent_of_spacing(self):
+        # every station's delta_Ct carries its own width, Ct must not
+        # count it again
+        linear = run_rotor(40, "vector", spacing="linear")
+        cosine = run_rotor(40, "vector", spacing="cosine")
+        assert_rel_error(self, cosine.data.Ct, linear.data.Ct, 2e-2)
+        assert_rel_error(self, run_rotor(10, "vector").data.Ct, linear.data.Ct, 2e-2)
+
+    def test_bad_spacing(self):
+        self.assertRaises(ValueError, AutoBEM, 6, spacing="spam")
+
+
+class PowerCurveTestCase(unittest.TestCase):
+
+    def test_matches_runs(self):
+        for engine in ("vector", "element"):
+            rotor = AutoBEM(6, engine=engine)
+            V = np.array([4., 7., 11.])
+            rho = np.array([1.2, 1.225, 1.25])
+            curve = rotor.power_curve(V, rho)
+            self.assertTrue(curve['converged'].all())
+
+            for k in range(len(V)):
+                rotor.free_stream.V = V[k]
+                rotor.free_stream.rho = rho[k]
+                rotor.driver.workflow.run()
+                for name in ('net_power', 'net_thrust', 'Cp', 'Ct', 'tip_speed_ratio'):
+                    assert_rel_error(self, curve[name][k], getattr(rotor.data, name), 1e-10)
+
+    def test_rpm_and_pitch(self):
+        rotor = AutoBEM(6, engine="vector")
+        curve = rotor.power_curve([6., 8.], rpm=[90., 120.], pitch=[2., -1.])
+
+        rotor.free_stream.V, rotor.rpm, rotor.pitch = 8., 120., -1.
+        rotor.driver.workflow.run()
+        assert_rel_error(self, curve['Cp'][1], rotor.data.Cp, 1e-10)
+        assert_rel_error(self, curve['net_thrust'][1], rotor.data.net_thrust, 1e-10)
+
+    def test_geometry(self):
+        rotor = AutoBEM(6, engine="vector", spacing="cosine")
+        curve = rotor.power_curve([7., 7.], chord_hub=[.7, .65], twist_tip=[-3.58, -2.])
+
+        rotor.free_stream.V, rotor.chord_hub, rotor.twist_tip = 7., .65, -2.
+        rotor.driver.workflow.run()
+        assert_rel_error(self, curve['Cp'][1], rotor.data.Cp, 1e-10)
+        self.assertEqual(rotor.twist_hub, 29.)
+
+    def test_previous(self):
+        rotor = AutoBEM(6, engine="vector")
+        curve = rotor.power_curve([6., 8.])
+        warm = rotor.power_curve([6.5, 8.5], previous=curve['induction'])
+        cold = rotor.power_curve([6.5, 8.5])
+        np.testing.assert_allclose(warm['Cp'], cold['Cp'], rtol=1e-8)
+        self.assertEqual(warm['induction'].a.shape, (2, 6))
+
+    def test_default_density(self):
+        rotor = AutoBEM(6, engine="vector")
+        rotor.free_stream.rho = 1.1
+        curve = rotor.power_curve(7.)
+        rotor.free_stream.V = 7.
+        rotor.driver.workflow.run()
+        self.assertEqual(curve['net_power'].shape, (1,))
+        assert_rel_error(self, curve['net_power'][0], rotor.data.net_power, 1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
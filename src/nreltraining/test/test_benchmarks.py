@@ -0,0 +1,39 @@
+import time
+import unittest
+
+from nreltraining import benchmarks
+from nreltraining.benchmarks import benchmark, compare, run_benchmarks
+
+
+class BenchmarkTestCase(unittest.TestCase):
+
+    def test_run_and_compare(self):
+        results = run_benchmarks(['blade_element'], repeat=2)
+        self.assertEqual(results['blade_element']['repeat'], 2)
+        self.assertTrue('python' in results['_meta'])
+
+        baseline = {'blade_element': {'min': results['blade_element']['min']/2}}
+        self.assertEqual(compare(results, baseline, max_slowdown=3.), [])
+        self.assertEqual([name for name, ratio in compare(results, baseline, .5)],
+                         ['blade_element'])
+        self.assertEqual(compare(results, baseline, .5, {'blade_element': 3.}), [])
+
+    def test_teardown_not_timed(self):
+        torn_down = []
+
+        @benchmark('_teardown')
+        def setup():
+            func = lambda: None
+            func.teardown = lambda: (time.sleep(.1), torn_down.append(1))
+            return func
+
+        try:
+            results = run_benchmarks(['_teardown'], repeat=2)
+        finally:
+            del benchmarks._benchmarks['_teardown']
+        self.assertEqual(torn_down, [1, 1])
+        self.assertTrue(results['_teardown']['mean'] < .05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from openmdao.main.api import set_as_top
+
+from nreltraining.bem import AutoBEM
+from nreltraining.cache import EvaluationCache
+
+
+class CacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_lru(self):
+        cache = EvaluationCache(maxsize=2)
+        cache.put(cache.key([1., 2.]), 'a')
+        cache.put(cache.key([3., 4.]), 'b')
+        self.assertEqual(cache.get(cache.key([1., 2. + 1e-14])), 'a')
+        cache.put(cache.key([5., 6.]), 'c')
+
+        self.assertEqual(cache.get(cache.key([3., 4.])), None)  # evicted
+        self.assertEqual(cache.get(cache.key([1., 2.])), 'a')
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_shared_store(self):
+        store = {}
+        first, second = EvaluationCache(store=store), EvaluationCache(store=store)
+        first.put(first.key([1., 2.]), 'a')
+        self.assertEqual(second.get(second.key([1., 2.])), 'a')
+        self.assertEqual(second.stats()['disk_hits'], 1)
+        second.close()
+
+    def test_tolerance(self):
+        cache = EvaluationCache(tolerance=1e-6)
+        self.assertEqual(cache.key([1., 250.]), cache.key([1. + 1e-7, 250. - 2e-7]))
+        self.assertNotEqual(cache.key([1., 250.]), cache.key([1. + 1e-5, 250.]))
+
+    def test_autobem(self):
+        path = os.path.join(self.tempdir, 'bem_cache')
+        cache = EvaluationCache(path=path)
+        top = set_as_top(AutoBEM(engine="vector", cache=cache))
+        top.run()
+        Cp, rpm = top.data.Cp, top.rpm
+        evaluations = cache.stats()['misses']
+        self.assertTrue(evaluations > 1)  # every evaluation of the optimizer
+
+        # the same optimization again only finds cached evaluations
+        top = set_as_top(AutoBEM(engine="vector", cache=cache))
+        top.run()
+        self.assertEqual(cache.stats()['misses'], evaluations)
+        self.assertEqual(top.data.Cp, Cp)
+        self.assertEqual(top.rpm, rpm)
+        self.assertEqual(top.solver_counters().solves[False], 0)
+        cache.close()
+
+        # a new process starts warm from the persistent store
+        cache = EvaluationCache(path=path)
+        top = set_as_top(AutoBEM(engine="vector", cache=cache))
+        top.run()
+        self.assertEqual(cache.stats()['misses'], 0)
+        self.assertEqual(top.data.Cp, Cp)
+        self.assertEqual(top.solver_counters().solves[False], 0)
+        cache.close()
+
+    def test_autobem_outputs(self):
+        top = set_as_top(AutoBEM(engine="vector", cache=EvaluationCache()))
+        top.driver.workflow.run()
+        a, Cp = top.elements.a.copy(), top.perf.data.Cp
+
+        top.rpm = 90.
+        top.driver.workflow.run()
+        self.assertNotEqual(top.perf.data.Cp, Cp)
+
+        # a hit brings back the outputs of every component
+        top.rpm = 107.
+        top.driver.workflow.run()
+        self.assertEqual(top.cache.stats()['hits'], 1)
+        np.testing.assert_array_equal(top.elements.a, a)
+        self.assertEqual(top.perf.data.Cp, Cp)
+        self.assertEqual(top.data.Cp, Cp)
+        self.assertFalse('execute' in top.perf.__dict__)
+        # the hit is an execution too, the counters aren't rewound
+        self.assertEqual(top.perf.exec_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from nreltraining.case_index import CaseIndex
+from nreltraining.case_report import downsample, write_case_report
+
+
+def write_json_cases(path, n_cases):
+    """case file laid out the way JSONCaseRecorder writes it"""
+    with open(path, 'w') as f:
+        f.write('{\n"__length_0": 0\n, "simulation_info": %s'
+                % json.dumps({'constants': {'aDisc.Vu': 10.}}))
+        f.write('\n, "__length_1": 0\n, "driver_info_1": %s'
+                % json.dumps({'_id': 'id1', 'name': 'driver'}))
+        for i in range(n_cases):
+            case = {'_driver_id': 'id1', 'error_status': None,
+                    'data': {'aDisc.a': i/10., 'aDisc.Cp': i**2, 'v': [i, 2*i]}}
+            f.write('\n, "__length_%d": 0\n, "iteration_case_%d": %s'
+                    % (i + 2, i + 1, json.dumps(case, indent=4)))
+        f.write('\n}\n')
+
+
+class CaseIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'cases.json')
+        write_json_cases(self.path, 7)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_query(self):
+        cases = CaseIndex(self.path)
+
+        self.assertEqual(len(cases), 7)
+        self.assertEqual(cases.drivers, ['driver'])
+        self.assertEqual(sorted(cases.var_names()), ['aDisc.Cp', 'aDisc.a', 'v[0]', 'v[1]'])
+
+        data = cases.query(['aDisc.a', 'v'], 2, 5)
+        np.testing.assert_allclose(data['aDisc.a'], [.2, .3, .4])
+        np.testing.assert_array_equal(data['v'], [[2, 4], [3, 6], [4, 8]])
+        np.testing.assert_array_equal(cases.query(['aDisc.Cp'], driver='driver')['aDisc.Cp'],
+                                      np.arange(7)**2)
+        self.assertEqual(cases.iterations(0, 2), [('driver', 1), ('driver', 2)])
+        self.assertEqual(cases.case(3)['data']['aDisc.a'], .3)
+
+    def test_sidecar_reused_until_source_changes(self):
+        CaseIndex(self.path)
+        index_path = self.path + '.index'
+        os.utime(index_path, (1e9, 1e9))
+
+        CaseIndex(self.path)
+        self.assertEqual(os.stat(index_path).st_mtime, 1e9)
+
+        write_json_cases(self.path, 3)
+        self.assertEqual(len(CaseIndex(self.path)), 3)
+
+
+class CaseReportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'cases.json')
+        write_json_cases(self.path, 25)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_downsample_keeps_extremes(self):
+        values = np.zeros(1000)
+        values[617] = 5.
+        values[3] = -2.
+        first, low, high = downsample(values, 10)
+
+        self.assertEqual(len(first), 10)
+        self.assertEqual(first[6], 600)
+        self.assertEqual(high[6], 5.)
+        self.assertEqual(low[0], -2.)
+        self.assertEqual(len(downsample(values[:4], 10)[0]), 4)
+
+    def test_pages(self):
+        report = os.path.join(self.tempdir, 'report')
+        write_case_report(self.path, report, ['aDisc.a', 'aDisc.Cp'], page_size=10)
+
+        self.assertTrue(os.path.exists(os.path.join(report, 'index.html')))
+        self.assertEqual(sorted(os.listdir(os.path.join(report, 'pages'))),
+                         ['page_0.js', 'page_1.js', 'page_2.js'])
+        with open(os.path.join(report, 'pages', 'page_2.js')) as f:
+            text = f.read()
+        rows = json.loads(text[text.index('['):text.rindex(')')])
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0], [20, 'driver 21', 2., 400.])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from nreltraining.columnar_recorder import ColumnarCaseRecorder, ColumnarCaseReader
+
+
+class _Driver(object):
+
+    parent = None
+
+    def get_pathname(self):
+        return 'driver'
+
+
+class ColumnarRecorderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'cases.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def record(self, n_cases, close=True):
+        driver = _Driver()
+        recorder = ColumnarCaseRecorder(self.path, chunk_size=4)
+        recorder.register(driver, ['x'], ['y', 'z'])
+        recorder.startup()
+        recorder.record_constants([('c', 3.), ('name', 'rotor'), ('r', np.array([1., 2.]))])
+        for i in range(n_cases):
+            recorder.record(driver, [i], [i**2, np.array([i, -i])], None, '', '')
+        if close:
+            recorder.close()
+        return recorder
+
+    def test_round_trip(self):
+        self.record(10)
+        reader = ColumnarCaseReader(self.path)
+
+        self.assertEqual(len(reader), 10)
+        self.assertEqual(reader.var_names(), ['x', 'y', 'z[0]', 'z[1]'])
+        self.assertEqual(reader.constants, {'c': 3., 'name': 'rotor', 'r': [1., 2.]})
+        np.testing.assert_array_equal(reader.column('y'), np.arange(10)**2)
+        np.testing.assert_array_equal(reader.column('_iteration'), np.arange(1, 11))
+
+        data = reader.fetch(['x', 'z[1]'], 3, 9)
+        np.testing.assert_array_equal(data['x'], np.arange(3, 9))
+        np.testing.assert_array_equal(data['z[1]'], -np.arange(3, 9))
+
+    def test_readable_while_recording(self):
+        recorder = self.record(6, close=False)
+        reader = ColumnarCaseReader(self.path)
+        self.assertEqual(len(reader), 6)
+        np.testing.assert_array_equal(reader.column('x'), np.arange(6))
+        recorder.close()
+
+    def test_no_cases(self):
+        self.record(0)
+        reader = ColumnarCaseReader(self.path)
+        self.assertEqual(len(reader), 0)
+        self.assertEqual(len(reader.column('x')), 0)
+
+    def test_object_constant(self):
+        recorder = ColumnarCaseRecorder(self.path)
+        recorder.record_constants([('driver', _Driver())])
+        recorder.startup()
+        recorder.close()
+        self.assertTrue(ColumnarCaseReader(self.path).constants['driver'].startswith('<'))
+
+    def test_new_column(self):
+        recorder = self.record(2, close=False)
+        driver = recorder._drivers[0]
+        self.assertRaises(ValueError, recorder.record, driver, [2], [4, np.array([2, -2, 0])],
+                          None, '', '')
+        recorder.close()
+
+        # the rejected case left nothing behind
+        reader = ColumnarCaseReader(self.path)
+        self.assertEqual(len(reader), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
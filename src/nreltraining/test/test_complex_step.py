@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from nreltraining.actuator_disc_derivatives import ActuatorDisc
+from nreltraining.airfoil import default_polar
+from nreltraining.bem import BEMPerf, BladeElement
+from nreltraining.complex_step import ComplexStepActuatorDisc, compare_derivatives, \
+    finite_difference_jacobian
+from nreltraining.induction import induction_residual, solve_induction
+
+
+class ComplexStepTestCase(unittest.TestCase):
+
+    def test_polar(self):
+        polar = default_polar()
+        alpha = np.radians([3., 14., 25., 50.])
+        C_L, dC_L = polar.lift(alpha)
+        value = polar.lift(alpha + 1e-30j)[0]
+        np.testing.assert_allclose(value.real, C_L, rtol=1e-15)
+        np.testing.assert_allclose(value.imag/1e-30, dC_L, rtol=1e-12)
+
+    def test_induction(self):
+        # the imaginary parts of the solution are its derivatives
+        lambda_r = np.linspace(1., 8., 5)
+        real = solve_induction(lambda_r, .05, .3, default_polar().lift)
+        stepped = solve_induction(lambda_r + 1e-30j, .05, .3, default_polar().lift)
+        self.assertTrue(stepped.converged.all())
+        np.testing.assert_allclose(stepped.a.real, real.a, rtol=0, atol=1e-10)
+        self.assertTrue((stepped.iterations == real.iterations + 1).all())
+
+        R_a, R_b, dR = induction_residual(real.a, real.b, lambda_r, .05, .3, default_polar().lift)
+        det = dR['a', 'a']*dR['b', 'b'] - dR['a', 'b']*dR['b', 'a']
+        d_a = -(dR['b', 'b']*dR['a', 'lambda_r'] - dR['a', 'b']*dR['b', 'lambda_r'])/det
+        np.testing.assert_allclose(stepped.a.imag/1e-30, d_a, rtol=1e-8)
+
+    def test_actuator_disc(self):
+        comp, analytic = ComplexStepActuatorDisc(), ActuatorDisc()
+        for c in (comp, analytic):
+            c.a, c.Area, c.rho, c.Vu = .3, 12., 1.2, 9.
+            c.run()
+
+        # execute publishes the real parts of the same formulas
+        for name in comp.list_deriv_vars()[1]:
+            self.assertAlmostEqual(comp.get(name), analytic.get(name), places=12)
+            self.assertTrue(isinstance(comp.get(name), float))
+
+        J = comp.provideJ()
+        self.assertEqual(J.shape, (6, 4))
+        self.assertTrue(abs(J - analytic.provideJ()).max() <= 1e-14*abs(J).max())
+
+    def test_blade_element(self):
+        elem = BladeElement(complex_step=True)
+        elem.run()
+        analytic = BladeElement()
+        analytic.run()
+        J = elem.provideJ()
+        np.testing.assert_allclose(J, analytic.provideJ(), rtol=1e-9, atol=1e-12*abs(J).max())
+
+    def test_bem_perf(self):
+        perf, analytic = BEMPerf(8, complex_step=True), BEMPerf(8)
+        for comp in (perf, analytic):
+            comp.delta_Ct = np.linspace(.01, .05, 8)
+            comp.delta_Cp = np.linspace(.1, .5, 8)
+            comp.lambda_r = np.linspace(1., 8., 8)
+            comp.run()
+        J = perf.provideJ()
+        np.testing.assert_allclose(J, analytic.provideJ(), rtol=1e-12, atol=1e-14*abs(J).max())
+
+    def test_compare_derivatives(self):
+        elem = BladeElement()
+        elem.run()
+        rows = dict((method, (evaluations, error)) for method, evaluations, error
+                    in compare_derivatives(elem, elem.provideJ(), steps=(1e-6,)))
+        self.assertEqual([rows[m][0] for m in ('forward 1e-06', 'central 1e-06', 'complex step')],
+                         [8, 14, 7])
+        self.assertTrue(rows['complex step'][1] < 1e-10)
+        self.assertTrue(rows['complex step'][1] < rows['central 1e-06'][1] < rows['forward 1e-06'][1])
+
+        # the finite differences leave the component as it was
+        J = finite_difference_jacobian(elem, "central")
+        self.assertEqual(elem.rpm, BladeElement().rpm)
+        np.testing.assert_allclose(J, elem.provideJ(), rtol=1e-5, atol=1e-8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+
+from openmdao.main.api import set_as_top
+from openmdao.util.testutil import assert_rel_error
+
+from nreltraining.airfoil import default_polar
+from nreltraining.bem import AutoBEM
+from nreltraining.induction import induction_residual, solve_induction
+
+
+class InductionSolverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.lift = default_polar().lift
+        self.lambda_r = np.linspace(1., 9., 7)
+        self.sigma = np.linspace(.08, .02, 7)
+        self.twist = np.linspace(.4, -.05, 7)
+
+    def test_converged_residual(self):
+        sol = solve_induction(self.lambda_r, self.sigma, self.twist, self.lift)
+
+        self.assertTrue(sol.converged.all())
+        self.assertTrue((sol.iterations > 0).all())
+        R_a, R_b, dR = induction_residual(sol.a, sol.b, self.lambda_r, self.sigma,
+                                          self.twist, self.lift)
+        self.assertTrue(np.abs(R_a).max() < 1e-10)
+        self.assertTrue(np.abs(R_b).max() < 1e-10)
+
+    def test_jacobian(self):
+        a, b = .2*np.ones(7), .01*np.ones(7)
+        R_a, R_b, dR = induction_residual(a, b, self.lambda_r, self.sigma, self.twist, self.lift)
+
+        h = 1e-7
+        R_a2, R_b2, _ = induction_residual(a + h, b, self.lambda_r, self.sigma, self.twist, self.lift)
+        np.testing.assert_allclose((R_a2 - R_a)/h, dR['a', 'a'], rtol=1e-5)
+        np.testing.assert_allclose((R_b2 - R_b)/h, dR['b', 'a'], rtol=1e-5)
+
+        R_a2, R_b2, _ = induction_residual(a, b + h, self.lambda_r, self.sigma, self.twist, self.lift)
+        np.testing.assert_allclose((R_a2 - R_a)/h, dR['a', 'b'], rtol=1e-5)
+        np.testing.assert_allclose((R_b2 - R_b)/h, dR['b', 'b'], rtol=1e-5)
+
+    def test_broadcast(self):
+        sol = solve_induction(self.lambda_r[None, :], self.sigma, self.twist[:, None], self.lift)
+        self.assertEqual(sol.a.shape, (7, 7))
+        self.assertEqual(sol.iterations.shape, (7, 7))
+
+
+class WarmStartTestCase(unittest.TestCase):
+
+    def _sweep(self, warm_start):
+        top = set_as_top(AutoBEM(20, engine="vector"))
+        top.warm_start = warm_start
+        for rpm in np.linspace(100, 110, 11):
+            top.rpm = rpm
+            top.driver.workflow.run()
+        return top
+
+    def test_fewer_iterations(self):
+        cold = self._sweep(False)
+        warm = self._sweep(True)
+
+        assert_rel_error(self, warm.data.Cp, cold.data.Cp, 1e-8)
+        counters = warm.solver_counters()
+        self.assertTrue(counters.solves[True] > 0)
+        self.assertTrue(counters.mean_iterations(True) < cold.solver_counters().mean_iterations(False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from openmdao.util.testutil import assert_rel_error
+
+from nreltraining.bem import AutoBEM
+from nreltraining.multifidelity import FidelityCorrection, correction_factors, corrected_rotor, \
+    multifidelity_optimize
+
+
+class MultiFidelityTestCase(unittest.TestCase):
+
+    def test_correction(self):
+        comp = FidelityCorrection()
+        comp.Cp, comp.scale, comp.shift = .4, 1.1, .01
+        comp.run()
+        assert_rel_error(self, comp.corrected_Cp, .45, 1e-12)
+
+        self.assertEqual(correction_factors("additive", .4, .3), (1., .4 - .3))
+        self.assertEqual(correction_factors("multiplicative", .4, .2), (2., 0.))
+        # a ratio to a coarse Cp that isn't positive is meaningless
+        self.assertEqual(correction_factors("multiplicative", .4, 0.), (1., .4))
+        self.assertEqual(correction_factors("multiplicative", .4, -.1), (1., .5))
+
+    def test_bad_correction(self):
+        self.assertRaises(ValueError, multifidelity_optimize, AutoBEM(6, engine="vector"),
+                          correction="spam")
+
+    def test_optimize(self):
+        fine = AutoBEM(20, engine="vector")
+        fine.driver.workflow.run()
+        start = fine.data.Cp
+
+        result = multifidelity_optimize(fine, corrected_rotor(6), max_rounds=3)
+        self.assertTrue(result['Cp'] > start)
+        self.assertTrue(result['Cp'] < 16/27.)
+        self.assertEqual(result['fine_evaluations'], len(result['history']) + 2)
+        self.assertTrue(result['coarse_evaluations'] > result['fine_evaluations'])
+        assert_rel_error(self, fine.data.Cp, result['Cp'], 1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
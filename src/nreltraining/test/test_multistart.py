@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from nreltraining.bem import AutoBEM
+from nreltraining.multistart import latin_hypercube, multistart_optimize, rank_optima
+
+
+class MultiStartTestCase(unittest.TestCase):
+
+    def test_latin_hypercube(self):
+        points = latin_hypercube(10, 3, seed=1)
+        self.assertEqual(points.shape, (10, 3))
+        for j in range(3):
+            self.assertEqual(sorted((points[:, j]*10).astype(int)), range(10))
+
+    def test_duplicates(self):
+        # every design is within the radius of the first optimum found
+        optima, runs = multistart_optimize(AutoBEM(6, engine="vector"), n_starts=3, n_workers=1,
+                                           seed=0, radius=1., maxiter=100)
+        self.assertEqual([run['status'] for run in runs], ['converged', 'duplicate', 'duplicate'])
+        self.assertEqual(len(optima), 1)
+        self.assertEqual(optima[0]['runs'], 3)
+        self.assertEqual(optima[0]['objective'], runs[0]['objective'])
+        self.assertTrue(runs[1]['evaluations'] < runs[0]['evaluations'])
+
+    def test_parallel(self):
+        # two iterations are too few to converge
+        optima, runs = multistart_optimize(AutoBEM(6, engine="vector"), n_starts=2, n_workers=2,
+                                           seed=0, maxiter=2)
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(optima, [])
+        for run in runs:
+            self.assertFalse(run['status'] in ('converged', 'duplicate'))
+            self.assertTrue(run['evaluations'] > 0)
+            self.assertTrue(20 <= run['design'][4] <= 300)  # rpm within its bounds
+
+    def test_rank_optima(self):
+        low, high = np.zeros(2), np.ones(2)
+        runs = [{'design': np.array([.5, .5]), 'objective': .3, 'status': 'converged'},
+                {'design': np.array([.1, .1]), 'objective': .4, 'status': 'Iteration limit exceeded'},
+                {'design': np.array([.505, .5]), 'objective': .3, 'status': 'duplicate'},
+                {'design': np.array([.9, .9]), 'objective': .2, 'status': 'converged'}]
+        optima = rank_optima(runs, ['x', 'y'], low, high)
+        self.assertEqual([(o['objective'], o['runs']) for o in optima], [(.3, 2), (.2, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
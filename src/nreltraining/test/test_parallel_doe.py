@@ -0,0 +1,112 @@
+import unittest
+
+import numpy as np
+
+from openmdao.main.api import Assembly, set_as_top
+from openmdao.lib.doegenerators.api import FullFactorial
+from openmdao.lib.drivers.api import DOEdriver
+
+from nreltraining.bem import AutoBEM
+from nreltraining.parallel_doe import ParallelDOEdriver
+
+
+class _MemoryRecorder(object):
+    """keeps (driver, inputs, outputs) of every recorded case"""
+
+    def __init__(self):
+        self.cases = []
+
+    def startup(self):
+        pass
+
+    def register(self, driver, inputs, outputs):
+        pass
+
+    def record_constants(self, constants):
+        pass
+
+    def record(self, driver, inputs, outputs, exc, case_uuid, parent_uuid):
+        self.cases.append((driver.get_pathname(), list(inputs), list(outputs)))
+
+    def close(self):
+        pass
+
+
+def _model(driver=None, stateless=True):
+    """a DOE over the starting point of an AutoBEM rotor optimization, run by
+    a stock DOEdriver unless another `driver` is given"""
+    top = set_as_top(Assembly())
+    top.add('b', AutoBEM(engine="vector"))
+    if stateless:
+        # the DOE sets every design variable, so no case depends on the last one
+        top.b.driver.clear_parameters()
+        top.b.driver.add_parameter('chord_hub', low=.1, high=2)
+        top.b.driver.add_parameter('rpm', low=20, high=300)
+        top.b.driver.maxiter = 5
+    top.add('driver', driver if driver is not None else DOEdriver())
+    top.driver.workflow.add('b')
+    top.driver.DOEgenerator = FullFactorial(2)
+    top.driver.add_parameter('b.chord_hub', low=.1, high=2)
+    top.driver.add_parameter('b.rpm', low=20, high=300)
+    top.driver.add_response('b.data.Cp')
+    top.driver.add_response('b.data.Ct')
+    top.driver.add_response('b.r_tip')
+    return top
+
+
+def _stateful_model():
+    return _model(stateless=False)
+
+
+class ParallelDOETestCase(unittest.TestCase):
+
+    def _run(self, top):
+        recorder = _MemoryRecorder()
+        top.recorders = [recorder]
+        top.run()
+        return recorder.cases
+
+    def test_matches_serial(self):
+        serial = _model()
+        serial_cases = self._run(serial)
+        self.assertEqual(len([case for case in serial_cases if case[0] == 'driver']), 4)
+        self.assertTrue(len(serial_cases) > 4)  # and the iterations of the optimizer
+
+        # forked workers, and one worker built by a factory
+        for n_workers, factory in ((2, None), (1, _model)):
+            driver = ParallelDOEdriver(factory)
+            driver.n_workers = n_workers
+            parallel = _model(driver)
+
+            self.assertEqual(self._run(parallel), serial_cases)
+            self.assertEqual(parallel.b.rpm, serial.b.rpm)
+            self.assertEqual(parallel.b.data.Cp, serial.b.data.Cp)
+            np.testing.assert_array_equal(parallel.b.perf.data.Cp, serial.b.perf.data.Cp)
+            for path in ('b', 'b.driver', 'b.perf', 'b.elements'):
+                self.assertEqual(parallel.get(path).exec_count, serial.get(path).exec_count)
+            self.assertFalse('execute' in parallel.b.__dict__)
+
+    def test_cases_start_from_the_initial_model(self):
+        # AutoBEM's own optimizer moves r_tip and the rest of the design, so
+        # a stock DOEdriver would start every case from the last one's optimum
+        runs = []
+        for n_workers, factory in ((2, None), (1, _stateful_model)):
+            driver = ParallelDOEdriver(factory)
+            driver.n_workers = n_workers
+            runs.append([case for case in self._run(_model(driver, stateless=False))
+                         if case[0] == 'driver'])
+        self.assertEqual(len(runs[0]), 4)
+        self.assertEqual(runs[0], runs[1])
+
+        # the optimizer moves chord_hub and rpm too, so the recorded inputs
+        # aren't the case's
+        cases = list(_model(stateless=False).driver._get_cases())
+        for values, (path, inputs, outputs) in zip(cases, runs[0]):
+            rotor = AutoBEM(engine="vector")
+            rotor.chord_hub, rotor.rpm = values
+            rotor.run()
+            self.assertEqual(outputs, [rotor.data.Cp, rotor.data.Ct, rotor.r_tip])
+
+
+if __name__ == '__main__':
+    unittest.main()
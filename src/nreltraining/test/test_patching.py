@@ -0,0 +1,41 @@
+import unittest
+
+from nreltraining.patching import patch, unpatch
+
+
+class _Thing(object):
+
+    def value(self):
+        return 1
+
+
+def _add(n):
+    return lambda method: lambda: method() + n
+
+
+class PatchingTestCase(unittest.TestCase):
+
+    def test_stack(self):
+        thing = _Thing()
+        first = patch(thing, 'value', _add(10))
+        second = patch(thing, 'value', _add(100))
+        self.assertEqual(thing.value(), 111)
+
+        # out of order, the later patch stays in place
+        unpatch(first)
+        self.assertEqual(thing.value(), 101)
+        unpatch(second)
+        self.assertEqual(thing.value(), 1)
+        self.assertFalse('value' in thing.__dict__)
+
+    def test_instance_method(self):
+        thing = _Thing()
+        thing.value = lambda: 2
+        key = patch(thing, 'value', _add(10))
+        self.assertEqual(thing.value(), 12)
+        unpatch(key)
+        self.assertEqual(thing.value(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from openmdao.util.testutil import assert_rel_error
+
+from nreltraining.bem import AutoBEM
+from nreltraining.perf_surface import PerformanceSurface
+
+
+class PerformanceSurfaceTestCase(unittest.TestCase):
+
+    def test_bilinear(self):
+        tsr = np.linspace(2, 10, 5)
+        pitch = np.linspace(-5, 5, 3)
+        T, P = np.meshgrid(tsr, pitch, indexing='ij')
+        surface = PerformanceSurface(tsr, pitch, 1 + 2*T - P + .5*T*P, T*P,
+                                     converged=T*P != 10.)
+        self.assertEqual(surface.unconverged_nodes, 1)
+
+        t = np.array([2., 3.3, 9.9, 7.])
+        p = np.array([-5., 0.7, 4.2, -1.])
+        Cp, Ct = surface(t, p)
+        np.testing.assert_allclose(Cp, 1 + 2*t - p + .5*t*p)
+
+        # clamped to the grid
+        Cp, Ct = surface(20., 10.)
+        assert_rel_error(self, Ct, 50., 1e-12)
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'surface.npz')
+            surface.save(path)
+            loaded = PerformanceSurface.load(path)
+            np.testing.assert_array_equal(loaded.Cp, surface.Cp)
+            self.assertEqual(loaded.error, None)
+            np.testing.assert_array_equal(loaded.converged, surface.converged)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_generate(self):
+        rotor = AutoBEM(6, engine="vector")
+        rotor.rpm = 80.
+        surface = PerformanceSurface.generate(rotor, [5., 6., 7.], [0., 2.], check=3)
+
+        self.assertEqual(rotor.rpm, 80.)
+        self.assertEqual(len(surface.error), 2)
+        self.assertEqual(surface.unconverged, 0)
+        self.assertEqual(surface.converged.shape, (3, 2))
+        self.assertEqual(surface.unconverged_nodes, 0)
+
+        # grid points reproduce direct runs exactly
+        rotor.pitch = 2.
+        rotor.rpm = 6.*7./rotor.r_tip*60/(2*np.pi)
+        rotor.driver.workflow.run()
+        Cp, Ct = surface(6., 2.)
+        assert_rel_error(self, Cp, rotor.perf.data.Cp, 1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
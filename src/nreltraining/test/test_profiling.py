@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from nreltraining.bem import AutoBEM
+from nreltraining.cache import EvaluationCache
+from nreltraining.profiling import Profiler
+
+
+class ProfilerTestCase(unittest.TestCase):
+
+    def test_stats(self):
+        rotor = AutoBEM(3)
+        with Profiler(rotor) as prof:
+            rotor.driver.workflow.run()
+            rotor.driver.workflow.calc_gradient(['rpm'], ['perf.data.Cp'])
+            rotor.BE0.provideJ()
+
+        stats = prof.component_stats()
+        self.assertEqual(stats['BE1']['calls'], stats['BE1']['fd_calls'] + 1)
+        self.assertTrue(stats['BE1']['fd_calls'] > 0)
+        self.assertEqual(stats['BE0']['provideJ_calls'], 1)
+        self.assertEqual(stats['perf']['solver_iterations'], 0)
+        self.assertTrue(stats['BE2']['solver_iterations'] > 0)
+        self.assertTrue(stats['BE2']['time'] >= stats['BE2']['self_time'] > 0)
+
+        # the instrumentation is removed again
+        self.assertFalse('execute' in rotor.BE0.__dict__)
+        rotor.driver.workflow.run()
+        self.assertEqual(prof.component_stats()['BE1']['calls'], stats['BE1']['calls'])
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'profile.folded')
+            prof.save_collapsed(path)
+            with open(path) as f:
+                stacks = dict(line.rsplit(' ', 1) for line in f)
+            self.assertTrue(any(stack.endswith(';BE1') for stack in stacks))
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_cached_model(self):
+        rotor = AutoBEM(engine="vector", cache=EvaluationCache())
+        with Profiler(rotor) as prof:
+            rotor.driver.workflow.run()
+            rotor.driver.workflow.run()  # replayed by the cache
+            rotor.rpm = 90.
+            rotor.driver.workflow.run()
+            self.assertEqual(rotor.cache.stats()['hits'], 1)
+
+        # the replayed run doesn't execute, and neither patch outlives the other
+        self.assertEqual(prof.component_stats()['perf']['calls'], 2)
+        self.assertFalse('execute' in rotor.perf.__dict__)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from openmdao.util.testutil import assert_rel_error
+
+from nreltraining.bem import AutoBEM
+from nreltraining.radial_refinement import interval_errors, refine_stations
+
+
+class RadialRefinementTestCase(unittest.TestCase):
+
+    def test_interval_errors(self):
+        x = np.array([0., 1., 2., 3.])
+        self.assertTrue(np.allclose(interval_errors(x, 2*x + 1), 0.))
+        # y = x**2 has y'' = 2 everywhere, the trapezoidal error is h**3/6
+        self.assertTrue(np.allclose(interval_errors(x, x**2), 1/6.))
+
+    def test_interval_errors_unconverged(self):
+        x = np.array([0., 1., 2., 3.])
+        y = np.array([0., 0., 4., 4.])
+        errors = interval_errors(x, y, converged=[True, True, False, True])
+        self.assertEqual(errors[1], 2.)  # h*|dy|/2
+
+    def test_refine(self):
+        template = AutoBEM(4001, engine="vector")
+        V = [template.free_stream.V]
+        reference = template.power_curve(V)['Cp'][0]
+
+        rotor, history = refine_stations(template, tol=3e-4)
+        n, Cp, error, unconverged = history[-1]
+        self.assertEqual(rotor._n_elements, n)
+        self.assertTrue(error <= 3e-4)
+        self.assertTrue(abs(Cp - reference) <= 3e-4)
+
+        # one solve per station; even spacing with twice as many stations
+        # doesn't reliably get as close
+        self.assertTrue(n < 100)
+        even = [abs(AutoBEM(m, engine="vector").power_curve(V)['Cp'][0] - reference)
+                for m in range(n, 2*n, 5)]
+        self.assertTrue(max(even) > abs(Cp - reference))
+
+        rotor.driver.workflow.run()
+        assert_rel_error(self, rotor.data.Cp, Cp, 1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+
+from nreltraining.bem import AutoBEM
+from nreltraining.scheduling import optimal_schedule, sequential_schedule
+
+
+class ScheduleTestCase(unittest.TestCase):
+
+    def test_schedule(self):
+        rotor = AutoBEM(6, engine="vector")
+        V = np.array([6., 8.])
+        design = rotor.power_curve(V)
+        rpm, pitch = rotor.rpm, rotor.pitch
+
+        batched = optimal_schedule(rotor, V)
+        self.assertEqual((rotor.rpm, rotor.pitch), (rpm, pitch))
+        self.assertTrue(batched['converged'].all())
+        self.assertTrue((batched['Cp'] >= design['Cp'][design['converged']] - 1e-8).all())
+        curve = rotor.power_curve(V, rpm=batched['rpm'], pitch=batched['pitch'])
+        np.testing.assert_allclose(curve['net_power'], batched['net_power'], rtol=1e-10)
+
+        sequential = sequential_schedule(rotor, V, maxiter=30)
+        self.assertEqual((rotor.rpm, rotor.pitch), (rpm, pitch))
+
+        # no converged point nearby does better
+        for d_rpm, d_pitch in ((.1, 0.), (-.1, 0.), (0., .01), (0., -.01)):
+            curve = rotor.power_curve(V, rpm=batched['rpm'] + d_rpm,
+                                      pitch=batched['pitch'] + d_pitch)
+            converged = curve['converged']
+            self.assertTrue((curve['Cp'][converged] <= batched['Cp'][converged] + 1e-8).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from openmdao.util.testutil import assert_rel_error
+
+from nreltraining.bem import AutoBEM
+from nreltraining.uq import Normal, RunningStatistics, Uniform, monte_carlo, sobol
+
+
+class UncertaintyTestCase(unittest.TestCase):
+
+    def test_sobol(self):
+        points = sobol(8, 2)
+        np.testing.assert_array_equal(points[:, 1], [0, .5, .25, .75, .375, .875, .125, .625])
+        np.testing.assert_array_equal(sobol(4, 3, start=4), sobol(8, 3)[4:])
+
+        # 16 scrambled points put one in each sixteenth of every dimension,
+        # and one in each cell of a 4x4 grid over the first two
+        points = sobol(16, 13, seed=1)
+        for j in range(13):
+            self.assertEqual(len(set(np.floor(points[:, j]*16))), 16)
+        cells = np.floor(points*4).astype(int)
+        self.assertEqual(len(set(zip(cells[:, 0], cells[:, 1]))), 16)
+
+    def test_running_statistics(self):
+        values = np.random.RandomState(0).randn(5000)*2. + 1.
+        stats = RunningStatistics(quantiles=(.1, .5, .9), bins=20)
+        for batch in np.array_split(values, 13):
+            stats.update(batch)
+
+        assert_rel_error(self, stats.mean, values.mean(), 1e-12)
+        assert_rel_error(self, stats.variance, values.var(ddof=1), 1e-12)
+        for quantile in stats.quantiles:
+            self.assertAlmostEqual(quantile.value, np.percentile(values, 100*quantile.p), delta=.05)
+        self.assertEqual(stats.histogram.counts.sum() + stats.histogram.underflow
+                         + stats.histogram.overflow, 5000)
+
+    def test_monte_carlo(self):
+        rotor = AutoBEM(6, engine="vector")
+        uncertain = {'free_stream.V': Uniform(9., 11.), 'chord_tip': Normal(.187, .005),
+                     'twist_hub': Normal(29., .5)}
+        result = monte_carlo(rotor, uncertain, batch_size=64, max_samples=256, seed=0)
+        self.assertEqual((result['samples'], result['batches']), (256, 4))
+        self.assertFalse(result['stopped'])
+        self.assertEqual(result['Cp']['count'], 256)
+        self.assertTrue(result['net_power']['quantiles'][.05] < result['net_power']['mean']
+                        < result['net_power']['quantiles'][.95])
+
+        # without any spread every sample is the design
+        fixed = dict((name, Normal(rotor.get(name), 0.)) for name in uncertain)
+        result = monte_carlo(rotor, fixed, batch_size=16, max_samples=32, seed=0)
+        assert_rel_error(self, result['Cp']['mean'], rotor.power_curve(rotor.free_stream.V)['Cp'][0], 1e-12)
+
+        # a wide enough target stops after the first batch
+        result = monte_carlo(rotor, uncertain, sampler="lhs", batch_size=64, seed=0,
+                             ci_width={'Cp': 1.})
+        self.assertTrue(result['stopped'])
+        self.assertEqual(result['samples'], 64)
+
+        self.assertRaises(ValueError, monte_carlo, rotor, {'r_tip': Normal(5., .1)})
+
+    def test_unseeded_sobol(self):
+        # without a seed the sequence is still scrambled, so the first
+        # sample isn't the clipped tail of the normal distribution
+        rotor = AutoBEM(6, engine="vector")
+        result = monte_carlo(rotor, {'free_stream.V': Normal(10., 1.)}, batch_size=1, max_samples=1)
+        self.assertTrue(result['net_power']['min'] > rotor.power_curve(5.)['net_power'][0])
+
+    def test_geometry_samples(self):
+        rotor = AutoBEM(6, engine="vector")
+        uncertain = {'chord_hub': Normal(.7, .02), 'twist_tip': Normal(-3.58, 1.),
+                     'rpm': Uniform(90., 120.)}
+        result = monte_carlo(rotor, uncertain, batch_size=1, max_samples=1, seed=3)
+
+        u = sobol(1, 3, seed=3)[0]
+        for j, name in enumerate(sorted(uncertain)):
+            rotor.set(name, uncertain[name].ppf(u[j]))
+        rotor.driver.workflow.run()
+        assert_rel_error(self, result['Cp']['mean'], rotor.data.Cp, 1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from openmdao.util.testutil import assert_rel_error
+
+from nreltraining.windfarm import WindFarm, grid_layout, _overlap_fraction
+
+
+class WindFarmTestCase(unittest.TestCase):
+
+    def farm(self, x, y, search="index", **inputs):
+        farm = WindFarm(len(x), search)
+        farm.x, farm.y = np.array(x, dtype=float), np.array(y, dtype=float)
+        for name, value in inputs.items():
+            setattr(farm, name, value)
+        farm.run()
+        return farm
+
+    def test_single_turbine(self):
+        farm = self.farm([0.], [0.], a=1./3)
+        assert_rel_error(self, farm.power[0], .5*1.225*np.pi*40.**2*10.**3*16./27, 1e-12)
+        assert_rel_error(self, farm.efficiency, 1., 1e-12)
+
+    def test_wake(self):
+        # wind from the west, so the turbine at x=500 is in the wake
+        farm = self.farm([0., 500., 0.], [0., 0., 2000.])
+        self.assertEqual(farm.n_pairs, 1)
+        deficit = 2*.25*(40./(40. + .075*500))**2
+        assert_rel_error(self, farm.V[1], 10.*(1 - deficit), 1e-12)
+        assert_rel_error(self, farm.V[0], 10., 1e-12)
+        assert_rel_error(self, farm.V[2], 10., 1e-12)
+
+        # the same layout turned with the wind
+        turned = self.farm([0., 0., 2000.], [0., -500., 0.], wind_direction=0.)
+        assert_rel_error(self, turned.V[1], farm.V[1], 1e-12)
+
+    def test_no_wake_decay(self):
+        # the wake keeps the rotor's radius and deficit all the way down
+        farm = self.farm([0., 5000.], [0., 0.], wake_decay=0.)
+        self.assertEqual(farm.n_pairs, 1)
+        self.assertTrue(isinstance(farm.n_pairs, int))
+        assert_rel_error(self, farm.V[1], 10.*(1 - 2*.25), 1e-12)
+
+    def test_search_matches_all_pairs(self):
+        rng = np.random.RandomState(0)
+        x, y = rng.rand(2, 300)*6000.
+        index = self.farm(x, y, wind_direction=250.)
+        every = self.farm(x, y, "all", wind_direction=250.)
+        self.assertTrue(index.n_pairs > 0)
+        self.assertEqual(index.n_pairs, every.n_pairs)
+        self.assertTrue(np.allclose(index.V, every.V, rtol=1e-14, atol=0))
+        assert_rel_error(self, index.total_power, every.total_power, 1e-12)
+
+    def test_grid_layout(self):
+        x, y = grid_layout(10, 300.)
+        self.assertEqual(x.max(), 3*300.)
+        self.assertEqual(y.max(), 2*300.)
+
+    def test_overlap_fraction(self):
+        fraction = _overlap_fraction(np.array([0., 100., 40., 50.]), np.array([60., 60., 60., 40.]), 40.)
+        self.assertEqual(fraction[0], 1.)
+        self.assertEqual(fraction[1], 0.)
+        self.assertTrue(0 < fraction[2] < 1)
+        self.assertTrue(0 < fraction[3] < fraction[2])
+
+    def test_bad_search(self):
+        self.assertRaises(ValueError, WindFarm, 10, "kd")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,351 @@
+"""Monte Carlo propagation of input uncertainty through an AutoBEM rotor.
+
+:func:`monte_carlo` draws samples of uncertain inputs (wind speed, air
+density, rpm, pitch and the chord and twist at hub and tip) from a
+scrambled Sobol sequence or from Latin hypercubes, and evaluates them a
+batch at a time. Every batch is one call of AutoBEM.power_curve, which
+takes a value of each of those inputs per sample and solves the induction
+equations of all the (sample, station) pairs together; no workflow runs
+are needed.
+
+Samples are not kept. Every output keeps a :class:`RunningStatistics`:
+the mean and variance, merged batch by batch with Welford's update, P**2
+estimates of a few quantiles, which need five numbers each, and a
+histogram with fixed bins. Sampling stops at `max_samples`, or earlier
+once the confidence interval of every mean listed in `ci_width` is
+narrower than its target.
+"""
+
+from math import sqrt
+
+import numpy as np
+
+from multistart import latin_hypercube
+
+
+# Joe and Kuo's direction numbers (new-joe-kuo-6.21201) as (s, a, m) for
+# dimensions 2 and up; the first dimension is the van der Corput sequence
+_SOBOL_DIRECTIONS = [
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+]
+
+_SOBOL_BITS = 32
+
+
+def _sobol_directions(n_dims):
+    """(n_dims, bits) direction integers"""
+    if n_dims > len(_SOBOL_DIRECTIONS) + 1:
+        raise ValueError("sobol sampling supports up to %d dimensions, not %d"
+                         % (len(_SOBOL_DIRECTIONS) + 1, n_dims))
+    L = _SOBOL_BITS
+    V = np.zeros((n_dims, L), dtype=np.uint64)
+    V[0] = [1 << (L - 1 - i) for i in range(L)]
+    for d in range(1, n_dims):
+        s, a, m = _SOBOL_DIRECTIONS[d - 1]
+        v = [m[i] << (L - 1 - i) for i in range(s)]
+        for i in range(s, L):
+            value = v[i - s] ^ (v[i - s] >> s)
+            for k in range(1, s):
+                value ^= ((a >> (s - 1 - k)) & 1)*v[i - k]
+            v.append(value)
+        V[d] = v
+    return V
+
+
+def sobol(n, n_dims, start=0, seed=None):
+    """Points `start` to `start` + `n` of the `n_dims` dimensional Sobol
+    sequence. With a `seed`, every dimension is scrambled by a random
+    digital shift, which keeps the sequence's even spread but makes
+    estimates from it unbiased."""
+    V = _sobol_directions(n_dims)
+    index = np.arange(start, start + n, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+
+    X = np.zeros((n, n_dims), dtype=np.uint64)
+    for j in range(_SOBOL_BITS):
+        bit = ((gray >> np.uint64(j)) & np.uint64(1)).astype(bool)
+        X[bit] ^= V[:, j]
+
+    if seed is not None:
+        rng = np.random.RandomState(seed)
+        X ^= rng.randint(0, 2**_SOBOL_BITS, n_dims).astype(np.uint64)
+    return X.astype(float)/2.**_SOBOL_BITS
+
+
+class Normal(object):
+    """normal distribution of an uncertain input"""
+
+    def __init__(self, mean, std):
+        self.mean, self.std = mean, std
+
+    def ppf(self, u):
+        from scipy.special import ndtri
+        # keep the unit cube's 0 off minus infinity
+        return self.mean + self.std*ndtri(np.clip(u, 1e-12, 1 - 1e-12))
+
+
+class Uniform(object):
+    """uniform distribution of an uncertain input"""
+
+    def __init__(self, low, high):
+        self.low, self.high = low, high
+
+    def ppf(self, u):
+        return self.low + u*(self.high - self.low)
+
+
+class P2Quantile(object):
+    """Jain and Chlamtac's P**2 estimate of the `p` quantile of a stream,
+    kept in five markers"""
+
+    def __init__(self, p):
+        self.p = p
+        self._heights = []
+        self._positions = np.arange(1., 6.)
+        self._desired = np.array([1., 1 + 2*p, 1 + 4*p, 3 + 2*p, 5.])
+        self._increments = np.array([0., p/2, p, (1 + p)/2, 1.])
+
+    def add(self, x):
+        q = self._heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self._positions
+        n[k + 1:] += 1
+        self._desired += self._increments
+
+        # move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1. if d > 0 else -1.
+                parabolic = q[i] + d/(n[i + 1] - n[i - 1])*(
+                    (n[i] - n[i - 1] + d)*(q[i + 1] - q[i])/(n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d)*(q[i] - q[i - 1])/(n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    j = i + int(d)
+                    q[i] += d*(q[j] - q[i])/(n[j] - n[i])
+                n[i] += d
+
+    def update(self, values):
+        for x in np.ravel(values):
+            self.add(float(x))
+
+    @property
+    def value(self):
+        q = self._heights
+        if not q:
+            return np.nan
+        if len(q) < 5:
+            return float(np.percentile(q, 100*self.p))
+        return q[2]
+
+
+class Histogram(object):
+    """Counts of a stream in `n_bins` fixed bins. Without `edges`, the bins
+    span the range of the first batch widened by half of it on each side;
+    values outside the bins are counted as under or overflow."""
+
+    def __init__(self, n_bins=50, edges=None):
+        self.n_bins = n_bins
+        self.edges = None if edges is None else np.asarray(edges, dtype=float)
+        self.counts = None if edges is None else np.zeros(len(edges) - 1, dtype=int)
+        self.underflow = self.overflow = 0
+
+    def update(self, values):
+        values = np.ravel(values)
+        if self.edges is None:
+            low, high = values.min(), values.max()
+            pad = .5*(high - low) or .5*abs(low) or 1.
+            self.edges = np.linspace(low - pad, high + pad, self.n_bins + 1)
+            self.counts = np.zeros(self.n_bins, dtype=int)
+        self.counts += np.histogram(values, self.edges)[0]
+        self.underflow += int((values < self.edges[0]).sum())
+        self.overflow += int((values > self.edges[-1]).sum())
+
+
+class RunningStatistics(object):
+    """Mean, variance, quantiles and histogram of a stream of values,
+    updated a batch at a time"""
+
+    def __init__(self, quantiles=(.05, .5, .95), bins=50):
+        self.count = 0
+        self.mean = 0.
+        self._m2 = 0.
+        self.min, self.max = np.inf, -np.inf
+        self.quantiles = [P2Quantile(p) for p in quantiles]
+        self.histogram = Histogram(bins)
+
+    def update(self, values):
+        values = np.ravel(np.asarray(values, dtype=float))
+        n = len(values)
+        if not n:
+            return
+
+        # Welford's update, for a whole batch at once
+        mean = values.mean()
+        m2 = ((values - mean)**2).sum()
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta*n/total
+        self._m2 += m2 + delta**2*self.count*n/total
+        self.count = total
+
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        for quantile in self.quantiles:
+            quantile.update(values)
+        self.histogram.update(values)
+
+    @property
+    def variance(self):
+        return self._m2/(self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return sqrt(self.variance) if self.count > 1 else np.nan
+
+    def interval_width(self, confidence=.95):
+        """width of the normal confidence interval of the mean, treating
+        the samples as independent (for Sobol samples this overstates it)"""
+        from scipy.special import ndtri
+        if self.count < 2:
+            return np.inf
+        return 2*ndtri(.5 + confidence/2)*self.std/sqrt(self.count)
+
+    def summary(self, confidence=.95):
+        return {'count': self.count, 'mean': self.mean, 'std': self.std,
+                'min': self.min, 'max': self.max,
+                'interval_width': self.interval_width(confidence),
+                'quantiles': dict((q.p, q.value) for q in self.quantiles),
+                'histogram': (self.histogram.counts.copy(), self.histogram.edges.copy())}
+
+
+# inputs the batched evaluation can vary, and their power_curve arguments
+_UNCERTAIN = {'free_stream.V': 'V', 'free_stream.rho': 'rho', 'rpm': 'rpm', 'pitch': 'pitch',
+              'chord_hub': 'chord_hub', 'chord_tip': 'chord_tip',
+              'twist_hub': 'twist_hub', 'twist_tip': 'twist_tip'}
+
+
+def _evaluate(rotor, values):
+    """performance of the rotor at the sampled `values` (dict of arrays),
+    all other inputs at their design values"""
+    kwargs = dict((_UNCERTAIN[name], value) for name, value in values.items())
+    kwargs.setdefault('V', rotor.free_stream.V*np.ones(len(values.values()[0])))
+    return rotor.power_curve(**kwargs)
+
+
+def monte_carlo(rotor, uncertain, outputs=('Cp', 'net_power'), sampler="sobol",
+                batch_size=256, max_samples=2**14, ci_width=None, confidence=.95,
+                quantiles=(.05, .5, .95), bins=50, seed=None):
+    """Propagate the distributions in `uncertain`, a dict of input name to
+    :class:`Normal` or :class:`Uniform`, through the AutoBEM `rotor`.
+
+    Inputs can be any of free_stream.V, free_stream.rho, rpm, pitch,
+    chord_hub, chord_tip, twist_hub and twist_tip; the rest stay at the
+    design's values. `sampler` is "sobol" (scrambled from `seed`, or from
+    a random seed without one) or "lhs" (a Latin hypercube per batch).
+    `ci_width` maps outputs to the width their mean's `confidence`
+    interval must reach for sampling to stop early.
+
+    Returns a dict with a :meth:`RunningStatistics.summary` for each name
+    in `outputs`, the number of ``samples`` and ``batches``, ``stopped``
+    (True when the interval targets were reached) and ``unconverged``, the
+    number of samples whose induction solve did not converge at every
+    station.
+    """
+    names = sorted(uncertain)
+    for name in names:
+        if name not in _UNCERTAIN:
+            raise ValueError("'%s' can't be sampled, only %s" % (name, ', '.join(sorted(_UNCERTAIN))))
+    if sampler not in ("sobol", "lhs"):
+        raise ValueError("sampler must be 'sobol' or 'lhs', not '%s'" % sampler)
+    ci_width = ci_width or {}
+
+    stats = dict((name, RunningStatistics(quantiles, bins)) for name in outputs)
+    rng = np.random.RandomState(seed)
+    # unscrambled, the first Sobol point is the corner of the unit cube,
+    # where a normal input sits at its clipped tail
+    sobol_seed = seed if seed is not None else rng.randint(2**31 - 1)
+    samples = batches = unconverged = 0
+    stopped = False
+    while samples < max_samples and not stopped:
+        n = min(batch_size, max_samples - samples)
+        if sampler == "sobol":
+            u = sobol(n, len(names), samples, sobol_seed)
+        else:
+            u = latin_hypercube(n, len(names), rng.randint(2**31 - 1))
+        values = dict((name, uncertain[name].ppf(u[:, j])) for j, name in enumerate(names))
+
+        perf = _evaluate(rotor, values)
+        for name in outputs:
+            stats[name].update(perf[name])
+        unconverged += int((~perf['converged']).sum())
+        samples += n
+        batches += 1
+
+        stopped = bool(ci_width) and all(stats[name].interval_width(confidence) <= width
+                                         for name, width in ci_width.items())
+
+    result = dict((name, stats[name].summary(confidence)) for name in outputs)
+    result.update(samples=samples, batches=batches, stopped=stopped, unconverged=unconverged)
+    return result
+
+
+if __name__ == "__main__":
+    import time
+
+    from bem import AutoBEM
+
+    rotor = AutoBEM(20, engine="vector")
+    uncertain = {'free_stream.V': Normal(10., .5),
+                 'free_stream.rho': Uniform(1.1, 1.3),
+                 'chord_hub': Normal(.7, .01), 'chord_tip': Normal(.187, .005),
+                 'twist_hub': Normal(29., .5), 'twist_tip': Normal(-3.58, .5)}
+
+    for sampler in ("sobol", "lhs"):
+        t0 = time.time()
+        result = monte_carlo(rotor, uncertain, sampler=sampler, seed=0,
+                             ci_width={'Cp': 1e-3, 'net_power': 200.})
+        print "%s: %d samples in %d batches, %.2f s" % (sampler, result['samples'],
+                                                        result['batches'], time.time() - t0)
+        for name in ('Cp', 'net_power'):
+            s = result[name]
+            print "  %-10s mean %.6g  std %.4g  CI width %.3g  5%%/50%%/95%% %s" % (
+                name, s['mean'], s['std'], s['interval_width'],
+                ' '.join('%.5g' % s['quantiles'][p] for p in (.05, .5, .95)))
+
+    # one workflow run per sample, for comparison
+    t0 = time.time()
+    rng = np.random.RandomState(0)
+    for _ in range(100):
+        for name, dist in uncertain.items():
+            rotor.set(name, dist.ppf(rng.rand()))
+        rotor.driver.workflow.run()
+    print "one run per sample: %.2f ms per sample" % ((time.time() - t0)*10)
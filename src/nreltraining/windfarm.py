@@ -0,0 +1,183 @@
+"""Wind farm of actuator disc turbines with Jensen wakes.
+
+Every turbine is an actuator disc with the same induction factor `a`, so
+from ActuatorDisc, Ct = 4a(1-a) and Cp = 4a(1-a)**2. A turbine leaves a
+top hat wake that widens linearly, R + k*d at distance d downstream, with
+a velocity deficit of (1 - sqrt(1 - Ct))*(R/(R + k*d))**2. A turbine in
+several wakes sees the root sum of squares of the deficits, each weighted
+by the fraction of its rotor the wake covers.
+
+Deficits shrink with distance, so wakes are ignored once their deficit
+drops below `min_deficit`, which bounds the box around a turbine, long
+downwind and narrow across, where its wake can reach. A k-d tree over the
+turbine positions, in coordinates scaled to that box, finds the pairs of
+turbines that can interact in O(N log N) for a farm of roughly even
+density, instead of checking all N**2 pairs. The deficits of all the pairs
+are computed in one vectorized pass.
+"""
+
+from math import pi, radians, sin, cos, sqrt
+
+import numpy as np
+
+from openmdao.main.api import Component
+from openmdao.lib.datatypes.api import Float, Array, Int
+
+
+def grid_layout(n, spacing=500.):
+    """x and y of `n` turbines on a square grid, row by row"""
+    columns = int(np.ceil(np.sqrt(n)))
+    i = np.arange(n)
+    return (i % columns)*spacing, (i // columns)*spacing
+
+
+def _overlap_fraction(offset, wake_radius, radius):
+    """fraction of a rotor of `radius` inside a wake of `wake_radius`
+    whose center is `offset` away"""
+    fraction = np.zeros(offset.shape)
+    full = offset <= wake_radius - radius
+    fraction[full] = 1.
+
+    part = ~full & (offset < wake_radius + radius)
+    d, R_w = offset[part], wake_radius[part]
+    r = radius
+    # area of the lens where two circles intersect
+    alpha = np.arccos(np.clip((d**2 + r**2 - R_w**2)/(2*d*r), -1., 1.))
+    beta = np.arccos(np.clip((d**2 + R_w**2 - r**2)/(2*d*R_w), -1., 1.))
+    lens = r**2*(alpha - np.sin(2*alpha)/2) + R_w**2*(beta - np.sin(2*beta)/2)
+    fraction[part] = lens/(pi*r**2)
+    return fraction
+
+
+class WindFarm(Component):
+    """Power of every turbine of a farm of identical actuator discs.
+
+    With ``search="index"`` the turbine pairs that can interact are found
+    with a k-d tree; ``search="all"`` checks every pair, which gives the
+    same result in O(N**2) and is kept for comparison.
+    """
+
+    # inputs
+    a = Float(.25, iotype="in", desc="induced velocity factor of every turbine", low=0, high=.5)
+    radius = Float(40., iotype="in", desc="rotor radius", units="m", low=0)
+    wake_decay = Float(.075, iotype="in", desc="growth of the wake radius per unit distance")
+    wind_direction = Float(270., iotype="in", units="deg",
+                           desc="direction the wind comes from, clockwise from the y axis")
+    Vu = Float(10., iotype="in", desc="free stream air velocity", units="m/s")
+    rho = Float(1.225, iotype="in", desc="air density", units="kg/m**3")
+    min_deficit = Float(5e-3, iotype="in", desc="wake deficits below this are ignored", low=0)
+
+    # outputs
+    total_power = Float(iotype="out", desc="power of the whole farm", units="W")
+    efficiency = Float(iotype="out", desc="farm power over the power without wakes")
+    n_pairs = Int(iotype="out", desc="number of wake interactions evaluated")
+
+    def __init__(self, n=100, search="index"):
+        super(WindFarm, self).__init__()
+        if search not in ("index", "all"):
+            raise ValueError("search must be 'index' or 'all', not '%s'" % search)
+        self._search = search
+
+        x, y = grid_layout(n)
+        self.add('x', Array(iotype='in', desc='x position of %d turbines' % n,
+                            default_value=x, shape=(n,), dtype=Float, units="m"))
+        self.add('y', Array(iotype='in', desc='y position of %d turbines' % n,
+                            default_value=y, shape=(n,), dtype=Float, units="m"))
+        self.add('V', Array(iotype='out', desc='wind speed at each of %d turbines' % n,
+                            default_value=np.zeros((n,)), shape=(n,), dtype=Float, units="m/s"))
+        self.add('power', Array(iotype='out', desc='power of each of %d turbines' % n,
+                                default_value=np.zeros((n,)), shape=(n,), dtype=Float, units="W"))
+
+    def _candidate_pairs(self, s, t, reach, width):
+        """index pairs (i, j) of turbines that may be less than `reach`
+        apart along the wind and `width` across it"""
+        if self._search == "all" or not np.isfinite(reach):
+            i, j = np.triu_indices(len(s), 1)
+            return i, j
+
+        from scipy.spatial import cKDTree
+
+        # the box becomes a unit cube in the max norm
+        tree = cKDTree(np.column_stack([s/reach, t/width]))
+        try:
+            pairs = tree.query_pairs(1., p=np.inf, output_type='ndarray')
+        except TypeError:  # scipy before 0.19
+            pairs = np.array(list(tree.query_pairs(1., p=np.inf)), dtype=int).reshape(-1, 2)
+        return pairs[:, 0], pairs[:, 1]
+
+    def execute(self):
+        a, R, k = self.a, self.radius, self.wake_decay
+        Ct = 4*a*(1-a)
+        Cp = Ct*(1-a)
+        deficit_0 = 1 - sqrt(1 - Ct)  # = 2a, right behind the rotor
+
+        # coordinates along and across the wind
+        theta = radians(self.wind_direction)
+        down = -sin(theta), -cos(theta)
+        s = self.x*down[0] + self.y*down[1]
+        t = -self.x*down[1] + self.y*down[0]
+
+        # beyond this distance every wake deficit is below min_deficit; a
+        # wake that doesn't grow never weakens
+        if self.min_deficit > 0 and k > 0:
+            reach = R*(sqrt(deficit_0/self.min_deficit) - 1)/k
+        else:
+            reach = np.inf
+        i, j = self._candidate_pairs(s, t, reach, 2*R + (k*reach if k > 0 else 0.))
+
+        # orient every pair from the upstream turbine u to the downstream d
+        upstream = s[i] < s[j]
+        u = np.where(upstream, i, j)
+        d = np.where(upstream, j, i)
+        dist = s[d] - s[u]
+        keep = (dist > 0) & (dist < reach)
+        u, d, dist = u[keep], d[keep], dist[keep]
+
+        wake_radius = R + k*dist
+        deficit = deficit_0*(R/wake_radius)**2*_overlap_fraction(abs(t[d] - t[u]), wake_radius, R)
+        hit = deficit > 0
+
+        n = len(s)
+        squares = np.bincount(d[hit], weights=deficit[hit]**2, minlength=n)
+        V = self.Vu*(1 - np.sqrt(squares))
+
+        power = .5*self.rho*pi*R**2*V**3*Cp
+        self.V = V
+        self.power = power
+        self.total_power = power.sum()
+        self.efficiency = self.total_power/(n*.5*self.rho*pi*R**2*self.Vu**3*Cp)
+        self.n_pairs = int(hit.sum())
+
+
+def farm_scaling(sizes=(100, 1000, 10000), searches=("index", "all"), max_all=3000, repeat=3):
+    """Best of `repeat` WindFarm execution times per search and farm size,
+    as ``{search: [(n, seconds)]}``; ``search="all"`` stops at `max_all`
+    turbines"""
+    import time
+
+    scaling = {}
+    for search in searches:
+        scaling[search] = []
+        for n in sizes:
+            if search == "all" and n > max_all:
+                continue
+            farm = WindFarm(n, search)
+            times = []
+            for _ in range(repeat):
+                t0 = time.time()
+                farm.run()
+                times.append(time.time() - t0)
+            scaling[search].append((n, min(times)))
+    return scaling
+
+
+if __name__ == "__main__":
+    farm = WindFarm(400)
+    farm.run()
+    print "400 turbines: %.1f MW, efficiency %.3f, %d wake interactions" % (
+        farm.total_power/1e6, farm.efficiency, farm.n_pairs)
+    print
+    print "%-6s %8s %12s" % ('search', 'n', 'time (s)')
+    for search, rows in sorted(farm_scaling((100, 300, 1000, 3000, 10000)).items()):
+        for n, seconds in rows:
+            print "%-6s %8d %12.4f" % (search, n, seconds)